@@ -2,3 +2,4 @@
 setlocal
 call "C:\Program Files (x86)\Microsoft Visual Studio\18\BuildTools\VC\Auxiliary\Build\vcvars64.bat" >nul 2>&1
 cl.exe /EHsc ai.cpp
+cl.exe /EHsc /LD /DAI_SHARED_LIB ai.cpp /Fe:ai.dll /Fo:ai_dll.obj
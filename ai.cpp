@@ -7,11 +7,16 @@
 #include <cstdio>
 #include <cstdlib>
 #include <cstring>
+#include <initializer_list>
+#include <cmath>
+#include <chrono>
 
 using namespace std;
 
 #if defined(_WIN32) || defined(_WIN64)
 #include <windows.h>
+#include <io.h>
+#include <fcntl.h>
 // Ensure we link against user32.lib for clipboard APIs (OpenClipboard etc.)
 #pragma comment(lib, "user32.lib")
 bool sendToClipboard(const std::string &text)
@@ -73,18 +78,45 @@ const std::vector<std::string> outdoorFurniture =
 const std::vector<std::string> indoorFurniture = 
 	{ "bed", "couch", "massage table", "dentist chair", "comfy chair" };
 
+#ifdef AI_COUNT_ALLOCS
+// Benchmark builds only (-DAI_COUNT_ALLOCS): count heap allocations so
+// --bench can report allocations per prompt.
+#include <new>
+static unsigned long long gAllocCount = 0;
+void *operator new(size_t size)
+{
+	gAllocCount++;
+	if (void *p = malloc(size ? size : 1))
+		return p;
+	throw std::bad_alloc();
+}
+void operator delete(void *p) noexcept { free(p); }
+void operator delete(void *p, size_t) noexcept { free(p); }
+#endif
+
+// One process-wide generator used by every picker. Every prompt re-seeds it
+// (see generatePromptForSeed), so a given seed always yields the same prompt
+// for a given build of this file.
+std::mt19937 gRng;
+
 int getRandomNumber(int max)
 {
-	std::random_device rd; // obtain a random number from hardware
-	std::mt19937 gen(rd()); // seed the generator
 	std::uniform_int_distribution<> distr(0, max); // define the range
-  
+#ifdef AI_LEGACY_RNG
+	// Old behaviour, kept only to benchmark against: a fresh hardware-seeded
+	// generator per call.
+	std::random_device rd;
+	std::mt19937 gen(rd());
 	return distr(gen);
+#else
+	return distr(gRng);
+#endif
 }
 
 float getRandomFloat(float lo, float hi)
 {
-	float result = lo + static_cast <float> (rand()) /( static_cast <float> (RAND_MAX/(hi-lo)));
+	std::uniform_real_distribution<float> distr(lo, hi);
+	float result = distr(gRng);
  
 	// truncation   
 	float n = std::pow(10.0f, 1); // '1' is decimal places
@@ -93,14 +125,31 @@ float getRandomFloat(float lo, float hi)
 	return result;
 }
 
-std::string removeString(std::string str, const std::string& toRemove)
+// Remove every occurrence of each needle from str in one left-to-right pass,
+// compacting in place (no reallocation, no repeated erase() shifting).
+void removeStrings(std::string &str, std::initializer_list<const char *> needles)
 {
-	size_t pos = 0;
-	while ((pos = str.find(toRemove, pos)) != std::string::npos)
-	{
-		str.erase(pos, toRemove.length());
+	size_t w = 0;
+	size_t r = 0;
+	const size_t n = str.size();
+	while (r < n) {
+		size_t skip = 0;
+		for (const char *needle : needles) {
+			if (str[r] == needle[0]) {
+				size_t len = strlen(needle);
+				if (str.compare(r, len, needle) == 0) {
+					skip = len;
+					break;
+				}
+			}
+		}
+		if (skip) {
+			r += skip;
+		} else {
+			str[w++] = str[r++];
+		}
 	}
-	return str;
+	str.resize(w);
 }
 
 std::string insertBreak()
@@ -115,7 +164,20 @@ std::string insertBreak()
 	return result;
 }
 
-std::string pickRandomString(const std::vector<std::string>& inputVector, int num = 1)
+// Single pick: returns a reference into inputVector, so appending the result
+// doesn't make an intermediate copy. (Callers passing a braced list use it
+// within the same expression, while the temporary vector is still alive.)
+const std::string& pickRandomString(const std::vector<std::string>& inputVector)
+{
+	static const std::string empty;
+
+	if (inputVector.empty())
+		return empty;
+
+	return inputVector[getRandomNumber(static_cast<int>(inputVector.size()) - 1)];
+}
+
+std::string pickRandomString(const std::vector<std::string>& inputVector, int num)
 {
 	std::string result;
 
@@ -140,9 +202,10 @@ std::string getQuality()
 	return result;
 }
 
-std::string getBody(std::string output)
+std::string getBody(const std::string& output)
 {
 	std::string body;
+	body.reserve(512);
 
 	body += "((limp body)), ";
 	
@@ -210,9 +273,10 @@ std::string getEyes()
 	return eyes;
 }
 
-std::string pickUpper(std::string output)
+std::string pickUpper(const std::string& output)
 {
 	std::string upper;
+	upper.reserve(128);
 	
 	if (getRandomNumber(15) == 15) {
 		upper += pickRandomString(color);
@@ -262,9 +326,10 @@ std::string pickUpper(std::string output)
   return upper;
 }
 
-std::string pickLower(std::string output)
+std::string pickLower(const std::string& output)
 {
 	std::string lower;
+	lower.reserve(128);
 
 	if (output.find("pajamas") != std::string::npos) return lower;
 	
@@ -302,9 +367,10 @@ std::string pickLower(std::string output)
 	return lower;
 }
 
-std::string getOutfit(std::string output)
+std::string getOutfit(const std::string& output)
 {
 	std::string outfit;
+	outfit.reserve(256);
 	
 	if (kBodyFocusType != LOWER)
 		outfit += pickUpper(output);
@@ -320,6 +386,7 @@ std::string getOutfit(std::string output)
 std::string getPose()
 {
 	std::string pose;
+	pose.reserve(1024);
 	std::vector<std::string> newPose;
 	
 	if (kNumberOfWomen == 2) {
@@ -483,6 +550,7 @@ std::string getPose()
 std::string getHair()
 {
 	std::string hair;
+	hair.reserve(128);
 	
 	hair += "((";
 	hair += "long wavy ";
@@ -501,36 +569,39 @@ std::string getHair()
 	return hair;
 }
 
-std::string getAtmosphere(std::string output)
+std::string getAtmosphere()
 {
 	std::string atmos;
+	atmos.reserve(512);
 	
-	std::string fullAtmos = "night scene, erotic atmosphere, tension-filled moment, lustful intensity, provocative silence, suggestive composition, partial darkness, moody tone, explicit detail, curves, taboo theme, dark, theme, warm_light, vibrant colors, soft focus, high contrast, depth of field, rich details, nature-inspired color palette, playful composition, dynamic angle, ";
-	
-	// Split by comma, take roughly half
-	std::vector<std::string> phrases;
-	size_t start = 0;
-	size_t pos = 0;
-	while ((pos = fullAtmos.find(", ", start)) != std::string::npos) {
-		phrases.push_back(fullAtmos.substr(start, pos - start + 2)); // include ", "
-		start = pos + 2;
-	}
-	if (start < fullAtmos.length()) {
-		phrases.push_back(fullAtmos.substr(start));
-	}
+	// Split by comma once; every prompt then selects from the same list.
+	static const std::vector<std::string> phrases = [] {
+		std::string fullAtmos = "night scene, erotic atmosphere, tension-filled moment, lustful intensity, provocative silence, suggestive composition, partial darkness, moody tone, explicit detail, curves, taboo theme, dark, theme, warm_light, vibrant colors, soft focus, high contrast, depth of field, rich details, nature-inspired color palette, playful composition, dynamic angle, ";
+		std::vector<std::string> split;
+		size_t start = 0;
+		size_t pos = 0;
+		while ((pos = fullAtmos.find(", ", start)) != std::string::npos) {
+			split.push_back(fullAtmos.substr(start, pos - start + 2)); // include ", "
+			start = pos + 2;
+		}
+		if (start < fullAtmos.length()) {
+			split.push_back(fullAtmos.substr(start));
+		}
+		return split;
+	}();
 	
-	// Randomly select roughly half
+	// Randomly select roughly half, appending in pick order. Indices of the
+	// phrases not yet picked live in a reused scratch vector.
+	static std::vector<size_t> remaining;
+	remaining.resize(phrases.size());
+	for (size_t i = 0; i < phrases.size(); i++)
+		remaining[i] = i;
+
 	int targetCount = phrases.size() / 2;
-	std::vector<std::string> selected;
-	for (int i = 0; i < targetCount && !phrases.empty(); i++) {
-		int idx = getRandomNumber(phrases.size() - 1);
-		selected.push_back(phrases[idx]);
-		phrases.erase(phrases.begin() + idx);
-	}
-	
-	// Concatenate selected phrases
-	for (const auto& phrase : selected) {
-		atmos += phrase;
+	for (int i = 0; i < targetCount && !remaining.empty(); i++) {
+		int idx = getRandomNumber(remaining.size() - 1);
+		atmos += phrases[remaining[idx]];
+		remaining.erase(remaining.begin() + idx);
 	}
 	
 	if (outdoors) {
@@ -548,6 +619,7 @@ std::string getAtmosphere(std::string output)
 std::string getSetting()
 {
 	std::string setting;
+	setting.reserve(128);
 	
 	if (outdoors) {
 		setting += "outdoors, ";
@@ -629,10 +701,11 @@ std::string getSetting()
 	return setting;
 }
 
-std::string getShot(std::string output)
+std::string getShot(const std::string& output)
 {
 	std::string shot;
 	std::vector<std::string> newShot;
+	newShot.reserve(48);
 	
 	if (kNumberOfWomen == 1 && output.find("pov") == std::string::npos) {
 		if (output.find("on back") != std::string::npos) {
@@ -782,11 +855,11 @@ std::string getLoras()
 	return lora;
 }
 
-int main() 
+// Assemble one prompt into `output`, which is cleared first. Callers reuse the
+// same string across prompts so its capacity is allocated only once.
+void generatePrompt(std::string &output)
 {
-	std::string output;
-	
-	srand (static_cast <unsigned> (time(0)));
+	output.clear();
 
 	kBodyFocusType = (BodyFocus) getRandomNumber(MAXBODY-1);
 	kAllowBreak = getRandomNumber(1);
@@ -824,7 +897,7 @@ int main()
 	output += getQuality();
 	output += getPose();
 	output += getHair();
-	output += getAtmosphere(output);
+	output += getAtmosphere();
 	output += getShot(output);
 	output += getOutfit(output);
 	output += getBody(output);
@@ -836,21 +909,207 @@ int main()
 
 	// remove face stuff (because of distortion) at some camera views
 	if (output.find("far") != std::string::npos) {
-		output = removeString(output, "woman has eyes closed, dark gray eye shadow, ");
-		output = removeString(output, "((sleeping woman has a round face)), ");
-		output = removeString(output, "((sleepy expression)), ((woman is snoring)), ((parted lips:1.5)), ((highly detailed mouth, sexy lips, focus on mouth))");
+		removeStrings(output, {
+			"woman has eyes closed, dark gray eye shadow, ",
+			"((sleeping woman has a round face)), ",
+			"((sleepy expression)), ((woman is snoring)), ((parted lips:1.5)), ((highly detailed mouth, sexy lips, focus on mouth))",
+		});
 		output += "(((hidden eyes:1.9))), (((hidden face:1.9))), (((hidden mouth:1.9))), ";
 	}
+}
 
-	printf("%s", output.c_str());
+void seedGenerator(unsigned long long seed)
+{
+	// splitmix64 finalizer: neighbouring seeds (S, S + 1, ...) get unrelated
+	// states. Seeding mt19937 from one word is much cheaper than a seed_seq,
+	// which matters because every prompt re-seeds.
+	seed += 0x9e3779b97f4a7c15ull;
+	seed = (seed ^ (seed >> 30)) * 0xbf58476d1ce4e5b9ull;
+	seed = (seed ^ (seed >> 27)) * 0x94d049bb133111ebull;
+	seed ^= seed >> 31;
+	gRng.seed(static_cast<std::mt19937::result_type>(seed ^ (seed >> 32)));
+}
 
-	// If NO_CLIPBOARD is set in the environment, skip attempting to copy
-	// from inside this process. This avoids hanging when a parent process
-	// captures stdout/stderr (for example when run from a GUI wrapper).
-	if (std::getenv("NO_CLIPBOARD") == nullptr) {
-		if (!sendToClipboard(output))
-			fprintf(stderr, "Clipboard copy failed\n");
+// Prompt n of a batch seeded with S uses seed S + n, so any prompt of a batch
+// can be reproduced on its own (ai --seed S+n, or generate_prompt(S+n, ...)).
+// Returns a reference to a builder reused by every call: copy it if it must
+// outlive the next call.
+const std::string& generatePromptForSeed(unsigned long long seed)
+{
+	static std::string builder = [] {
+		std::string s;
+		s.reserve(4096);
+		return s;
+	}();
+	seedGenerator(seed);
+	generatePrompt(builder);
+	return builder;
+}
+
+unsigned long long randomSeed()
+{
+	std::random_device rd;
+	return (static_cast<unsigned long long>(rd()) << 32) | rd();
+}
+
+// Generate `count` prompts without writing them and report prompts/second,
+// then check that re-seeding reproduces the same prompts. Build with
+// -DAI_LEGACY_RNG to measure the old per-call random_device behaviour.
+int runBenchmark(long long count, unsigned long long seed)
+{
+	if (count <= 0)
+		count = 10000;
+
+	size_t bytes = 0;
+#ifdef AI_COUNT_ALLOCS
+	unsigned long long allocs0 = gAllocCount;
+#endif
+	auto t0 = std::chrono::steady_clock::now();
+	for (long long n = 0; n < count; n++)
+		bytes += generatePromptForSeed(seed + n).size();
+	auto t1 = std::chrono::steady_clock::now();
+	double secs = std::chrono::duration<double>(t1 - t0).count();
+
+	printf("prompts:     %lld\n", count);
+	printf("seconds:     %.3f\n", secs);
+	printf("prompts/sec: %.0f\n", count / secs);
+	printf("avg bytes:   %.0f\n", static_cast<double>(bytes) / count);
+#ifdef AI_COUNT_ALLOCS
+	printf("allocs/prompt: %.1f\n", static_cast<double>(gAllocCount - allocs0) / count);
+#endif
+
+#ifdef AI_LEGACY_RNG
+	printf("same seed:   n/a (legacy RNG)\n");
+	return 0;
+#else
+	const int kCheck = 100;
+	std::vector<std::string> first;
+	for (int n = 0; n < kCheck; n++)
+		first.push_back(generatePromptForSeed(seed + n));
+	for (int n = 0; n < kCheck; n++) {
+		if (generatePromptForSeed(seed + n) != first[n]) {
+			printf("same seed:   FAILED at prompt %d\n", n);
+			return 1;
+		}
+	}
+	printf("same seed:   ok (%d prompts)\n", kCheck);
+	return 0;
+#endif
+}
+
+#if defined(_WIN32) || defined(_WIN64)
+#define AI_EXPORT extern "C" __declspec(dllexport)
+#else
+#define AI_EXPORT extern "C" __attribute__((visibility("default")))
+#endif
+
+// Shared-library entry point (build with -DAI_SHARED_LIB, see .vscode/build.bat):
+// writes the prompt for `seed` into buf as a NUL-terminated string, truncated
+// to len - 1 bytes, and returns the full prompt length. If the return value is
+// >= len, call again with a larger buffer; the same seed gives the same prompt.
+// Not thread-safe: the generator uses process-wide state.
+AI_EXPORT size_t generate_prompt(unsigned long long seed, char *buf, size_t len)
+{
+	const std::string& output = generatePromptForSeed(seed);
+	if (buf && len > 0) {
+		size_t n = output.size() < len - 1 ? output.size() : len - 1;
+		memcpy(buf, output.data(), n);
+		buf[n] = '\0';
+	}
+	return output.size();
+}
+
+#ifndef AI_SHARED_LIB
+// Usage:
+//   ai [--seed S]               one prompt to stdout and the clipboard
+//   ai --count N [--seed S]     N prompts to stdout, one per line (line breaks
+//                               inside a prompt become spaces)
+//   ai --count N --null         N prompts, each terminated by '\0' (exact text)
+//   ai --bench N [--seed S]     time N prompts and check seed reproducibility
+//
+// The seed comes from --seed, else the AI_SEED environment variable, else the
+// hardware random device (batch runs print it to stderr).
+int main(int argc, char **argv) 
+{
+	long long count = -1;
+	bool haveSeed = false;
+	unsigned long long seed = 0;
+	bool nullSeparated = false;
+	long long benchCount = -1;
+
+	for (int i = 1; i < argc; i++) {
+		if ((!strcmp(argv[i], "--count") || !strcmp(argv[i], "-n")) && i + 1 < argc) {
+			count = strtoll(argv[++i], NULL, 10);
+		} else if (!strcmp(argv[i], "--seed") && i + 1 < argc) {
+			seed = strtoull(argv[++i], NULL, 10);
+			haveSeed = true;
+		} else if (!strcmp(argv[i], "--null") || !strcmp(argv[i], "-0")) {
+			nullSeparated = true;
+		} else if (!strcmp(argv[i], "--bench") && i + 1 < argc) {
+			benchCount = strtoll(argv[++i], NULL, 10);
+		} else {
+			fprintf(stderr, "usage: %s [--count N] [--seed S] [--null] [--bench N]\n", argv[0]);
+			return 2;
+		}
+	}
+
+	if (!haveSeed) {
+		const char *envSeed = std::getenv("AI_SEED");
+		if (envSeed && *envSeed) {
+			seed = strtoull(envSeed, NULL, 10);
+			haveSeed = true;
+		}
+	}
+	if (!haveSeed) {
+		seed = randomSeed();
+		if (count >= 0)
+			fprintf(stderr, "seed: %llu\n", seed);
+	}
+
+	if (benchCount >= 0)
+		return runBenchmark(benchCount, seed);
+
+	if (count < 0) {
+		const std::string& output = generatePromptForSeed(seed);
+
+		printf("%s", output.c_str());
+
+		// If NO_CLIPBOARD is set in the environment, skip attempting to copy
+		// from inside this process. This avoids hanging when a parent process
+		// captures stdout/stderr (for example when run from a GUI wrapper).
+		if (std::getenv("NO_CLIPBOARD") == nullptr) {
+			if (!sendToClipboard(output))
+				fprintf(stderr, "Clipboard copy failed\n");
+		}
+
+		return 0;
+	}
+
+#if defined(_WIN32) || defined(_WIN64)
+	// Keep prompt text byte-exact: no "\n" -> "\r\n" translation on stdout.
+	_setmode(_fileno(stdout), _O_BINARY);
+#endif
+	static char outBuf[1 << 16];
+	setvbuf(stdout, outBuf, _IOFBF, sizeof(outBuf));
+
+	std::string line;
+	for (long long n = 0; n < count; n++) {
+		const std::string& output = generatePromptForSeed(seed + n);
+		if (nullSeparated) {
+			fwrite(output.data(), 1, output.size() + 1, stdout); // includes the '\0'
+		} else {
+			line.assign(output);
+			for (char &c : line)
+				if (c == '\n')
+					c = ' ';
+			line += '\n';
+			fwrite(line.data(), 1, line.size(), stdout);
+		}
+		if (ferror(stdout))
+			return 1; // reader went away
 	}
+	fflush(stdout);
 
 	return 0;
 }
+#endif // AI_SHARED_LIB
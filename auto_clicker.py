@@ -1,50 +1,683 @@
+"""
+Auto-clicker: SPACE toggles clicking, ESC exits.
+
+Clicks are scheduled against absolute deadlines on the monotonic clock, so
+the rate is the configured clicks per second however long each click takes
+(a late click makes the next wait shorter; after a long stall the schedule
+restarts instead of bursting to catch up). While OFF the clicking thread
+blocks on an event and doesn't wake at all. Each ON period ends with the
+achieved rate and the timing jitter.
+
+Clicks go through a backend: "pynput" drives the real mouse, "null" does
+nothing (dry run) and "record" keeps a timestamp per action. --benchmark
+runs the scheduler headless against the recording backend and reports the
+highest sustainable rate (bisected to within 5%), an inter-click interval
+histogram and CPU use; it doesn't need pynput or a display.
+
+Usage:
+  python auto_clicker.py [--cps N]
+  python auto_clicker.py --benchmark [--cps N] [--seconds S] [--spin-us N]
+
+Options:
+  --cps N        Target clicks per second (default: 100)
+  --spin-us N    Busy-wait this long before each deadline for sub-ms
+                 precision (default: 500; 0 to only sleep)
+  --backend B    pynput (default) or null
+  --benchmark    Measure the scheduler instead of clicking
+  --seconds S    Length of the benchmark run at --cps (default: 3)
+  --macro K=FILE Bind a macro file to hotkey K (a character or a key name
+                 like f2); repeatable. Pressing it again stops playback.
+
+Macros (move/click/press/release/wait/repeat, see compile_macro) are
+compiled when the program starts into a flat timeline of (offset, action)
+steps, so playback only waits and calls.
+"""
+import argparse
+import math
+import queue
 import threading
 import time
-from pynput.mouse import Button, Controller as MouseController
-from pynput.keyboard import Key, Listener as KeyboardListener
-
-# Initialize mouse controller
-mouse = MouseController()
-
-# State variables
-clicking = False
-running = True
-
-def clicker():
-    """Continuously clicks when clicking is True"""
-    while running:
-        if clicking:
-            mouse.click(Button.left)
-            time.sleep(0.001)  # Small delay to maximize click speed
+from array import array
+from pathlib import Path
+
+DEFAULT_CPS = 100.0
+DEFAULT_SPIN_US = 500
+
+# A click this many periods late restarts the schedule rather than firing
+# the missed clicks back to back.
+MAX_BEHIND_PERIODS = 4
+
+
+class PynputBackend:
+    """Real mouse and keyboard through pynput (imported on first use)."""
+
+    name = "pynput"
+
+    def __init__(self):
+        from pynput import keyboard
+        from pynput.mouse import Button, Controller as MouseController
+
+        self._buttons = {"left": Button.left, "right": Button.right, "middle": Button.middle}
+        self._mouse = MouseController()
+        self._keyboard = keyboard
+
+    def click(self, button="left", count=1):
+        self._mouse.click(self._buttons[button], count)
+
+    def press(self, button="left"):
+        self._mouse.press(self._buttons[button])
+
+    def release(self, button="left"):
+        self._mouse.release(self._buttons[button])
+
+    def move(self, x, y):
+        self._mouse.position = (x, y)
+
+    @property
+    def keys(self):
+        return self._keyboard.Key
+
+    def key(self, name):
+        """pynput key for a hotkey name: a single character or a Key member (f1, home, ...)."""
+        if len(name) == 1:
+            return self._keyboard.KeyCode.from_char(name)
+        try:
+            return getattr(self._keyboard.Key, name.lower())
+        except AttributeError:
+            raise ValueError(f"unknown key {name!r}") from None
+
+    def listen(self, on_press):
+        """Run a keyboard listener until on_press returns False."""
+        with self._keyboard.Listener(on_press=on_press) as listener:
+            listener.join()
+
+
+class NullBackend:
+    """Accepts every action and does nothing; counts clicks."""
+
+    name = "null"
+
+    def __init__(self):
+        self.clicks = 0
+
+    def click(self, button="left", count=1):
+        self.clicks += count
+
+    def press(self, button="left"):
+        pass
+
+    def release(self, button="left"):
+        pass
+
+    def move(self, x, y):
+        pass
+
+
+class RecordingBackend(NullBackend):
+    """Null backend that also records (perf_counter time, action, args)."""
+
+    name = "record"
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def click(self, button="left", count=1):
+        self.clicks += count
+        self.events.append((time.perf_counter(), "click", (button, count)))
+
+    def press(self, button="left"):
+        self.events.append((time.perf_counter(), "press", (button,)))
+
+    def release(self, button="left"):
+        self.events.append((time.perf_counter(), "release", (button,)))
+
+    def move(self, x, y):
+        self.events.append((time.perf_counter(), "move", (x, y)))
+
+
+BACKENDS = {"pynput": PynputBackend, "null": NullBackend, "record": RecordingBackend}
+
+
+def wait_until(deadline, spin, cancel):
+    """Sleep (interruptibly) until `spin` seconds before the perf_counter
+    deadline, then busy-wait. Returns False if `cancel` got set meanwhile."""
+    now = time.perf_counter()
+    if deadline - now > spin:
+        if cancel.wait(deadline - now - spin):
+            return False
+    while time.perf_counter() < deadline:
+        pass
+    return not cancel.is_set()
+
+
+class ClickStats:
+    """Running timing stats for one ON period; constant memory."""
+
+    def __init__(self, cps):
+        self.cps = cps
+        self.clicks = 0
+        self.first = None
+        self.last = None
+        # Welford running mean/variance of inter-click intervals
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.max_late = 0.0
+        self.resyncs = 0
+
+    def record(self, t, late):
+        if self.last is not None:
+            interval = t - self.last
+            self._n += 1
+            delta = interval - self._mean
+            self._mean += delta / self._n
+            self._m2 += delta * (interval - self._mean)
+        else:
+            self.first = t
+        self.last = t
+        self.clicks += 1
+        if late > self.max_late:
+            self.max_late = late
+
+    @property
+    def rate(self):
+        if self.clicks < 2:
+            return 0.0
+        return (self.clicks - 1) / (self.last - self.first)
+
+    @property
+    def jitter(self):
+        """Standard deviation of the inter-click interval, in seconds."""
+        return math.sqrt(self._m2 / self._n) if self._n > 1 else 0.0
+
+    def summary(self):
+        return (
+            f"{self.clicks} clicks, {self.rate:.1f}/s (target {self.cps:g}), "
+            f"jitter {self.jitter * 1000:.3f} ms, max late {self.max_late * 1000:.3f} ms"
+            + (f", {self.resyncs} resync(s)" if self.resyncs else "")
+        )
+
+
+class ClickScheduler:
+    """Calls click() cps times a second while active, on its own thread."""
+
+    def __init__(self, click, cps=DEFAULT_CPS, spin=DEFAULT_SPIN_US / 1e6, on_period_end=None):
+        self.click = click
+        self.cps = cps
+        self.spin = spin
+        # Called on the clicking thread with the ClickStats of each ON period
+        self.on_period_end = on_period_end
+        self.stats = None
+        self._on = threading.Event()
+        self._off = threading.Event()
+        self._off.set()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def active(self):
+        return self._on.is_set()
+
+    def start(self):
+        self._thread.start()
+
+    def set_active(self, active):
+        if active:
+            self._off.clear()
+            self._on.set()
+        else:
+            self._on.clear()
+            self._off.set()
+
+    def toggle(self):
+        self.set_active(not self.active)
+        return self.active
+
+    def stop(self):
+        self._running = False
+        self._on.set()
+        self._off.set()
+        self._thread.join()
+
+    def _run(self):
+        while self._running:
+            self._on.wait()
+            if not self._running:
+                break
+            period = 1.0 / self.cps
+            stats = self.stats = ClickStats(self.cps)
+            deadline = time.perf_counter()
+            while self._on.is_set() and self._running:
+                if not wait_until(deadline, self.spin, self._off):
+                    break
+                now = time.perf_counter()
+                self.click()
+                late = now - deadline
+                stats.record(now, late)
+                deadline += period
+                if late > MAX_BEHIND_PERIODS * period:
+                    # Stalled (e.g. the machine was busy); start a new schedule
+                    stats.resyncs += 1
+                    deadline = now + period
+            if self.on_period_end is not None:
+                self.on_period_end(stats)
+
+
+def _run_for(cps, seconds, spin):
+    # One ON period of `seconds` against a fresh recording backend.
+    backend = RecordingBackend()
+    done = []
+    sched = ClickScheduler(backend.click, cps=cps, spin=spin, on_period_end=done.append)
+    sched.start()
+    cpu = time.process_time()
+    sched.set_active(True)
+    time.sleep(seconds)
+    sched.set_active(False)
+    sched.stop()
+    cpu = time.process_time() - cpu
+    return backend, done[0], cpu / seconds
+
+
+def find_max_cps(spin, seconds=0.5, start=1000.0, limit=1e7, tolerance=0.05):
+    """Bracket the highest target rate the scheduler holds to within 2%.
+
+    Doubles the target from `start` up to the first miss, then bisects until
+    the held and missed targets are within `tolerance` of each other. Returns
+    (rate, held, missed): the rate achieved at the highest held target, that
+    target, and the lowest missed one (None if `limit` was held). rate and
+    held are None if `start` is already missed.
+    """
+    def held(cps):
+        _, stats, _ = _run_for(cps, seconds, spin)
+        return stats.rate if stats.rate >= 0.98 * cps else None
+
+    best = lo = hi = None
+    cps = start
+    while cps <= limit:
+        rate = held(cps)
+        if rate is None:
+            hi = cps
+            break
+        best, lo = rate, cps
+        cps *= 2
+    if lo is not None and hi is not None:
+        while hi > lo * (1 + tolerance):
+            mid = (lo * hi) ** 0.5
+            rate = held(mid)
+            if rate is None:
+                hi = mid
+            else:
+                best, lo = rate, mid
+    return best, lo, hi
+
+
+# Histogram buckets: |interval - period| up to this many microseconds.
+HISTOGRAM_US = (1, 10, 50, 100, 500, 1000, 5000)
+
+
+def interval_histogram(times, period):
+    """Counts of |interval - period| per HISTOGRAM_US bucket (plus overflow),
+    and the sorted intervals."""
+    intervals = sorted(b - a for a, b in zip(times, times[1:]))
+    counts = [0] * (len(HISTOGRAM_US) + 1)
+    for iv in intervals:
+        dev = abs(iv - period) * 1e6
+        for i, edge in enumerate(HISTOGRAM_US):
+            if dev <= edge:
+                counts[i] += 1
+                break
         else:
-            time.sleep(0.01)  # Longer sleep when not clicking to save CPU
+            counts[-1] += 1
+    return counts, intervals
+
+
+def benchmark(cps, seconds, spin):
+    print(f"Scheduler benchmark (recording backend, spin {spin * 1e6:g} us)")
+    best, held, missed = find_max_cps(spin)
+    if best is None:
+        print(f"  max sustainable: below {missed:,.0f} clicks/s")
+    elif missed is None:
+        print(f"  max sustainable: ~{best:,.0f} clicks/s (every target up to {held:,.0f} held)")
+    else:
+        print(f"  max sustainable: ~{best:,.0f} clicks/s (target {held:,.0f} held, {missed:,.0f} missed)")
+
+    backend, stats, cpu = _run_for(cps, seconds, spin)
+    period = 1.0 / cps
+    counts, intervals = interval_histogram([t for t, _, _ in backend.events], period)
+    print(f"\nAt {cps:g} clicks/s for {seconds:g} s: {stats.summary()}")
+    print(f"  CPU: {cpu * 100:.1f}% of one core")
+    if intervals:
+        def pct(q):
+            return intervals[min(len(intervals) - 1, int(q * len(intervals)))] * 1000
+        print(f"  interval ms: p50 {pct(0.5):.3f}, p99 {pct(0.99):.3f}, max {intervals[-1] * 1000:.3f}")
+        print("  |interval - period|:")
+        labels = [f"<= {e} us" for e in HISTOGRAM_US] + [f"> {HISTOGRAM_US[-1]} us"]
+        for label, n in zip(labels, counts):
+            share = n / len(intervals)
+            print(f"    {label:>10} {n:8d} {share * 100:6.2f}% {'#' * round(share * 40)}")
+
+
+# Macro files: one action per line, '#' starts a comment.
+#   move X Y               move the pointer
+#   click [BUTTON] [N]     click (left by default) N times
+#   press [BUTTON]         hold a button down
+#   release [BUTTON]       let it go
+#   wait N[ms|s]           advance the timeline (milliseconds by default)
+#   repeat N ... end       repeat the enclosed lines N times (nestable)
+MACRO_BUTTONS = ("left", "right", "middle")
+
+# Compiled macros are unrolled; refuse anything longer than this.
+MAX_MACRO_STEPS = 1_000_000
+
+
+class Macro:
+    """
+    A macro compiled to a flat timeline: offsets[i] is when step i runs,
+    in seconds from the start, and ops[i] is its (action, args). duration
+    includes any waits after the last step.
+
+    Playback walks the two arrays; nothing is parsed or allocated per step.
+    """
+
+    def __init__(self, name, offsets, ops, duration=None):
+        self.name = name
+        self.offsets = offsets
+        self.ops = ops
+        self.duration = duration if duration is not None else (offsets[-1] if offsets else 0.0)
+        self.backend = None
+        self.calls = None
+
+    def __len__(self):
+        return len(self.ops)
+
+    def bind(self, backend):
+        """Resolve every step to a bound backend method, once."""
+        self.backend = backend
+        self.calls = [(getattr(backend, op), args) for op, args in self.ops]
+        return self
+
+
+def _parse_wait(text):
+    if text.endswith("ms"):
+        return float(text[:-2]) / 1000
+    if text.endswith("s"):
+        return float(text[:-1])
+    return float(text) / 1000
+
+
+def compile_macro(text, name="macro"):
+    """Compile macro source (see the format above) into a Macro. Raises
+    ValueError with the line number on bad input."""
+    # Parse into a tree of (op, args) and ("repeat", count, body) first
+    root = []
+    stack = [root]
+    for lineno, line in enumerate(text.splitlines(), 1):
+        words = line.split("#", 1)[0].split()
+        if not words:
+            continue
+        op, rest = words[0].lower(), words[1:]
+        try:
+            if op == "move" and len(rest) == 2:
+                stack[-1].append(("move", (int(rest[0]), int(rest[1]))))
+            elif op == "click" and len(rest) <= 2:
+                button = rest[0].lower() if rest else "left"
+                count = int(rest[1]) if len(rest) > 1 else 1
+                if button not in MACRO_BUTTONS or count < 1:
+                    raise ValueError
+                stack[-1].append(("click", (button, count)))
+            elif op in ("press", "release") and len(rest) <= 1:
+                button = rest[0].lower() if rest else "left"
+                if button not in MACRO_BUTTONS:
+                    raise ValueError
+                stack[-1].append((op, (button,)))
+            elif op == "wait" and len(rest) == 1:
+                seconds = _parse_wait(rest[0].lower())
+                if not math.isfinite(seconds) or seconds < 0:
+                    raise ValueError
+                stack[-1].append(("wait", seconds))
+            elif op == "repeat" and len(rest) == 1:
+                body = []
+                if int(rest[0]) < 0:
+                    raise ValueError
+                stack[-1].append(("repeat", int(rest[0]), body))
+                stack.append(body)
+            elif op == "end" and not rest and len(stack) > 1:
+                stack.pop()
+            else:
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"{name}:{lineno}: can't parse {line.strip()!r}") from None
+    if len(stack) > 1:
+        raise ValueError(f"{name}: 'repeat' without 'end'")
+
+    # Size every repeat body up front, so an oversized macro is rejected
+    # before anything is expanded
+    sizes = {}
+
+    def size(nodes):
+        steps, seconds = 0, 0.0
+        for node in nodes:
+            if node[0] == "wait":
+                seconds += node[1]
+            elif node[0] == "repeat":
+                body = sizes[id(node)] = size(node[2])
+                steps += node[1] * body[0]
+                seconds += node[1] * body[1]
+            else:
+                steps += 1
+        return steps, seconds
+
+    total_steps, duration = size(root)
+    if total_steps > MAX_MACRO_STEPS:
+        raise ValueError(f"{name}: expands to {total_steps} steps (max {MAX_MACRO_STEPS})")
+
+    # Then flatten it onto the timeline
+    offsets = array("d")
+    ops = []
+    t = 0.0
+
+    def emit(nodes):
+        nonlocal t
+        for node in nodes:
+            if node[0] == "wait":
+                t += node[1]
+            elif node[0] == "repeat":
+                steps, seconds = sizes[id(node)]
+                if not steps:
+                    # Waits only: no need to walk it
+                    t += node[1] * seconds
+                    continue
+                for _ in range(node[1]):
+                    emit(node[2])
+            else:
+                offsets.append(t)
+                ops.append(node)
+
+    emit(root)
+    return Macro(name, offsets, ops, duration)
+
+
+class MacroPlayer:
+    """Plays one macro at a time on its own thread. Starting a macro while
+    one is playing stops the current one first.
+
+    Every play() and stop() bumps a generation counter; a playback only runs
+    while the counter still has the value it started with. Buttons pressed
+    by a macro are released if it is stopped before releasing them.
+    """
+
+    def __init__(self, spin=DEFAULT_SPIN_US / 1e6, on_done=None):
+        self.spin = spin
+        # Called on the player thread with (macro, steps played, max lateness)
+        self.on_done = on_done
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._generation = 0
+        # Set after every generation bump, to cut a wait short
+        self._wake = threading.Event()
+        self.playing = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _bump(self, macro=None, enqueue=False):
+        with self._lock:
+            self._generation += 1
+            if enqueue:
+                self._queue.put((self._generation, macro))
+        self._wake.set()
+
+    def play(self, macro):
+        self._bump(macro, enqueue=True)
+
+    def stop(self):
+        self._bump()
+
+    def close(self):
+        self._bump(None, enqueue=True)
+        self._thread.join()
+
+    def _current(self, generation):
+        # Clear before checking: a bump after the clear sets _wake again.
+        self._wake.clear()
+        return generation == self._generation
+
+    def _run(self):
+        while True:
+            generation, macro = self._queue.get()
+            if macro is None:
+                return
+            if generation != self._generation:
+                # Superseded before it started
+                continue
+            self.playing = macro
+            played, max_late = self._play(generation, macro)
+            self.playing = None
+            if self.on_done is not None:
+                self.on_done(macro, played, max_late)
+
+    def _play(self, generation, macro):
+        offsets, ops, calls, spin, wake = macro.offsets, macro.ops, macro.calls, self.spin, self._wake
+        held = set()
+        max_late = 0.0
+        played = 0
+        start = time.perf_counter()
+        try:
+            for i in range(len(calls)):
+                deadline = start + offsets[i]
+                while not wait_until(deadline, spin, wake):
+                    if not self._current(generation):
+                        return played, max_late
+                if generation != self._generation:
+                    return played, max_late
+                late = time.perf_counter() - deadline
+                if late > max_late:
+                    max_late = late
+                fn, args = calls[i]
+                fn(*args)
+                op = ops[i][0]
+                if op == "press":
+                    held.add(args[0])
+                elif op == "release":
+                    held.discard(args[0])
+                played += 1
+            return played, max_late
+        finally:
+            for button in held:
+                macro.backend.release(button)
+
+
+scheduler = None
+keys = None
+# Hotkey -> bound Macro, and the player for them
+macros = {}
+player = None
+
 
 def on_press(key):
     """Handle key press events"""
-    global clicking, running
-    
-    if key == Key.space:
-        clicking = not clicking
-        status = "ON" if clicking else "OFF"
+    if key == keys.space:
+        status = "ON" if scheduler.toggle() else "OFF"
         print(f"Auto-clicker: {status}")
-    elif key == Key.esc:
+    elif key == keys.esc:
         print("Exiting auto-clicker...")
-        running = False
+        scheduler.set_active(False)
         return False  # Stop listener
+    elif key in macros:
+        macro = macros[key]
+        if player.playing is macro:
+            player.stop()
+            print(f"Macro {macro.name}: stopped")
+        else:
+            player.play(macro)
+            print(f"Macro {macro.name}: playing ({len(macro)} steps, {macro.duration:.3f} s)")
+
 
 def main():
+    global scheduler, keys, player
+    parser = argparse.ArgumentParser(description="Toggleable auto-clicker")
+    parser.add_argument("--cps", type=float, default=DEFAULT_CPS, help="Target clicks per second")
+    parser.add_argument("--spin-us", type=float, default=DEFAULT_SPIN_US, help="Busy-wait before each deadline (us)")
+    parser.add_argument("--backend", choices=("pynput", "null"), default="pynput", help="Click backend")
+    parser.add_argument("--benchmark", action="store_true", help="Measure the scheduler headless")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Benchmark run length")
+    parser.add_argument("--macro", action="append", default=[], metavar="KEY=FILE", help="Bind a macro file to a hotkey")
+    args = parser.parse_args()
+    if args.cps <= 0:
+        parser.error("--cps must be positive")
+
+    compiled = []
+    for spec in args.macro:
+        hotkey, sep, path = spec.partition("=")
+        if not sep or not hotkey or not path:
+            parser.error(f"--macro expects KEY=FILE, got {spec!r}")
+        if hotkey.lower() in ("space", "esc"):
+            parser.error(f"{hotkey} is reserved")
+        try:
+            compiled.append((hotkey, compile_macro(Path(path).read_text(encoding="utf-8"), name=path)))
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+    if args.benchmark:
+        benchmark(args.cps, args.seconds, args.spin_us / 1e6)
+        return
+
+    # The keyboard always comes from pynput; --backend null only stops clicks
+    keyboard = PynputBackend()
+    backend = keyboard if args.backend == "pynput" else NullBackend()
+    keys = keyboard.keys
+    player = MacroPlayer(
+        spin=args.spin_us / 1e6,
+        on_done=lambda m, n, late: print(f"  macro {m.name}: {n}/{len(m)} steps, max late {late * 1000:.3f} ms"),
+    )
+    for hotkey, macro in compiled:
+        try:
+            macros[keyboard.key(hotkey)] = macro.bind(backend)
+        except ValueError as e:
+            parser.error(str(e))
+
+    scheduler = ClickScheduler(
+        backend.click,
+        cps=args.cps,
+        spin=args.spin_us / 1e6,
+        on_period_end=lambda stats: print(f"  {stats.summary()}"),
+    )
+
     print("Auto-Clicker Started!")
+    print(f"Target: {args.cps:g} clicks/s ({backend.name} backend)")
     print("Press SPACE to toggle clicking ON/OFF")
+    for hotkey, macro in compiled:
+        print(f"Press {hotkey} to play/stop {macro.name} ({len(macro)} steps, {macro.duration:.3f} s)")
     print("Press ESC to exit")
     print("Status: OFF")
-    
+
     # Start clicking thread
-    click_thread = threading.Thread(target=clicker, daemon=True)
-    click_thread.start()
-    
+    scheduler.start()
+
     # Start keyboard listener
-    with KeyboardListener(on_press=on_press) as listener:
-        listener.join()
+    keyboard.listen(on_press)
+    scheduler.stop()
+    player.close()
 
 if __name__ == "__main__":
     main()
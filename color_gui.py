@@ -6,30 +6,354 @@ Simple Tkinter GUI wrapper around convert_colors.py.
 Loads text, replaces color words randomly (preserving case), shows output
 and copies the result to the clipboard.
 
+Conversion runs on a worker thread, paragraph chunk by paragraph chunk; the
+output appears as chunks finish, with progress in the status bar, and can be
+cancelled. The window stays responsive on multi-MB inputs.
+
+Files larger than VIEWER_THRESHOLD (or any file, with "Large-file viewer"
+checked) open in viewer mode: input and output are memory-mapped and only the
+visible lines are rendered. Conversion streams from the mapped input into a
+temporary output file, and Save Output copies that file directly.
+
+With "Live preview" checked, the output follows the input as you type: after
+a short pause, only the paragraphs that changed since the last run are
+re-converted and replaced in the output pane. Each paragraph is converted
+with its own seed (derived from the seed field and the paragraph's text), so
+untouched paragraphs keep their replacements. Convert & Copy then just copies
+the preview.
+
 Usage:
   python color_gui.py
 
 Requires: Python 3, convert_colors.py in the same folder.
 """
+import time
+
+# Startup reference for the first-paint / ready timings.
+_START = time.perf_counter()
+
 import tkinter as tk
-from tkinter import filedialog, messagebox
+import tkinter.font as tkfont
+from tkinter import filedialog, messagebox, ttk
+import atexit
+import mmap
+import os
+import queue
 import random
+import shutil
 import sys
+import tempfile
+import threading
+from array import array
 from pathlib import Path
 
-try:
-    from convert_colors import convert_colors, COLORS, convert_hair, HAIR
-except Exception as e:
-    print("Failed to import convert_colors.py:", e)
-    sys.exit(1)
+# Set by load_converters() on a background thread; importing convert_colors
+# parses ai.cpp, and the window shouldn't wait for that.
+convert_colors = COLORS = convert_hair = HAIR = convert_chunks = convert_chunk_stream = None
+_PARAGRAPH_BREAK_RE = None
+_loaded = queue.Queue()
+
+# Max time per Tk callback spent inserting converted output, so typing and
+# scrolling stay smooth while a large conversion streams in.
+INSERT_BUDGET = 0.015
+POLL_MS = 20
+
+# The running conversion, if any: cancel event, results queue, input length,
+# output chunks so far and replacement count.
+conversion = None
+
+# Files at least this large open in the memory-mapped viewer.
+VIEWER_THRESHOLD = 4 * 1024 * 1024
+
+# Outputs larger than this aren't put on the clipboard (use Save Output).
+CLIPBOARD_MAX = 16 * 1024 * 1024
+
+# Bytes of mapped input converted per step.
+MAPPED_CHUNK = 1 << 15
+
+# Rendered characters per line in the viewer; longer lines are cut off.
+VIEW_LINE_MAX = 2000
+
+# Bytes of a mapped file scanned for line starts per indexing step.
+INDEX_CHUNK = 1 << 22
+
+# Live preview re-converts this long after the last edit.
+PREVIEW_DEBOUNCE_MS = 250
+
+# Live preview state: seed base, the (input, output) paragraphs shown in the
+# output pane in order, paragraphs still to convert and where they go.
+preview = None
+_preview_after = None
+# Seed base for live preview when the seed field is empty.
+_PREVIEW_BASE = str(random.getrandbits(64))
+
+
+class MappedTextView:
+    """Read-only, virtualized view of a memory-mapped UTF-8 file in a tk.Text.
+
+    Only the lines that fit in the widget are decoded and inserted; the
+    scrollbar and mouse wheel move a window over a line-offset index. The
+    index is built by index_lines() on a background thread and grows while
+    the view is already usable; `indexed` is the number of bytes scanned so
+    far, and on_index(view) runs on the Tk thread after each step.
+
+    Threads that read `mm` are registered with adopt(); close() cancels and
+    joins them before unmapping.
+    """
+
+    def __init__(self, text, scrollbar):
+        self.text = text
+        self.scrollbar = scrollbar
+        self.path = None
+        self._file = None
+        self.mm = None
+        self.starts = array('Q')
+        self.top = 0
+        self.indexed = 0
+        self.on_index = None
+        self._index = None
+        self._index_after = None
+        self._readers = []
+
+    @property
+    def active(self):
+        return self.mm is not None
+
+    @property
+    def indexing(self):
+        return self._index is not None
+
+    def open(self, path, on_index=None):
+        self.close()
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self.path = path
+        if size:
+            self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.mm = b''
+        self.starts = array('Q', [0])
+        self.indexed = 0
+        self.on_index = on_index
+        cancel, results = threading.Event(), queue.Queue()
+        self._index = results
+        self.adopt(threading.Thread(target=index_lines, args=(self.mm, cancel, results), daemon=True), cancel)
+        self._index_after = self.text.after(POLL_MS, self._poll_index)
+        self.top = 0
+        self.text.config(wrap='none')
+        self.scrollbar.config(command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y, before=self.text)
+        for seq in ('<MouseWheel>', '<Button-4>', '<Button-5>', '<Prior>', '<Next>', '<Up>', '<Down>'):
+            self.text.bind(seq, self._on_key_or_wheel)
+        self.text.bind('<Configure>', lambda e: self.render())
+        self.render()
+
+    def adopt(self, thread, cancel):
+        """Start thread, which reads self.mm until cancel is set; close()
+        sets cancel and waits for it."""
+        self._readers = [(t, c) for t, c in self._readers if t.is_alive()]
+        self._readers.append((thread, cancel))
+        thread.start()
+
+    def _poll_index(self):
+        self._index_after = None
+        if self._index is None:
+            return
+        size = self.size()
+        done = False
+        while True:
+            try:
+                item = self._index.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                done = True
+                break
+            starts, self.indexed = item
+            self.starts.extend(starts)
+        if done:
+            self._index = None
+            self.indexed = size
+            # A trailing newline doesn't start another line.
+            if len(self.starts) > 1 and self.starts[-1] == size:
+                self.starts.pop()
+        else:
+            self._index_after = self.text.after(POLL_MS, self._poll_index)
+        self.render()
+        if self.on_index is not None:
+            self.on_index(self)
+
+    def close(self):
+        if self.mm is None:
+            return
+        for _thread, cancel in self._readers:
+            cancel.set()
+        for thread, _cancel in self._readers:
+            thread.join()
+        self._readers = []
+        if self._index_after is not None:
+            self.text.after_cancel(self._index_after)
+            self._index_after = None
+        self._index = self.on_index = None
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self._file.close()
+        self.mm = self._file = self.path = None
+        self.starts = array('Q')
+        self.indexed = 0
+        for seq in ('<MouseWheel>', '<Button-4>', '<Button-5>', '<Prior>', '<Next>', '<Up>', '<Down>', '<Configure>'):
+            self.text.unbind(seq)
+        self.scrollbar.pack_forget()
+        self.text.config(state='normal', wrap='word')
+        self.text.delete('1.0', tk.END)
+
+    def size(self):
+        return len(self.mm) if self.mm is not None else 0
+
+    def visible_rows(self):
+        line = tkfont.Font(font=self.text.cget('font')).metrics('linespace')
+        return max(1, self.text.winfo_height() // max(line, 1))
+
+    def render(self):
+        if self.mm is None:
+            return
+        rows = self.visible_rows()
+        n = len(self.starts)
+        self.top = max(0, min(self.top, n - rows))
+        end_line = min(n, self.top + rows)
+        lines = []
+        for i in range(self.top, end_line):
+            a = self.starts[i]
+            b = self.starts[i + 1] if i + 1 < n else len(self.mm)
+            raw = self.mm[a:min(b, a + VIEW_LINE_MAX * 4)]
+            lines.append(raw.decode('utf-8', errors='replace').rstrip('\r\n')[:VIEW_LINE_MAX])
+        self.text.config(state='normal')
+        self.text.delete('1.0', tk.END)
+        self.text.insert('1.0', '\n'.join(lines))
+        self.text.config(state='disabled')
+        if n:
+            self.scrollbar.set(self.top / n, end_line / n)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def yview(self, *args):
+        rows = self.visible_rows()
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.starts))
+        elif args[0] == 'scroll':
+            step = int(args[1]) * (rows if args[2] == 'pages' else 1)
+            self.top += step
+        self.render()
+
+    def _on_key_or_wheel(self, event):
+        rows = self.visible_rows()
+        if event.keysym == 'Prior':
+            self.top -= rows
+        elif event.keysym == 'Next':
+            self.top += rows
+        elif event.keysym == 'Up' or event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.top -= 3 if event.keysym != 'Up' else 1
+        else:
+            self.top += 3 if event.keysym != 'Down' else 1
+        self.render()
+        return 'break'
+
+
+def index_lines(mm, cancel, results, chunk_size=INDEX_CHUNK):
+    """Put an array of the line starts (offsets just past each newline) in
+    each chunk_size block of mm on results, with the bytes scanned so far,
+    then None. Stops early once cancel is set."""
+    n = len(mm)
+    for a in range(0, n, chunk_size):
+        if cancel.is_set():
+            return
+        b = min(n, a + chunk_size)
+        starts = array('Q')
+        pos = mm.find(b'\n', a, b)
+        while pos >= 0:
+            starts.append(pos + 1)
+            pos = mm.find(b'\n', pos + 1, b)
+        results.put((starts, b))
+    results.put(None)
+
+
+def iter_mapped_chunks(mm, chunk_size=MAPPED_CHUNK):
+    """Yield (text_chunk, byte_end) from a mapped UTF-8 file, cut at blank
+    lines where possible (else at line ends), like split_paragraphs()."""
+    n = len(mm)
+    start = 0
+    while start < n:
+        limit = min(n, start + chunk_size)
+        if limit < n:
+            cut = mm.rfind(b'\n\n', start, limit)
+            cut = cut + 2 if cut >= 0 else mm.rfind(b'\n', start, limit) + 1
+            if cut <= start:
+                nl = mm.find(b'\n', limit)
+                cut = n if nl < 0 else nl + 1
+        else:
+            cut = n
+        yield mm[start:cut].decode('utf-8'), cut
+        start = cut
+
+
+_temp_outputs = []
+
+
+def _cleanup_temp_outputs():
+    for path in _temp_outputs:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+atexit.register(_cleanup_temp_outputs)
+
+
+def load_converters():
+    try:
+        import convert_colors as cc
+    except Exception as e:
+        _loaded.put(e)
+        return
+    _loaded.put(cc)
+
+
+def poll_converters():
+    global convert_colors, COLORS, convert_hair, HAIR, convert_chunks, convert_chunk_stream, _PARAGRAPH_BREAK_RE
+    try:
+        cc = _loaded.get_nowait()
+    except queue.Empty:
+        root.after(50, poll_converters)
+        return
+    if isinstance(cc, Exception):
+        print("Failed to import convert_colors.py:", cc)
+        status_var.set(f"Failed to import convert_colors.py: {cc}")
+        convert_btn.config(text='Unavailable')
+        return
+    convert_colors, COLORS = cc.convert_colors, cc.COLORS
+    convert_hair, HAIR = cc.convert_hair, cc.HAIR
+    convert_chunks, convert_chunk_stream = cc.convert_chunks, cc.convert_chunk_stream
+    _PARAGRAPH_BREAK_RE = cc._PARAGRAPH_BREAK_RE
+    convert_btn.config(text='Convert & Copy', state='normal')
+    status_var.set('Ready')
+    schedule_preview()
+    print(f"ready after {(time.perf_counter() - _START) * 1000:.0f} ms", file=sys.stderr)
 
 
 def save_output():
-    out = output_text.get('1.0', tk.END)
+    if conversion is not None and input_view.active:
+        status_var.set('Still converting; save once it finishes (or cancel).')
+        return
     path = filedialog.asksaveasfilename(title="Save output", defaultextension='.txt', filetypes=[('Text','*.txt'), ('All','*.*')])
     if not path:
         return
-    Path(path).write_text(out, encoding='utf-8')
+    if output_view.active:
+        # Viewer mode: the converted file is already on disk.
+        shutil.copyfile(output_view.path, path)
+    else:
+        out = output_text.get('1.0', tk.END)
+        Path(path).write_text(out, encoding='utf-8')
     status_var.set(f"Saved: {Path(path).name}")
 
 
@@ -37,6 +361,27 @@ def load_file():
     path = filedialog.askopenfilename(title="Open text file", filetypes=[('Text','*.txt'), ('All','*.*')])
     if not path:
         return
+    cancel_conversion(quiet=True)
+    stop_preview()
+    output_view.close()
+    size = os.path.getsize(path)
+    if viewer_var.get() or size >= VIEWER_THRESHOLD:
+        viewer_var.set(True)
+        name = Path(path).name
+
+        def indexed(view):
+            # Conversion progress takes over the status line while it runs.
+            if conversion is not None:
+                return
+            if view.indexing:
+                status_var.set(f"Loaded: {name} ({size / 1e6:.1f} MB, indexing lines... {view.indexed * 100 // max(size, 1)}%)")
+            else:
+                status_var.set(f"Loaded: {name} ({size / 1e6:.1f} MB, {len(view.starts)} lines, viewer mode)")
+
+        input_view.open(path, on_index=indexed)
+        output_text.delete('1.0', tk.END)
+        return
+    input_view.close()
     txt = Path(path).read_text(encoding='utf-8')
     input_text.delete('1.0', tk.END)
     input_text.insert(tk.END, txt)
@@ -44,38 +389,337 @@ def load_file():
 
 
 def convert_and_copy():
+    global conversion
+    if convert_colors is None:
+        # Still loading (Ctrl+Enter bypasses the disabled button).
+        return
+    if input_view.active:
+        convert_mapped()
+        return
+    if live_var.get():
+        copy_preview()
+        return
     txt = input_text.get('1.0', tk.END)
     if not txt.strip():
         messagebox.showinfo("No text", "Please enter or load some text to convert.")
         return
 
+    # A new request replaces one that's still running.
+    cancel_conversion(quiet=True)
+
     seed_str = seed_entry.get().strip()
     rng = random.Random(int(seed_str)) if seed_str.isdigit() else random.Random()
 
-    out, counts = convert_colors(txt, rng, colors=COLORS)
-    newout, counts = convert_hair(out, rng, hair=HAIR)
     output_text.delete('1.0', tk.END)
-    output_text.insert(tk.END, newout)
+    conversion = {
+        'cancel': threading.Event(),
+        'results': queue.Queue(),
+        'total': len(txt),
+        'chunks': [],
+        'replacements': 0,
+    }
+    threading.Thread(target=conversion_worker, args=(txt, rng, conversion), daemon=True).start()
+
+    progress.config(maximum=max(len(txt), 1), value=0)
+    cancel_btn.config(state='normal')
+    status_var.set('Converting...')
+    root.after(POLL_MS, pump_conversion)
+
+
+def convert_mapped():
+    global conversion
+    cancel_conversion(quiet=True)
+    stop_preview()
+    output_view.close()
+
+    seed_str = seed_entry.get().strip()
+    rng = random.Random(int(seed_str)) if seed_str.isdigit() else random.Random()
+
+    # Only the newest output is kept on disk.
+    _cleanup_temp_outputs()
+    _temp_outputs.clear()
+    fd, out_path = tempfile.mkstemp(prefix='color_gui_', suffix='.txt')
+    os.close(fd)
+    _temp_outputs.append(out_path)
+    conversion = {
+        'cancel': threading.Event(),
+        'results': queue.Queue(),
+        'total': max(input_view.size(), 1),
+        'chunks': None,
+        'replacements': 0,
+        'output': out_path,
+    }
+    # The view owns the thread: closing the input waits for it to stop reading.
+    input_view.adopt(
+        threading.Thread(target=mapped_worker, args=(input_view.mm, out_path, rng, conversion), daemon=True),
+        conversion['cancel'],
+    )
+
+    progress.config(maximum=max(conversion['total'], 1), value=0)
+    cancel_btn.config(state='normal')
+    status_var.set('Converting...')
+    root.after(POLL_MS, pump_conversion)
+
+
+def mapped_worker(mm, out_path, rng, job):
+    steps = (
+        lambda t, r: convert_colors(t, r, colors=COLORS),
+        lambda t, r: convert_hair(t, r, hair=HAIR),
+    )
+    ends = []
+
+    def chunks():
+        for text, byte_end in iter_mapped_chunks(mm):
+            if job['cancel'].is_set():
+                return
+            ends.append(byte_end)
+            yield text
+
+    try:
+        with open(out_path, 'w', encoding='utf-8', newline='') as out:
+            for chunk, counts, _end in convert_chunk_stream(chunks(), rng, steps):
+                if job['cancel'].is_set():
+                    return
+                out.write(chunk)
+                # Progress only; the output goes to the file, not the widget.
+                job['results'].put(('', counts, ends[-1]))
+    except Exception as e:
+        job['results'].put(e)
+        return
+    job['results'].put(None)
+
+
+def conversion_worker(txt, rng, job):
+    steps = (
+        lambda t, r: convert_colors(t, r, colors=COLORS),
+        lambda t, r: convert_hair(t, r, hair=HAIR),
+    )
+    try:
+        for item in convert_chunks(txt, rng, steps=steps):
+            if job['cancel'].is_set():
+                return
+            job['results'].put(item)
+    except Exception as e:
+        job['results'].put(e)
+        return
+    job['results'].put(None)
+
+
+def pump_conversion():
+    global conversion
+    job = conversion
+    if job is None or job['cancel'].is_set():
+        return
+
+    # Insert whatever finished, in one widget call, within the time budget.
+    deadline = time.perf_counter() + INSERT_BUDGET
+    batch = []
+    done = error = None
+    end = None
+    while time.perf_counter() < deadline:
+        try:
+            item = job['results'].get_nowait()
+        except queue.Empty:
+            break
+        if item is None:
+            done = True
+            break
+        if isinstance(item, Exception):
+            error = item
+            break
+        chunk, counts, end = item
+        batch.append(chunk)
+        job['replacements'] += sum(counts.values())
+    if batch and job['chunks'] is not None:
+        output_text.insert(tk.END, ''.join(batch))
+        job['chunks'].extend(batch)
+    if end is not None:
+        progress.config(value=end)
+        status_var.set(f"Converting... {end * 100 // job['total']}%")
+
+    if error is not None:
+        conversion = None
+        cancel_btn.config(state='disabled')
+        status_var.set(f"Conversion failed: {error}")
+        return
+    if not done:
+        root.after(POLL_MS, pump_conversion)
+        return
+
+    conversion = None
+    cancel_btn.config(state='disabled')
+    progress.config(value=progress.cget('maximum'))
+    total = job['replacements']
+
+    if job['chunks'] is None:
+        # Viewer mode: show the converted file; copy it only if it's small.
+        output_view.open(job['output'])
+        if output_view.size() > CLIPBOARD_MAX:
+            status_var.set(f"Replacements: {total} — too large to copy, use Save Output")
+            return
+        newout = output_view.mm[:].decode('utf-8')
+    else:
+        newout = ''.join(job['chunks'])
 
     # copy to clipboard
     root.clipboard_clear()
     root.clipboard_append(newout)
 
-    total = sum(counts.values())
     if total:
         status_var.set(f"Replacements: {total} — Copied to clipboard")
     else:
         status_var.set("No color words found — Copied to clipboard")
 
 
+def preview_paragraphs(text):
+    """Split text into paragraphs, each keeping its trailing blank line(s)."""
+    paras = []
+    start = 0
+    for m in _PARAGRAPH_BREAK_RE.finditer(text):
+        paras.append(text[start:m.end()])
+        start = m.end()
+    if start < len(text):
+        paras.append(text[start:])
+    return paras
+
+
+def diff_paragraphs(old, new):
+    """Return (k, m): new shares its first k and last m paragraphs with old,
+    and only new[k:len(new) - m] replaces old[k:len(old) - m]."""
+    n = min(len(old), len(new))
+    k = 0
+    while k < n and new[k] == old[k]:
+        k += 1
+    m = 0
+    while m < n - k and new[-1 - m] == old[-1 - m]:
+        m += 1
+    return k, m
+
+
+def convert_paragraph(para, base):
+    # Seeded by the paragraph itself, so the same paragraph always converts
+    # the same way, wherever it is and whatever else changed.
+    rng = random.Random(f"{base}:{para}")
+    out, _ = convert_colors(para, rng, colors=COLORS)
+    out, _ = convert_hair(out, rng, hair=HAIR)
+    return out
+
+
+def schedule_preview(event=None):
+    global _preview_after
+    # <<Modified>> only fires again once the flag is reset.
+    input_text.edit_modified(False)
+    if not live_var.get() or input_view.active or convert_colors is None:
+        return
+    if _preview_after is not None:
+        root.after_cancel(_preview_after)
+    _preview_after = root.after(PREVIEW_DEBOUNCE_MS, start_preview)
+
+
+def start_preview():
+    global preview, _preview_after
+    _preview_after = None
+    cancel_conversion(quiet=True)
+    seed_str = seed_entry.get().strip()
+    base = seed_str if seed_str.isdigit() else _PREVIEW_BASE
+    if preview is None or preview['base'] != base:
+        output_text.delete('1.0', tk.END)
+        preview = {'base': base, 'shown': [], 'todo': [], 'pos': 0, 'offset': 0}
+
+    paras = preview_paragraphs(input_text.get('1.0', 'end-1c'))
+    shown = preview['shown']
+    # Paragraphs before and after the edited region are left alone.
+    k, m = diff_paragraphs([para for para, _ in shown], paras)
+
+    start = sum(len(out) for _, out in shown[:k])
+    removed = sum(len(out) for _, out in shown[k:len(shown) - m])
+    if removed:
+        output_text.delete(f'1.0 + {start} chars', f'1.0 + {start + removed} chars')
+    preview['shown'] = shown[:k] + shown[len(shown) - m:]
+    preview['todo'] = paras[k:len(paras) - m]
+    preview['pos'] = k
+    preview['offset'] = start
+    step_preview()
+
+
+def step_preview(budget=INSERT_BUDGET):
+    """Convert pending preview paragraphs for up to budget seconds (None: all)."""
+    if preview is None or not preview['todo']:
+        return
+    deadline = time.perf_counter() + budget if budget is not None else None
+    todo = preview['todo']
+    i = 0
+    parts = []
+    while i < len(todo):
+        out = convert_paragraph(todo[i], preview['base'])
+        preview['shown'].insert(preview['pos'] + i, (todo[i], out))
+        parts.append(out)
+        i += 1
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+    text = ''.join(parts)
+    output_text.insert(f'1.0 + {preview["offset"]} chars', text)
+    preview['pos'] += i
+    preview['offset'] += len(text)
+    del todo[:i]
+    if todo:
+        root.after(1, step_preview)
+    else:
+        status_var.set(f"Live preview: {len(preview['shown'])} paragraph(s)")
+
+
+def stop_preview():
+    global preview, _preview_after
+    if _preview_after is not None:
+        root.after_cancel(_preview_after)
+        _preview_after = None
+    preview = None
+
+
+def toggle_preview():
+    if live_var.get():
+        output_text.delete('1.0', tk.END)
+        stop_preview()
+        schedule_preview()
+    else:
+        stop_preview()
+
+
+def copy_preview():
+    if _preview_after is not None:
+        root.after_cancel(_preview_after)
+        start_preview()
+    step_preview(budget=None)
+    root.clipboard_clear()
+    root.clipboard_append(output_text.get('1.0', 'end-1c'))
+    status_var.set('Preview copied to clipboard')
+
+
+def cancel_conversion(quiet=False):
+    global conversion
+    if conversion is None:
+        return
+    conversion['cancel'].set()
+    conversion = None
+    cancel_btn.config(state='disabled')
+    progress.config(value=0)
+    if not quiet:
+        status_var.set('Cancelled — partial output not copied')
+
+
 def clear_all():
+    cancel_conversion(quiet=True)
+    stop_preview()
+    input_view.close()
+    output_view.close()
     input_text.delete('1.0', tk.END)
     output_text.delete('1.0', tk.END)
     status_var.set('Cleared')
 
 
 def build_ui():
-    global root, input_text, output_text, seed_entry, status_var
+    global root, input_text, output_text, seed_entry, status_var, convert_btn, cancel_btn, progress
+    global input_view, output_view, viewer_var, live_var
     root = tk.Tk()
     root.title('Color Replacer')
     root.geometry('900x700')
@@ -103,29 +747,47 @@ def build_ui():
     lbl_in.pack(anchor='w')
     input_text = tk.Text(top_frame, wrap='word', height=15, bg=INPUT_BG, fg=INPUT_FG, insertbackground=INSERT_COLOR, selectbackground=SELECT_BG)
     input_text.pack(fill=tk.BOTH, expand=True)
+    input_view = MappedTextView(input_text, tk.Scrollbar(top_frame))
+    input_text.bind('<<Modified>>', schedule_preview)
 
     controls = tk.Frame(frm, bg=PANEL_BG)
     controls.pack(fill=tk.X)
 
     tk.Button(controls, text='Load...', command=load_file, bg=BUTTON_BG, fg=BUTTON_FG, activebackground=BUTTON_BG).pack(side=tk.LEFT, padx=4, pady=6)
-    tk.Button(controls, text='Convert & Copy', command=convert_and_copy, bg=BUTTON_BG, fg=BUTTON_FG, activebackground=BUTTON_BG).pack(side=tk.LEFT, padx=4)
+    convert_btn = tk.Button(controls, text='Loading...', state='disabled', command=convert_and_copy, bg=BUTTON_BG, fg=BUTTON_FG, activebackground=BUTTON_BG)
+    convert_btn.pack(side=tk.LEFT, padx=4)
     tk.Button(controls, text='Save Output...', command=save_output, bg=BUTTON_BG, fg=BUTTON_FG, activebackground=BUTTON_BG).pack(side=tk.LEFT, padx=4)
     tk.Button(controls, text='Clear', command=clear_all, bg=BUTTON_BG, fg=BUTTON_FG, activebackground=BUTTON_BG).pack(side=tk.LEFT, padx=4)
 
     tk.Label(controls, text='Seed:', bg=PANEL_BG, fg=DARK_FG).pack(side=tk.LEFT, padx=(12,2))
     seed_entry = tk.Entry(controls, width=10, bg=INPUT_BG, fg=INPUT_FG, insertbackground=INSERT_COLOR)
     seed_entry.pack(side=tk.LEFT)
+    seed_entry.bind('<KeyRelease>', schedule_preview)
 
     tk.Label(controls, text='(optional)', bg=PANEL_BG, fg=DARK_FG).pack(side=tk.LEFT, padx=(4,0))
 
+    viewer_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(controls, text='Large-file viewer', variable=viewer_var, bg=PANEL_BG, fg=DARK_FG, selectcolor=BUTTON_BG, activebackground=PANEL_BG).pack(side=tk.LEFT, padx=(12,0))
+
+    live_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(controls, text='Live preview', variable=live_var, command=toggle_preview, bg=PANEL_BG, fg=DARK_FG, selectcolor=BUTTON_BG, activebackground=PANEL_BG).pack(side=tk.LEFT, padx=(12,0))
+
+    cancel_btn = tk.Button(controls, text='Cancel', state='disabled', command=cancel_conversion, bg=BUTTON_BG, fg=BUTTON_FG, activebackground=BUTTON_BG)
+    cancel_btn.pack(side=tk.RIGHT, padx=4)
+    progress = ttk.Progressbar(controls, orient='horizontal', length=160, mode='determinate')
+    progress.pack(side=tk.RIGHT, padx=4)
+
 
     lbl_out = tk.Label(frm, text='Output', bg=PANEL_BG, fg=DARK_FG)
     lbl_out.pack(anchor='w')
-    output_text = tk.Text(frm, wrap='word', height=15, bg=INPUT_BG, fg=INPUT_FG, insertbackground=INSERT_COLOR, selectbackground=SELECT_BG)
+    out_frame = tk.Frame(frm, bg=PANEL_BG)
+    out_frame.pack(fill=tk.BOTH, expand=True)
+    output_text = tk.Text(out_frame, wrap='word', height=15, bg=INPUT_BG, fg=INPUT_FG, insertbackground=INSERT_COLOR, selectbackground=SELECT_BG)
     output_text.pack(fill=tk.BOTH, expand=True)
+    output_view = MappedTextView(output_text, tk.Scrollbar(out_frame))
 
     status_var = tk.StringVar()
-    status_var.set('Ready')
+    status_var.set('Loading vocabulary from ai.cpp...')
     status = tk.Label(root, textvariable=status_var, anchor='w', bg=PANEL_BG, fg=DARK_FG)
     status.pack(fill=tk.X, side=tk.BOTTOM)
 
@@ -134,8 +796,17 @@ def build_ui():
         return 'break'
 
     root.bind('<Control-Return>', on_ctrl_enter)
+    root.bind('<Escape>', lambda event: cancel_conversion())
+
+
+def first_paint(_event):
+    root.unbind('<Expose>')
+    print(f"first paint after {(time.perf_counter() - _START) * 1000:.0f} ms", file=sys.stderr)
 
 
 if __name__ == '__main__':
     build_ui()
+    root.bind('<Expose>', first_paint)
+    threading.Thread(target=load_converters, daemon=True).start()
+    root.after(50, poll_converters)
     root.mainloop()
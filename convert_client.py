@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+convert_client.py
+
+Thin client for convert_server.py. Only uses the standard library and never
+imports convert_colors, so it doesn't pay for parsing ai.cpp.
+
+Usage (same shape as convert_colors.py, but converted by the running server):
+  python convert_client.py input.txt -o output.txt
+  python convert_client.py input.txt --op clothes --seed 3
+
+In Python:
+  with ConvertClient() as c:
+      text = c.convert("appearance", prompt)["text"]
+      results = c.pipeline([("colors", p, None) for p in prompts])
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+from pathlib import Path
+
+
+if os.name == "nt":
+    DEFAULT_ADDRESS = "127.0.0.1:8765"
+else:
+    DEFAULT_ADDRESS = "unix:" + os.path.join(tempfile.gettempdir(), "convert_colors.sock")
+
+
+def parse_address(address: str):
+    """Return ("unix", path) or ("tcp", (host, port)) for an address string.
+
+    Accepts "unix:/path/to.sock", "host:port" or ":port" (localhost).
+    """
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Bad address {address!r}; use unix:PATH or HOST:PORT")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+class ConvertError(RuntimeError):
+    pass
+
+
+class ConvertClient:
+    """Blocking JSON-lines client for convert_server.py."""
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: float | None = 30.0):
+        kind, target = parse_address(address)
+        if kind == "unix":
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock.settimeout(timeout)
+        self._sock.connect(target)
+        self._rfile = self._sock.makefile("rb")
+        self._next_id = 0
+
+    def close(self):
+        self._rfile.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _encode(self, op: str, text: str | None, seed: int | None) -> bytes:
+        self._next_id += 1
+        req = {"id": self._next_id, "op": op}
+        if text is not None:
+            req["text"] = text
+        if seed is not None:
+            req["seed"] = seed
+        return json.dumps(req, ensure_ascii=False).encode("utf-8") + b"\n"
+
+    def _read(self) -> dict:
+        line = self._rfile.readline()
+        if not line:
+            raise ConvertError("server closed the connection")
+        return json.loads(line)
+
+    def convert(self, op: str, text: str, seed: int | None = None) -> dict:
+        """Send one request and wait for its response."""
+        self._sock.sendall(self._encode(op, text, seed))
+        resp = self._read()
+        if "error" in resp:
+            raise ConvertError(resp["error"])
+        return resp
+
+    def pipeline(self, requests, window: int = 256) -> list[dict]:
+        """Send (op, text, seed) requests without waiting for each answer.
+
+        At most `window` requests are in flight, so neither side's socket
+        buffer can fill up and deadlock. Responses are returned in order;
+        errors are returned as {"error": ...} objects rather than raised.
+        """
+        results: list[dict] = []
+        pending = 0
+        for op, text, seed in requests:
+            self._sock.sendall(self._encode(op, text, seed))
+            pending += 1
+            if pending >= window:
+                results.append(self._read())
+                pending -= 1
+        for _ in range(pending):
+            results.append(self._read())
+        return results
+
+    def ping(self) -> bool:
+        self._sock.sendall(self._encode("ping", None, None))
+        return bool(self._read().get("pong"))
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("input", help="Input text file")
+    p.add_argument("-o", "--output", help="Output file (omit for stdout)")
+    p.add_argument("--inplace", action="store_true", help="Overwrite input file")
+    p.add_argument("--seed", type=int, help="Random seed for reproducibility")
+    p.add_argument("--op", default="appearance", help="colors, hair, style, material, clothes, camera or appearance")
+    p.add_argument("--address", default=DEFAULT_ADDRESS, help="Server address (unix:PATH or HOST:PORT)")
+    args = p.parse_args()
+
+    if args.inplace and args.output:
+        p.error("--inplace and --output are mutually exclusive")
+
+    inp = Path(args.input)
+    if not inp.exists():
+        print(f"Input file not found: {inp}")
+        raise SystemExit(2)
+
+    try:
+        with ConvertClient(args.address) as client:
+            resp = client.convert(args.op, inp.read_text(encoding="utf-8"), args.seed)
+    except (OSError, ConvertError) as e:
+        print(f"convert_server at {args.address}: {e}", file=sys.stderr)
+        raise SystemExit(1)
+
+    if args.inplace:
+        inp.write_text(resp["text"], encoding="utf-8")
+    elif args.output:
+        Path(args.output).write_text(resp["text"], encoding="utf-8")
+    else:
+        print(resp["text"])
+
+
+if __name__ == '__main__':
+    main()
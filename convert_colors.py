@@ -956,6 +956,73 @@ def convert_clothes(text: str, rng: random.Random, upper=UPPER, lower=LOWER):
     return result, counts
 
 
+def convert_appearance(text: str, rng: random.Random):
+    """Colors, hair, style and material in one go (the GUI's Randomize Appearance)."""
+    out, counts_colors = convert_colors(text, rng)
+    out, counts_hair = convert_hair(out, rng)
+    out, counts_style = convert_style(out, rng)
+    out, counts_material = convert_material(out, rng)
+    return out, counts_colors + counts_hair + counts_style + counts_material
+
+
+# Blank lines (possibly with whitespace) between paragraphs.
+_PARAGRAPH_BREAK_RE = re.compile(r"\n[ \t]*\n")
+
+
+def split_paragraphs(text: str, chunk_size: int = 1 << 15) -> list[str]:
+    """Split text into chunks of roughly chunk_size characters that end at
+    paragraph breaks; "".join(chunks) == text. A paragraph longer than
+    chunk_size is split at line ends instead."""
+    chunks = []
+    start = 0
+    n = len(text)
+    while start < n:
+        if n - start <= chunk_size:
+            chunks.append(text[start:])
+            break
+        limit = start + chunk_size
+        cut = -1
+        for m in _PARAGRAPH_BREAK_RE.finditer(text, start, limit):
+            cut = m.end()
+        if cut <= start:
+            cut = text.rfind("\n", start, limit) + 1
+        if cut <= start:
+            # One huge line: take everything up to the next line end.
+            nl = text.find("\n", limit)
+            cut = n if nl < 0 else nl + 1
+        chunks.append(text[start:cut])
+        start = cut
+    return chunks
+
+
+def convert_chunks(text: str, rng: random.Random, steps=None, chunk_size: int = 1 << 15):
+    """Convert text paragraph chunk by paragraph chunk.
+
+    Yields (converted_chunk, counts, chunk_end) for each chunk in order, so a
+    caller can show progress, render output incrementally and stop early.
+    steps are the converters applied to each chunk (default: colors, then
+    hair). Context rules only look within a chunk, and the RNG is consumed
+    chunk by chunk, so a seed gives different (equally valid) output than
+    converting the whole text at once.
+    """
+    return convert_chunk_stream(split_paragraphs(text, chunk_size), rng, steps)
+
+
+def convert_chunk_stream(chunks, rng: random.Random, steps=None):
+    """Like convert_chunks(), over any iterable of text chunks (e.g. read from
+    a memory-mapped file). chunk_end counts input characters."""
+    if steps is None:
+        steps = (convert_colors, convert_hair)
+    end = 0
+    for chunk in chunks:
+        end += len(chunk)
+        counts = Counter()
+        for step in steps:
+            chunk, c = step(chunk, rng)
+            counts += c
+        yield chunk, counts, end
+
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument("input", help="Input text file")
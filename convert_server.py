@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+convert_server.py
+
+Long-lived conversion daemon. Loads the ai.cpp vocabulary once (by importing
+convert_colors) and serves conversion requests over a Unix socket or a
+localhost TCP port, so scripts don't pay Python startup plus the ai.cpp parse
+on every call. Use convert_client.py (or any JSON-lines client) to talk to it.
+
+Protocol: one JSON object per line in each direction. Requests may be
+pipelined; responses come back in request order on the same connection.
+
+  -> {"id": 1, "op": "appearance", "text": "...", "seed": 42}
+  <- {"id": 1, "text": "...", "counts": {"white ": 1}}
+  <- {"id": 1, "error": "unknown op 'x'"}
+
+Ops: colors, hair, style, material, clothes, appearance (colors + hair +
+style + material, like the GUI's Randomize Appearance), camera (response has
+"changed" instead of "counts"), ping.
+
+Request lines longer than MAX_LINE bytes are skipped and answered with an
+error. The server has no authentication, so --tcp only binds loopback
+addresses unless --allow-remote is given.
+
+Usage:
+  python convert_server.py                     # default address
+  python convert_server.py --unix /tmp/cc.sock
+  python convert_server.py --tcp 127.0.0.1:8765
+  python convert_server.py --tcp 0.0.0.0:8765 --allow-remote
+"""
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import random
+import sys
+import time
+
+from convert_colors import (
+    convert_colors,
+    convert_hair,
+    convert_style,
+    convert_material,
+    convert_clothes,
+    convert_camera,
+    convert_appearance,
+)
+from convert_client import DEFAULT_ADDRESS, parse_address
+
+
+OPS = {
+    "colors": convert_colors,
+    "hair": convert_hair,
+    "style": convert_style,
+    "material": convert_material,
+    "clothes": convert_clothes,
+    "appearance": convert_appearance,
+}
+
+# Shared RNG for requests that don't pass a seed.
+_rng = random.Random()
+
+# Longest accepted request line, in bytes.
+MAX_LINE = 1 << 24
+
+
+def handle_request(req: dict) -> dict:
+    """Run one decoded request and return the response object."""
+    resp = {"id": req.get("id")}
+    op = req.get("op")
+    if op == "ping":
+        resp["pong"] = True
+        return resp
+
+    text = req.get("text")
+    if not isinstance(text, str):
+        resp["error"] = "missing 'text'"
+        return resp
+
+    seed = req.get("seed")
+    rng = random.Random(seed) if seed is not None else _rng
+
+    if op == "camera":
+        resp["text"], resp["changed"] = convert_camera(text, rng)
+        return resp
+
+    fn = OPS.get(op)
+    if fn is None:
+        resp["error"] = f"unknown op {op!r}"
+        return resp
+    resp["text"], counts = fn(text, rng)
+    resp["counts"] = dict(counts)
+    return resp
+
+
+async def _read_line(reader: asyncio.StreamReader):
+    """Next line (b"" at EOF), or None for a line over the reader's limit,
+    which is consumed up to and including its newline."""
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+    except asyncio.LimitOverrunError:
+        pass
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return None
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly(e.consumed)
+        except asyncio.IncompleteReadError:
+            return None
+
+
+async def _serve_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            line = await _read_line(reader)
+            if line == b"":
+                break
+            # The id is echoed whenever the line decoded to an object, so
+            # pipelining clients can match failures to their requests.
+            req = None
+            try:
+                if line is None:
+                    raise ValueError(f"request line longer than {MAX_LINE} bytes")
+                req = json.loads(line)
+                if not isinstance(req, dict):
+                    req = None
+                    raise ValueError("request must be a JSON object")
+                resp = handle_request(req)
+            except Exception as e:
+                resp = {"id": req.get("id") if req is not None else None, "error": str(e)}
+            writer.write(json.dumps(resp, ensure_ascii=False).encode("utf-8") + b"\n")
+            # drain() returns immediately unless the client stopped reading, so
+            # pipelined requests are still answered back-to-back.
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+async def serve(address: str):
+    kind, target = parse_address(address)
+    if kind == "unix":
+        if os.path.exists(target):
+            os.unlink(target)
+        server = await asyncio.start_unix_server(_serve_connection, path=target, limit=MAX_LINE)
+    else:
+        host, port = target
+        server = await asyncio.start_server(_serve_connection, host=host, port=port, limit=MAX_LINE)
+    print(f"convert_server listening on {address}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if kind == "unix" and os.path.exists(target):
+            os.unlink(target)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    group = p.add_mutually_exclusive_group()
+    group.add_argument("--unix", metavar="PATH", help="Listen on a Unix socket")
+    group.add_argument("--tcp", metavar="HOST:PORT", help="Listen on a localhost TCP port")
+    p.add_argument("--allow-remote", action="store_true", help="Let --tcp bind a non-loopback host")
+    args = p.parse_args()
+
+    if args.unix:
+        address = f"unix:{args.unix}"
+    elif args.tcp:
+        address = args.tcp
+    else:
+        address = DEFAULT_ADDRESS
+    try:
+        kind, target = parse_address(address)
+    except ValueError as e:
+        p.error(str(e))
+    if kind == "tcp" and not is_loopback(target[0]) and not args.allow_remote:
+        p.error(f"{target[0]} is not a loopback address; pass --allow-remote to serve it anyway")
+
+    t0 = time.perf_counter()
+    # Warm up the regex cache so the first real request is as fast as the rest.
+    handle_request({"op": "appearance", "text": "white lace pajamas, blonde hair up in a high ponytail", "seed": 0})
+    print(f"warmed up in {(time.perf_counter() - t0) * 1000:.1f} ms", file=sys.stderr)
+
+    try:
+        asyncio.run(serve(address))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -4,8 +4,17 @@ import sys
 import shlex
 import os
 import threading
+import queue
 import random
 import re
+import ctypes
+import shutil
+import tempfile
+import atexit
+import time
+
+# Startup reference for the GUI's first-paint / ready timings.
+_START = time.perf_counter()
 
 _BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -23,7 +32,85 @@ def _pick_ai_binary():
 
 AI_BIN = _pick_ai_binary()
 
-def run_ai(timeout=30):
+
+def _pick_ai_library():
+    # Optional shared-library build of ai.cpp (see .vscode/build.bat).
+    for name in ("ai.dll", "libai.so", "libai.dylib"):
+        path = os.path.join(_BASE_DIR, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+AI_LIB = _pick_ai_library()
+
+_SEED_MASK = (1 << 64) - 1
+
+
+class AiLibrary:
+    """In-process prompt generation through ai.cpp's generate_prompt().
+
+    The library is loaded from a private copy, so the original can be rebuilt
+    while the GUI is running (Windows locks loaded DLLs); a rebuilt library is
+    picked up on the next call. Calls are serialized because the generator
+    keeps process-wide state.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._lib = None
+        self._mtime = None
+        self._tmpdir = None
+        self._buf = ctypes.create_string_buffer(1 << 16)
+
+    def _load(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if self._lib is not None and mtime == self._mtime:
+            return self._lib
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.mkdtemp(prefix='ai_lib_')
+            atexit.register(shutil.rmtree, self._tmpdir, ignore_errors=True)
+        stem, ext = os.path.splitext(os.path.basename(self.path))
+        copy = os.path.join(self._tmpdir, f"{stem}_{mtime}{ext}")
+        shutil.copyfile(self.path, copy)
+        lib = ctypes.CDLL(copy)
+        lib.generate_prompt.argtypes = [ctypes.c_ulonglong, ctypes.c_char_p, ctypes.c_size_t]
+        lib.generate_prompt.restype = ctypes.c_size_t
+        self._lib, self._mtime = lib, mtime
+        return lib
+
+    def generate(self, seed):
+        with self._lock:
+            lib = self._load()
+            n = lib.generate_prompt(seed & _SEED_MASK, self._buf, len(self._buf))
+            if n >= len(self._buf):
+                self._buf = ctypes.create_string_buffer(n + 1)
+                lib.generate_prompt(seed & _SEED_MASK, self._buf, len(self._buf))
+            return self._buf.raw[:n].decode('utf-8')
+
+
+_ai_library = AiLibrary(AI_LIB) if AI_LIB else None
+
+
+def _library_generate(seed):
+    """Generate through the shared library; None if it's missing or unusable."""
+    global _ai_library
+    if _ai_library is None:
+        return None
+    try:
+        return _ai_library.generate(seed)
+    except (OSError, AttributeError) as e:
+        # Broken or outdated library: fall back to the executable from now on.
+        print(f"Warning: {_ai_library.path} unusable ({e}); using {AI_BIN}", file=sys.stderr)
+        _ai_library = None
+        return None
+
+
+def run_ai(timeout=30, seed=None):
+    output = _library_generate(random.getrandbits(64) if seed is None else seed)
+    if output is not None:
+        return output
     try:
         if not os.path.isfile(AI_BIN):
             return (
@@ -32,7 +119,8 @@ def run_ai(timeout=30):
             )
         env = os.environ.copy()
         env['NO_CLIPBOARD'] = '1'
-        result = subprocess.run([AI_BIN], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+        cmd = [AI_BIN] if seed is None else [AI_BIN, '--seed', str(seed & _SEED_MASK)]
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
         if result.returncode != 0:
             return f"Error running {AI_BIN}: returncode={result.returncode}, stderr={result.stderr.decode('utf-8')}\n"
         return result.stdout.decode('utf-8')
@@ -47,10 +135,389 @@ def run_ai(timeout=30):
     except Exception as e:
         return f"Error running {AI_BIN}: {e}\n"
 
+
+def iter_ai(count, seed=None, chunk_size=1 << 16):
+    """Yield `count` prompts as they are generated.
+
+    Uses the shared library in-process when available, otherwise streams from
+    one `ai --count N --null` process. Both give prompt n the seed S + n, so
+    the output for a given seed is the same either way. Raises RuntimeError if
+    the binary is missing or exits with an error.
+    """
+    if _ai_library is not None:
+        if seed is None:
+            seed = random.getrandbits(64)
+        for n in range(count):
+            output = _library_generate(seed + n)
+            if output is None:
+                break
+            yield output
+        else:
+            return
+        count -= n
+        seed += n
+    if not os.path.isfile(AI_BIN):
+        raise RuntimeError(f"{AI_BIN} not found")
+    cmd = [AI_BIN, '--count', str(count), '--null']
+    if seed is not None:
+        cmd += ['--seed', str(seed & _SEED_MASK)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=_BASE_DIR)
+    try:
+        buf = b''
+        while True:
+            chunk = proc.stdout.read1(chunk_size)
+            if not chunk:
+                break
+            buf += chunk
+            *prompts, buf = buf.split(b'\0')
+            for p in prompts:
+                yield p.decode('utf-8')
+        # An older binary ignores --count and prints one unterminated prompt.
+        if buf:
+            yield buf.decode('utf-8')
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        returncode = proc.wait()
+        stderr = proc.stderr.read().decode('utf-8', errors='replace')
+        proc.stderr.close()
+    if returncode != 0:
+        raise RuntimeError(f"{AI_BIN} --count failed: returncode={returncode}, stderr={stderr}")
+
+
+def _is_error(output):
+    return output.startswith("Error")
+
+
+def _binary_mtime():
+    # Covers both the executable and the shared library; either changing
+    # means queued prompts came from an old build.
+    mtimes = []
+    for path in (AI_BIN, AI_LIB):
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns if path else None)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+# Number of prompts generated ahead of demand (override with --prefetch N or AI_PREFETCH).
+PREFETCH_DEPTH = 8
+
+# After a failed generation the prefetcher waits, doubling the wait on each
+# further failure up to this many seconds.
+PREFETCH_MAX_BACKOFF = 60.0
+
+
+class PromptPrefetcher:
+    """Keeps a bounded queue of ready prompts filled in the background.
+
+    A producer thread runs the generator ahead of demand whenever the queue
+    is below `depth`, and otherwise sleeps until a prompt is taken or the
+    idle interval passes. Queued prompts are dropped as soon as the ai
+    binary's mtime changes, so a rebuild never serves stale output. Each
+    prompt is generated with an explicit seed (producer(seed=...)), kept
+    alongside it so the GUI can record where it came from.
+
+    Errors (no binary or library, a crashing build) are never queued. The
+    newest one is kept in `error` until a prompt is generated again, and the
+    producer backs off exponentially, retrying early when a prompt is asked
+    for or the binary changes.
+    """
+
+    def __init__(self, depth=PREFETCH_DEPTH, producer=run_ai, idle_interval=2.0):
+        self.depth = depth
+        self._producer = producer
+        self._idle_interval = idle_interval
+        self._queue = queue.Queue(maxsize=max(depth, 1))
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._mtime = _binary_mtime()
+        self._thread = None
+        self._backoff = 0.0
+        self.error = None
+
+    def start(self):
+        if self.depth > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def flush(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def _check_binary(self):
+        mtime = _binary_mtime()
+        if mtime != self._mtime:
+            self._mtime = mtime
+            self._backoff = 0.0
+            self.flush()
+            return True
+        return False
+
+    def _produce(self, seed):
+        output = self._producer(seed=seed)
+        if _is_error(output):
+            self.error = output.strip()
+            return None
+        self.error = None
+        self._backoff = 0.0
+        return output
+
+    def _back_off(self):
+        self._backoff = min(self._backoff * 2 or self._idle_interval, PREFETCH_MAX_BACKOFF)
+        deadline = time.monotonic() + self._backoff
+        while not self._stopped.is_set():
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return
+            if self._wake.wait(min(left, self._idle_interval)):
+                self._wake.clear()
+                return
+            if self._check_binary():
+                return
+
+    def pop_nowait(self):
+        """Return a prefetched (seed, prompt) pair, or None if none is ready."""
+        self._check_binary()
+        try:
+            item = self._queue.get_nowait()
+        except queue.Empty:
+            item = None
+        self._wake.set()
+        return item
+
+    def pop(self):
+        """Return (seed, prompt), generating one synchronously if the queue is
+        empty. Raises RuntimeError if that fails."""
+        item = self.pop_nowait()
+        if item is None:
+            seed = random.getrandbits(64)
+            output = self._produce(seed)
+            if output is None:
+                raise RuntimeError(self.error)
+            item = (seed, output)
+        return item
+
+    def get_nowait(self):
+        """Return a prefetched prompt, or None if none is ready."""
+        item = self.pop_nowait()
+        return None if item is None else item[1]
+
+    def get(self):
+        """Return a prompt, generating one synchronously if the queue is empty."""
+        return self.pop()[1]
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._check_binary()
+            if self._queue.full():
+                # Idle: sleep until a prompt is taken or it's time to re-check the binary.
+                self._wake.wait(self._idle_interval)
+                self._wake.clear()
+                continue
+
+            mtime = self._mtime
+            seed = random.getrandbits(64)
+            output = self._produce(seed)
+            if output is None:
+                self._back_off()
+                continue
+            # Discard anything produced by a binary that was replaced meanwhile.
+            if self._check_binary() or mtime != self._mtime:
+                continue
+            try:
+                self._queue.put_nowait((seed, output))
+            except queue.Full:
+                pass
+
+
+def _prefetch_depth_from_args(argv):
+    depth = os.environ.get('AI_PREFETCH', PREFETCH_DEPTH)
+    if '--prefetch' in argv:
+        idx = argv.index('--prefetch')
+        if idx + 1 < len(argv):
+            depth = argv[idx + 1]
+    try:
+        return max(0, int(depth))
+    except ValueError:
+        return PREFETCH_DEPTH
+
+
+
+class GuiJob:
+    """One unit of GUI work. `on_commit(job)` runs on the worker thread right
+    after fn succeeds, unless the job was cancelled first; it is where shared
+    state gets written. `on_done(job)` runs on the Tk thread once the job has
+    finished or was cancelled; check `cancelled`, then `error`."""
+
+    def __init__(self, kind, key, fn, args, on_done=None, on_commit=None):
+        self.kind = kind
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.on_done = on_done
+        self.on_commit = on_commit
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self.started = False
+        self.committed = False
+        self.done = False
+        self.coalesced = 0
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class GuiExecutor:
+    """Runs all GUI work as serialized jobs on one long-lived worker thread.
+
+    Jobs run one at a time in submission order, so buttons clicked in quick
+    succession can't race on the clipboard or on shared state. Submitting a
+    job with the same kind and key as the newest queued (not yet started) one
+    returns that job instead of queueing a duplicate; key None means "whatever
+    input the queue ends up with", so it collapses into any newest queued job
+    of its kind. Finished (and cancelled) jobs are put on one results queue,
+    which the Tk side drains with poll() from a single after() loop. A
+    cancelled job is skipped if it hasn't started, and its on_commit is
+    skipped if it has; a job that already committed can't be cancelled.
+    """
+
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._unfinished = []
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, kind, key, fn, *args, on_done=None, on_commit=None):
+        with self._lock:
+            last = self._unfinished[-1] if self._unfinished else None
+            if (last is not None and not last.started and not last.cancelled
+                    and last.kind == kind and (key is None or last.key == key)):
+                last.coalesced += 1
+                return last
+            job = GuiJob(kind, key, fn, args, on_done, on_commit)
+            self._unfinished.append(job)
+        self._jobs.put(job)
+        return job
+
+    def submit_background(self, kind, fn, *args, on_done=None):
+        """Run fn on its own thread, outside the serialized order (for work
+        like startup loading that queued clicks shouldn't wait behind), and
+        deliver it through the same results queue."""
+        job = GuiJob(kind, None, fn, args, on_done)
+
+        def run():
+            try:
+                job.result = fn(*args)
+            except Exception as e:
+                job.error = e
+            job.done = True
+            self._results.put(job)
+
+        threading.Thread(target=run, daemon=True).start()
+        return job
+
+    def busy(self):
+        with self._lock:
+            return bool(self._unfinished)
+
+    def cancel(self, kind=None):
+        """Cancel unfinished, uncommitted jobs (of one kind, or all); return them."""
+        with self._lock:
+            jobs = [j for j in self._unfinished if (kind is None or j.kind == kind) and not j.committed]
+            for job in jobs:
+                job.cancel()
+        return jobs
+
+    def shutdown(self):
+        self.cancel()
+        self._jobs.put(None)
+
+    def poll(self):
+        """Return finished jobs without blocking (call from the Tk thread)."""
+        done = []
+        while True:
+            try:
+                done.append(self._results.get_nowait())
+            except queue.Empty:
+                return done
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            with self._lock:
+                job.started = True
+            if not job.cancelled:
+                try:
+                    job.result = job.fn(*job.args)
+                except Exception as e:
+                    job.error = e
+            with self._lock:
+                # Decided under the lock so cancel() either wins outright or
+                # sees the job as committed and leaves it alone.
+                job.committed = not job.cancelled and job.error is None
+            if job.committed and job.on_commit is not None:
+                try:
+                    job.on_commit(job)
+                except Exception as e:
+                    job.error = e
+            with self._lock:
+                job.done = True
+                self._unfinished.remove(job)
+            self._results.put(job)
+
+
+# How often the Tk thread drains finished jobs.
+POLL_MS = 15
+
+
 # Non-GUI mode for testing: print output and exit
 if __name__ == '__main__':
     if '--generate' in sys.argv:
-        print(run_ai())
+        # --generate prints one prompt; --generate N [--seed S] [--dedupe T] streams N prompts
+        # from a single ai process, separated by blank lines.
+        idx = sys.argv.index('--generate')
+        count = sys.argv[idx + 1] if idx + 1 < len(sys.argv) else ''
+        if not count.isdigit():
+            print(run_ai())
+            sys.exit(0)
+        seed = None
+        if '--seed' in sys.argv:
+            seed = int(sys.argv[sys.argv.index('--seed') + 1])
+        # --dedupe T skips prompts with similarity >= T to an earlier one (near_dupes.py).
+        near_dupes = None
+        if '--dedupe' in sys.argv:
+            from near_dupes import NearDupIndex
+            near_dupes = NearDupIndex(threshold=float(sys.argv[sys.argv.index('--dedupe') + 1]))
+        try:
+            for output in iter_ai(int(count), seed=seed):
+                if near_dupes is not None and near_dupes.check(output) is not None:
+                    continue
+                sys.stdout.write(output)
+                sys.stdout.write('\n\n')
+        except RuntimeError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
         sys.exit(0)
 
     try:
@@ -61,36 +528,25 @@ if __name__ == '__main__':
         print('tkinter not available:', e)
         sys.exit(1)
 
-    try:
-        from convert_colors import (
-            convert_colors,
-            COLORS,
-            convert_hair,
-            HAIR,
-            convert_style,
-            STYLE,
-            convert_material,
-            MATERIAL,
-            convert_camera,
-            CAMERA_ANGLES,
-            convert_clothes,
-            UPPER,
-            LOWER,
-        )
-    except Exception:
-        convert_colors = None
-        COLORS = None
-        convert_hair = None
-        HAIR = None
-        convert_style = None
-        STYLE = None
-        convert_material = None
-        MATERIAL = None
-        convert_camera = None
-        CAMERA_ANGLES = None
-        convert_clothes = None
-        UPPER = None
-        LOWER = None
+    # Filled in by converters_loaded() once convert_colors (which parses ai.cpp)
+    # has been imported in the background; the window doesn't wait for it.
+    convert_colors = None
+    COLORS = None
+    convert_hair = None
+    HAIR = None
+    convert_style = None
+    STYLE = None
+    convert_material = None
+    MATERIAL = None
+    convert_camera = None
+    CAMERA_ANGLES = None
+    convert_clothes = None
+    UPPER = None
+    LOWER = None
+
+    def load_converters():
+        import convert_colors as cc
+        return cc
 
     root = tk.Tk()
     root.title('AI Generator')
@@ -115,31 +571,126 @@ if __name__ == '__main__':
     play_icon = '\u25B6'  # ▶
     redo_icon = '\u27F3'  # ⟳
 
+    # Written only by commit_output(), from a job's on_commit (or by the Tk
+    # thread while the executor is idle), so it always holds the text the
+    # newest committed job copied.
     last_output = {'text': ''}
 
-    def generate():
-        # Visual feedback: disable and show a spinner-like text
-        btn.config(state='disabled', text='...', bg='#FFA000')
-
-        def worker():
-            output = run_ai()
+    prefetcher = PromptPrefetcher(depth=_prefetch_depth_from_args(sys.argv)).start()
+    executor = GuiExecutor().start()
 
-            last_output['text'] = output
+    # Every copied prompt goes into the history store (prompt_history.py),
+    # opened on first use; --no-history turns it off.
+    # Both the Tk thread and executor jobs may open it, hence the lock.
+    history = {'store': None, 'enabled': '--no-history' not in sys.argv}
+    history_lock = threading.Lock()
 
-            def finish():
+    def history_store():
+        with history_lock:
+            if history['store'] is None and history['enabled']:
                 try:
-                    root.clipboard_clear()
-                    root.clipboard_append(output)
-                    # success visual
-                    btn.config(text=play_icon, bg='#4CAF50')
-                except Exception:
-                    # failure visual
-                    btn.config(text=play_icon, bg='#D32F2F')
-                btn.config(state='normal')
+                    from prompt_history import PromptHistory
+                    history['store'] = PromptHistory()
+                except Exception as e:
+                    print(f"Warning: prompt history unavailable ({e})", file=sys.stderr)
+                    history['enabled'] = False
+            return history['store']
+
+    def record(text, stage, seed):
+        store = history_store()
+        if store is None or _is_error(text):
+            return
+        try:
+            store.add(text, stage, seed)
+        except Exception as e:
+            print(f"Warning: could not record prompt history ({e})", file=sys.stderr)
+
+    def pump():
+        for job in executor.poll():
+            if job.on_done is not None:
+                job.on_done(job)
+        # Generation errors (e.g. no ai binary) show until a prompt succeeds.
+        error = (prefetcher.error or '').splitlines()[:1]
+        error = error[0] if error else ''
+        if error_lbl.cget('text') != error:
+            error_lbl.config(text=error)
+        root.after(POLL_MS, pump)
+
+    def commit_output(text, stage, seed, keep=True):
+        """Make text the newest output; keep=False skips the history entry."""
+        last_output['text'] = text
+        if keep:
+            record(text, stage, seed)
+
+    def commit_job(stage):
+        """on_commit for jobs whose result is (text, seed)."""
+        return lambda job: commit_output(job.result[0], stage, job.result[1])
+
+    def show_copy(button, icon, text):
+        try:
+            root.clipboard_clear()
+            root.clipboard_append(text)
+            # success visual
+            button.config(text=icon, bg='#4CAF50')
+        except Exception:
+            # failure visual
+            button.config(text=icon, bg='#D32F2F')
+
+    def copy_result(button, icon, job):
+        if job.cancelled:
+            button.config(text=icon, bg=button.default_bg)
+        elif job.error is not None:
+            button.config(text=icon, bg='#D32F2F')
+        else:
+            show_copy(button, icon, job.result[0])
+
+    def source_text(fallback_to_last):
+        """Input for a conversion job, or None to chain onto the queued jobs.
+
+        While jobs are pending the clipboard is about to change, so the job
+        reads last_output when it runs instead of the clipboard now.
+        """
+        if executor.busy():
+            return None
+        try:
+            txt = root.clipboard_get()
+        except Exception:
+            txt = ''
+        if not (txt or '').strip() and fallback_to_last:
+            txt = last_output.get('text') or ''
+        return txt
 
-            root.after(0, finish)
+    def generate_job():
+        seed, output = prefetcher.pop()
+        return output, seed
+
+    def generate():
+        # Fast path: with nothing queued, a prefetched prompt goes straight to the clipboard.
+        if not executor.busy():
+            item = prefetcher.pop_nowait()
+            if item is not None:
+                seed, output = item
+                commit_output(output, 'generate', seed)
+                show_copy(btn, play_icon, output)
+                return
+
+        # Visual feedback: show a spinner-like text. The button stays clickable;
+        # repeated clicks collapse into the queued job.
+        btn.config(text='...', bg='#FFA000')
+        executor.submit(
+            'generate', None, generate_job,
+            on_done=lambda job: copy_result(btn, play_icon, job), on_commit=commit_job('generate'),
+        )
 
-        threading.Thread(target=worker, daemon=True).start()
+    def appearance_job(txt):
+        txt = last_output['text'] if txt is None else txt
+        seed = random.getrandbits(64)
+        rng = random.Random(seed)
+        out, _counts = convert_colors(txt, rng, colors=COLORS)
+        newout, _counts2 = convert_hair(out, rng, hair=HAIR)
+        newerout, _counts2 = convert_style(newout, rng, style=STYLE)
+        newestout, _counts2 = convert_material(newerout, rng, material=MATERIAL)
+        return newestout, seed
 
     def replace_colors_and_copy():
         if convert_colors is None or convert_hair is None or convert_style is None or convert_material is None:
@@ -150,39 +701,51 @@ if __name__ == '__main__':
             return
 
         # Prefer current clipboard contents; fall back to the last generated output.
-        try:
-            txt = root.clipboard_get()
-        except Exception:
-            txt = ''
-
+        txt = source_text(fallback_to_last=True)
         if not (txt or '').strip():
-            txt = last_output.get('text') or ''
-
-        if not txt:
             messagebox.showinfo('No text', 'Generate text first (or copy text to clipboard), then try again.')
             return
 
-        replace_btn.config(state='disabled', text='...', bg='#FFA000')
-
-        def worker():
-            rng = random.Random()
-            out, _counts = convert_colors(txt, rng, colors=COLORS)
-            newout, _counts2 = convert_hair(out, rng, hair=HAIR)
-            newerout, _counts2 = convert_style(newout, rng, style=STYLE)
-            newestout, _counts2 = convert_material(newerout, rng, material=MATERIAL)
-
-            def finish():
-                try:
-                    root.clipboard_clear()
-                    root.clipboard_append(newestout)
-                    replace_btn.config(text=redo_icon, bg='#4CAF50')
-                except Exception:
-                    replace_btn.config(text=redo_icon, bg='#D32F2F')
-                replace_btn.config(state='normal')
-
-            root.after(0, finish)
+        replace_btn.config(text='...', bg='#FFA000')
+        executor.submit(
+            'appearance', txt, appearance_job, txt,
+            on_done=lambda job: copy_result(replace_btn, redo_icon, job), on_commit=commit_job('appearance'),
+        )
 
-        threading.Thread(target=worker, daemon=True).start()
+    def has_camera_angle(s: str) -> bool:
+        # Known literal angles from C++
+        if CAMERA_ANGLES:
+            low = s.lower()
+            for a in CAMERA_ANGLES:
+                if a and a.lower() in low:
+                    return True
+        # Dynamic C++ angle: (high angle shot:<float>)
+        if re.search(r"\(high angle shot\s*:\s*\d+(?:\.\d+)?\)", s, flags=re.IGNORECASE):
+            return True
+        return False
+
+    def camera_job(txt):
+        txt = last_output['text'] if txt is None else txt
+        seed = random.getrandbits(64)
+        newtxt, did = convert_camera(txt, random.Random(seed))
+        return newtxt, seed, txt, did
+
+    def camera_commit(job):
+        newtxt, seed, _txt, did = job.result
+        commit_output(newtxt, 'camera', seed, keep=did)
+
+    def camera_done(job):
+        if not job.cancelled and job.error is None:
+            _newtxt, _seed, txt, did = job.result
+            if not did:
+                if has_camera_angle(txt):
+                    messagebox.showinfo(
+                        'No valid replacement',
+                        'A camera angle was detected, but no valid replacement was available for this prompt (getShot(output) constraints may restrict options).',
+                    )
+                else:
+                    messagebox.showinfo('No camera angle found', 'No recognizable camera angle was found to replace.')
+        copy_result(camera_btn, redo_icon, job)
 
     def randomize_camera_and_copy():
         if convert_camera is None:
@@ -192,53 +755,19 @@ if __name__ == '__main__':
             )
             return
 
-        def has_camera_angle(s: str) -> bool:
-            # Known literal angles from C++
-            if CAMERA_ANGLES:
-                low = s.lower()
-                for a in CAMERA_ANGLES:
-                    if a and a.lower() in low:
-                        return True
-            # Dynamic C++ angle: (high angle shot:<float>)
-            if re.search(r"\(high angle shot\s*:\s*\d+(?:\.\d+)?\)", s, flags=re.IGNORECASE):
-                return True
-            return False
-
-        try:
-            txt = root.clipboard_get()
-        except Exception:
-            txt = ''
-
+        txt = source_text(fallback_to_last=False)
         if not (txt or '').strip():
             messagebox.showinfo('No text', 'Copy a prompt to clipboard, then try again.')
             return
 
-        camera_btn.config(state='disabled', text='...', bg='#FFA000')
+        camera_btn.config(text='...', bg='#FFA000')
+        executor.submit('camera', txt, camera_job, txt, on_done=camera_done, on_commit=camera_commit)
 
-        def worker():
-            rng = random.Random()
-            newtxt, did = convert_camera(txt, rng)
-
-            def finish():
-                try:
-                    if not did:
-                        if has_camera_angle(txt):
-                            messagebox.showinfo(
-                                'No valid replacement',
-                                'A camera angle was detected, but no valid replacement was available for this prompt (getShot(output) constraints may restrict options).',
-                            )
-                        else:
-                            messagebox.showinfo('No camera angle found', 'No recognizable camera angle was found to replace.')
-                    root.clipboard_clear()
-                    root.clipboard_append(newtxt)
-                    camera_btn.config(text=redo_icon, bg='#4CAF50')
-                except Exception:
-                    camera_btn.config(text=redo_icon, bg='#D32F2F')
-                camera_btn.config(state='normal')
-
-            root.after(0, finish)
-
-        threading.Thread(target=worker, daemon=True).start()
+    def clothes_job(txt):
+        txt = last_output['text'] if txt is None else txt
+        seed = random.getrandbits(64)
+        newtxt, counts = convert_clothes(txt, random.Random(seed), upper=UPPER, lower=LOWER)
+        return newtxt, seed
 
     def randomize_clothes_and_copy():
         if convert_clothes is None:
@@ -248,36 +777,102 @@ if __name__ == '__main__':
             )
             return
 
-        try:
-            txt = root.clipboard_get()
-        except Exception:
-            txt = ''
-
+        txt = source_text(fallback_to_last=True)
         if not (txt or '').strip():
-            txt = last_output.get('text') or ''
-
-        if not txt:
             messagebox.showinfo('No text', 'Generate text first (or copy text to clipboard), then try again.')
             return
 
-        clothes_btn.config(state='disabled', text='...', bg='#FFA000')
-
-        def worker():
-            rng = random.Random()
-            newtxt, counts = convert_clothes(txt, rng, upper=UPPER, lower=LOWER)
-
-            def finish():
-                try:
-                    root.clipboard_clear()
-                    root.clipboard_append(newtxt)
-                    clothes_btn.config(text=redo_icon, bg='#4CAF50')
-                except Exception:
-                    clothes_btn.config(text=redo_icon, bg='#D32F2F')
-                clothes_btn.config(state='normal')
+        clothes_btn.config(text='...', bg='#FFA000')
+        executor.submit(
+            'clothes', txt, clothes_job, txt,
+            on_done=lambda job: copy_result(clothes_btn, redo_icon, job), on_commit=commit_job('clothes'),
+        )
 
-            root.after(0, finish)
+    def open_history(_event=None):
+        store = history_store()
+        if store is None:
+            messagebox.showinfo('No history', 'Prompt history is disabled or unavailable.')
+            return
 
-        threading.Thread(target=worker, daemon=True).start()
+        win = tk.Toplevel(root)
+        win.title('Prompt History')
+        win.geometry('900x600')
+        win.configure(bg=DARK_BG)
+
+        query = tk.StringVar()
+        search_entry = tk.Entry(win, textvariable=query, bg=BUTTON_BG, fg=DARK_FG, insertbackground=DARK_FG)
+        search_entry.pack(fill=tk.X, padx=6, pady=6)
+        listbox = tk.Listbox(win, height=12, bg=PANEL_BG, fg=DARK_FG, selectbackground='#264f78', activestyle='none')
+        listbox.pack(fill=tk.BOTH, expand=True, padx=6)
+        preview = ScrolledText(win, wrap='word', height=12, bg=PANEL_BG, fg=DARK_FG)
+        preview.pack(fill=tk.BOTH, expand=True, padx=6, pady=(6, 0))
+        status = tk.Label(win, anchor='w', bg=DARK_BG, fg=DARK_FG)
+        status.pack(fill=tk.X, side=tk.BOTTOM, padx=6, pady=4)
+
+        shown = []
+        pending = {'after': None}
+
+        def search_job(text):
+            return store.search(text), store.totals()
+
+        def show_results(job):
+            if job.cancelled or not win.winfo_exists():
+                return
+            if job.error is not None:
+                status.config(text=f"Search failed: {job.error}")
+                return
+            results, (entries, nbytes) = job.result
+            shown[:] = results
+            listbox.delete(0, tk.END)
+            for e in shown:
+                seed = '' if e.seed is None else f' [{e.seed}]'
+                listbox.insert(tk.END, f"{e.stage:<10}{seed}  {' '.join(e.text.split())[:160]}")
+            status.config(text=f"{len(shown)} shown, {entries} stored ({nbytes / 1e6:.1f} MB)")
+
+        def refresh():
+            pending['after'] = None
+            # Off the Tk thread; a newer query replaces a search still pending.
+            executor.cancel('history')
+            text = query.get()
+            executor.submit('history', text, search_job, text, on_done=show_results)
+
+        def on_query(*_args):
+            # Debounce: search once typing pauses.
+            if pending['after'] is not None:
+                win.after_cancel(pending['after'])
+            pending['after'] = win.after(150, refresh)
+
+        def selected():
+            sel = listbox.curselection()
+            return shown[sel[0]] if sel else None
+
+        def on_select(_event=None):
+            e = selected()
+            preview.delete('1.0', tk.END)
+            if e is not None:
+                preview.insert(tk.END, e.text)
+
+        def copy_selected(_event=None):
+            e = selected()
+            if e is None:
+                return
+            root.clipboard_clear()
+            root.clipboard_append(e.text)
+            store.touch(e.id)
+            status.config(text=f"Copied #{e.id} ({e.stage}) to clipboard")
+
+        query.trace_add('write', on_query)
+        listbox.bind('<<ListboxSelect>>', on_select)
+        listbox.bind('<Double-Button-1>', copy_selected)
+        listbox.bind('<Return>', copy_selected)
+        tk.Button(win, text='Copy', command=copy_selected, bg=BUTTON_BG, fg=BUTTON_FG, activebackground=BUTTON_BG).pack(side=tk.BOTTOM, anchor='e', padx=6)
+        search_entry.focus_set()
+        refresh()
+
+    def cancel_pending(_event=None):
+        # Esc drops everything still queued; a running job's result is discarded
+        # unless it has already been committed.
+        executor.cancel()
 
     btn = tk.Button(
         root,
@@ -342,4 +937,55 @@ if __name__ == '__main__':
     cam_lbl = tk.Label(root, text='Randomize Camera', bg=DARK_BG, fg=DARK_FG)
     cam_lbl.place(relx=(7/8), rely=0.82, anchor='center')
 
+    for b in (btn, replace_btn, clothes_btn, camera_btn):
+        b.default_bg = b.cget('bg')
+
+    converter_btns = (replace_btn, clothes_btn, camera_btn)
+
+    def converters_loaded(job):
+        global convert_colors, COLORS, convert_hair, HAIR, convert_style, STYLE
+        global convert_material, MATERIAL, convert_camera, CAMERA_ANGLES, convert_clothes, UPPER, LOWER
+        cc = job.result
+        if job.error is not None:
+            # Buttons still work; their handlers report the missing converter.
+            print(f"Failed to import convert_colors.py: {job.error}", file=sys.stderr)
+        else:
+            convert_colors, COLORS = cc.convert_colors, cc.COLORS
+            convert_hair, HAIR = cc.convert_hair, cc.HAIR
+            convert_style, STYLE = cc.convert_style, cc.STYLE
+            convert_material, MATERIAL = cc.convert_material, cc.MATERIAL
+            convert_camera, CAMERA_ANGLES = cc.convert_camera, cc.CAMERA_ANGLES
+            convert_clothes, UPPER, LOWER = cc.convert_clothes, cc.UPPER, cc.LOWER
+        for b in converter_btns:
+            b.config(text=redo_icon, state='normal')
+        startup['ready'] = time.perf_counter() - _START
+        print(f"ready after {startup['ready'] * 1000:.0f} ms", file=sys.stderr)
+        if 'paint' not in startup:
+            # The vocabulary is meant to load behind a window that's already up.
+            print("Warning: converters were ready before the first paint", file=sys.stderr)
+
+    # Loading state until the vocabulary is parsed.
+    for b in converter_btns:
+        b.config(text='...', state='disabled')
+
+    # Seconds from _START to the first paint and to converters_loaded().
+    startup = {}
+
+    def first_paint(_event):
+        root.unbind('<Expose>')
+        startup['paint'] = time.perf_counter() - _START
+        print(f"first paint after {startup['paint'] * 1000:.0f} ms", file=sys.stderr)
+
+    root.bind('<Expose>', first_paint)
+    executor.submit_background('load', load_converters, on_done=converters_loaded)
+
+    history_btn = tk.Button(root, text='History', command=open_history, bg=BUTTON_BG, fg=DARK_FG, activebackground=BUTTON_BG, bd=0)
+    history_btn.place(relx=0.5, rely=0.94, anchor='center')
+
+    error_lbl = tk.Label(root, text='', bg=DARK_BG, fg='#EF5350', anchor='w')
+    error_lbl.place(relx=0.01, rely=0.94, anchor='w', relwidth=0.42)
+
+    root.bind('<Escape>', cancel_pending)
+    root.bind('<Control-h>', open_history)
+    root.after(POLL_MS, pump)
     root.mainloop()
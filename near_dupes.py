@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+near_dupes.py
+
+Streaming near-duplicate detection for large prompt batches.
+
+Each prompt is reduced to a MinHash signature over shingles of consecutive
+word tokens, and the signatures are indexed with LSH banding: a prompt is
+only compared against earlier prompts that share at least one band, so
+checking a prompt costs a handful of dict lookups instead of a pass over
+everything seen so far. Candidates are confirmed by their estimated Jaccard
+similarity. Prompts that differ only in a color or a material typically
+score 0.82-0.95; unrelated ai.cpp prompts stay below 0.6.
+
+The index remembers at most `capacity` prompts (oldest are forgotten first),
+and signatures live in one preallocated array, so memory stays bounded on
+arbitrarily long streams.
+
+NumPy is required for signatures (pip install numpy).
+
+Usage:
+  ai --count 100000 --null | python near_dupes.py --null > unique.bin
+  python near_dupes.py prompts.txt --threshold 0.9 --mode flag -o flagged.jsonl
+  python near_dupes.py pipeline_out.jsonl --mode flag -o flagged.jsonl
+
+Options:
+  --threshold T    Jaccard similarity at which prompts count as near-duplicates (default: 0.8)
+  --mode MODE      drop (write only first occurrences) or flag (write every prompt as JSONL
+                   with "near_dup_of" and "similarity")
+  --null           Prompts are NUL-terminated (default: blank-line separated; .jsonl uses "text")
+  --capacity N     Max prompts remembered
+"""
+import argparse
+import json
+import re
+import sys
+import zlib
+from collections import deque
+from pathlib import Path
+
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_SHINGLE = 3
+DEFAULT_CAPACITY = 200_000
+
+_TOKEN_RE = re.compile(r"[\w']+")
+
+# Largest prime below 2**32, for combining token hashes into shingle hashes.
+_PRIME = 4294967291
+
+
+# Token -> crc32 cache; prompts reuse a small vocabulary, so nearly every
+# token is a dict hit. Cleared if it ever grows past _TOKEN_CACHE_MAX.
+_token_hash: dict[str, int] = {}
+_TOKEN_CACHE_MAX = 1 << 20
+
+
+def _token_hashes(text: str) -> list[int]:
+    cache = _token_hash
+    tokens = _TOKEN_RE.findall(text.lower())
+    try:
+        return list(map(cache.__getitem__, tokens))
+    except KeyError:
+        if len(cache) > _TOKEN_CACHE_MAX:
+            cache.clear()
+        for tok in tokens:
+            if tok not in cache:
+                cache[tok] = zlib.crc32(tok.encode("utf-8"))
+        return list(map(cache.__getitem__, tokens))
+
+
+def shingle_hashes(text: str, k: int = DEFAULT_SHINGLE):
+    """Stable hashes (below _PRIME) of the k-word shingles of text, lowercased,
+    as a NumPy uint64 array."""
+    import numpy as np
+
+    tok = np.array(_token_hashes(text), dtype=np.uint64)
+    if len(tok) < k:
+        k = max(len(tok), 1)
+        if not len(tok):
+            tok = np.zeros(1, dtype=np.uint64)
+    n = len(tok) - k + 1
+    h = tok[:n] % _PRIME
+    for j in range(1, k):
+        h = (h * 1000003 + tok[j:j + n]) % _PRIME
+    return h
+
+
+def lsh_params(threshold: float, num_perm: int) -> tuple[int, int]:
+    """(bands, rows) with bands * rows == num_perm whose S-curve midpoint
+    (1 / bands) ** (1 / rows) is closest to threshold, leaning towards
+    lower midpoints so true near-duplicates are rarely missed."""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        mid = (1 / bands) ** (1 / rows)
+        # Missing a near-duplicate costs more than verifying an extra candidate.
+        score = abs(mid - threshold) * (2 if mid > threshold else 1)
+        if best is None or score < best[0]:
+            best = (score, bands, rows)
+    return best[1], best[2]
+
+
+class NearDupIndex:
+    """Bounded MinHash/LSH index of recently seen prompts.
+
+    check(text) returns (key, similarity) of an earlier near-duplicate, or
+    None; unless told otherwise it then remembers the prompt. Keys are
+    whatever the caller passes (defaults to the running prompt number).
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle: int = DEFAULT_SHINGLE,
+        capacity: int = DEFAULT_CAPACITY,
+        seed: int = 1,
+    ):
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise RuntimeError("Near-duplicate detection requires NumPy (pip install numpy)") from e
+        self._np = np
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle = shingle
+        self.capacity = capacity
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+
+        rng = np.random.default_rng(seed)
+        # Multiply-add-shift hashing: ((a * h + b) mod 2**64) >> 32 with odd a.
+        self._a = rng.integers(0, 1 << 63, size=(num_perm, 1), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=(num_perm, 1), dtype=np.uint64)
+        self._shift = np.uint64(32)
+
+        # Ring buffer of signatures; slot = sequence number % capacity.
+        self._sigs = np.zeros((capacity, num_perm), dtype=np.uint32)
+        self._keys: list = [None] * capacity
+        self._buckets: list[dict] = [{} for _ in range(self.bands)]
+        self._band_keys: deque = deque()
+        self._seq = 0
+        self.seen = 0
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return min(self._seq, self.capacity)
+
+    def signature(self, text: str):
+        h = shingle_hashes(text, self.shingle)
+        return ((self._a * h + self._b) >> self._shift).min(axis=1).astype(self._np.uint32)
+
+    def _bands_of(self, sig) -> list[int]:
+        r = self.rows
+        return [hash(sig[i * r:(i + 1) * r].tobytes()) for i in range(self.bands)]
+
+    def query(self, sig, band_keys=None):
+        """Best earlier match as (key, similarity) at or above the threshold, or None."""
+        band_keys = band_keys or self._bands_of(sig)
+        candidates = set()
+        for bucket, bk in zip(self._buckets, band_keys):
+            seqs = bucket.get(bk)
+            if seqs:
+                candidates.update(seqs)
+        if not candidates:
+            return None
+        seqs = sorted(candidates)
+        slots = [s % self.capacity for s in seqs]
+        sims = (self._sigs[slots] == sig).mean(axis=1)
+        best = int(sims.argmax())
+        if sims[best] < self.threshold:
+            return None
+        return self._keys[slots[best]], float(sims[best])
+
+    def add(self, sig, key=None, band_keys=None):
+        band_keys = band_keys or self._bands_of(sig)
+        if self._seq >= self.capacity:
+            self._evict_oldest()
+        seq = self._seq
+        slot = seq % self.capacity
+        self._sigs[slot] = sig
+        self._keys[slot] = seq if key is None else key
+        for bucket, bk in zip(self._buckets, band_keys):
+            bucket.setdefault(bk, []).append(seq)
+        self._band_keys.append(band_keys)
+        self._seq += 1
+
+    def _evict_oldest(self):
+        seq = self._seq - self.capacity
+        for bucket, bk in zip(self._buckets, self._band_keys.popleft()):
+            seqs = bucket[bk]
+            # Oldest sequence numbers are always at the front.
+            if len(seqs) == 1:
+                del bucket[bk]
+            else:
+                seqs.remove(seq)
+
+    def check(self, text: str, key=None, remember_duplicates: bool = False):
+        """Return (key, similarity) of an earlier near-duplicate of text, or
+        None. Remembers the prompt unless it's a duplicate (or always, with
+        remember_duplicates)."""
+        sig = self.signature(text)
+        band_keys = self._bands_of(sig)
+        match = self.query(sig, band_keys)
+        self.seen += 1
+        if match is not None:
+            self.duplicates += 1
+        if match is None or remember_duplicates:
+            self.add(sig, self.seen - 1 if key is None else key, band_keys)
+        return match
+
+
+def filter_near_duplicates(texts, index: NearDupIndex | None = None, drop: bool = True):
+    """Stream helper: yield (text, match) for every text, or only the texts
+    without an earlier near-duplicate when drop is set."""
+    index = index or NearDupIndex()
+    for text in texts:
+        match = index.check(text)
+        if drop:
+            if match is None:
+                yield text, None
+        else:
+            yield text, match
+
+
+def _read_records(stream, null: bool, jsonl: bool):
+    # Yields (record or None, text) without reading the whole input first.
+    if jsonl:
+        for line in stream:
+            if line.strip():
+                rec = json.loads(line)
+                yield rec, rec["text"]
+        return
+    sep = "\0" if null else "\n\n"
+    buf = ""
+    while True:
+        chunk = stream.read(1 << 16)
+        if not chunk:
+            break
+        buf += chunk
+        *parts, buf = buf.split(sep)
+        for part in parts:
+            if part.strip():
+                yield None, part
+    if buf.strip():
+        yield None, buf
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("input", nargs="?", help="Input prompts (omit for stdin)")
+    p.add_argument("-o", "--output", help="Output file (omit for stdout)")
+    p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Jaccard similarity threshold")
+    p.add_argument("--mode", choices=("drop", "flag"), default="drop", help="Drop near-duplicates or flag them")
+    p.add_argument("--null", action="store_true", help="Prompts are NUL-terminated")
+    p.add_argument("--num-perm", type=int, default=DEFAULT_NUM_PERM, help="MinHash permutations")
+    p.add_argument("--shingle", type=int, default=DEFAULT_SHINGLE, help="Words per shingle")
+    p.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY, help="Max prompts remembered")
+    args = p.parse_args()
+
+    if args.input:
+        inp = Path(args.input)
+        if not inp.exists():
+            print(f"Input file not found: {inp}")
+            raise SystemExit(2)
+        stream = inp.open(encoding="utf-8", newline="")
+        jsonl = inp.suffix.lower() == ".jsonl"
+    else:
+        stream = sys.stdin
+        jsonl = False
+
+    try:
+        index = NearDupIndex(args.threshold, args.num_perm, args.shingle, args.capacity)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        raise SystemExit(1)
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    sep = "\0" if args.null else "\n\n"
+    try:
+        for n, (rec, text) in enumerate(_read_records(stream, args.null, jsonl)):
+            match = index.check(text, key=rec.get("index", n) if rec else n)
+            if args.mode == "flag":
+                rec = dict(rec) if rec else {"index": n, "text": text}
+                rec["near_dup_of"] = None if match is None else match[0]
+                rec["similarity"] = None if match is None else round(match[1], 3)
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            elif match is None:
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n" if rec else text + sep)
+    finally:
+        if args.output:
+            out.close()
+        if args.input:
+            stream.close()
+
+    print(
+        f"--- {index.seen} prompt(s), {index.duplicates} near-duplicate(s) "
+        f"(threshold {index.threshold}, {index.bands}x{index.rows} bands) ---",
+        file=sys.stderr,
+    )
+
+
+if __name__ == '__main__':
+    main()
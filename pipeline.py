@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+pipeline.py
+
+Headless multi-stage prompt pipeline: the GUI's Generate -> Randomize
+Appearance -> Randomize Clothes -> Randomize Camera chain, without the
+clipboard, over a stream of prompts.
+
+Stages run in worker processes (or threads with --threads) connected by
+bounded queues, so a slow stage applies back-pressure instead of buffering
+without limit. Every record gets a seed, and each stage seeds its RNG from
+(record seed, stage name), so output is reproducible regardless of worker
+counts or scheduling. Records are written as JSON lines, in completion order
+(use "index" to restore generation order).
+
+If any worker fails, the other stages stop, the error is printed and the
+exit status is 1.
+
+Usage:
+  python pipeline.py -n 100000 --seed 1 -o prompts.jsonl
+  python pipeline.py --stages generate,clothes -n 5000 -j 4
+  python pipeline.py --stages appearance,camera --input prompts.txt -w appearance=6
+  python pipeline.py --stages camera --input batch.bin --null -o out.jsonl
+
+Options:
+  --stages LIST    Comma-separated stages (default: generate,appearance,clothes,camera)
+  -n N             Prompts to generate (when the first stage is generate)
+  --input FILE     Read prompts instead of generating: .jsonl ("text" field),
+                   NUL-terminated with --null, otherwise blank-line separated
+  -j N             Default workers per stage
+  -w STAGE=N,...   Per-stage worker counts
+  --near-dupes T   Drop (or with --flag-near-dupes, flag) near-duplicate outputs (near_dupes.py)
+"""
+import argparse
+import json
+import multiprocessing
+import queue
+import random
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+
+STAGE_NAMES = ("generate", "appearance", "clothes", "camera")
+DEFAULT_STAGES = "generate,appearance,clothes,camera"
+
+_SEED_MASK = (1 << 64) - 1
+
+# How often blocked queue operations check whether the pipeline has failed.
+_POLL = 0.1
+
+
+class PipelineError(RuntimeError):
+    """A worker failed; the message holds its stage and traceback."""
+
+
+class _Aborted(Exception):
+    # Raised inside a worker when another worker has failed.
+    pass
+
+
+def _put(q, item, failed):
+    while True:
+        try:
+            q.put(item, timeout=_POLL)
+            return
+        except queue.Full:
+            if failed.is_set():
+                raise _Aborted
+
+
+def _get(q, failed):
+    while True:
+        try:
+            return q.get(timeout=_POLL)
+        except queue.Empty:
+            if failed.is_set():
+                raise _Aborted
+
+
+def _guarded(fn, stage, failed, errors, *args):
+    # Worker entry point: report the first failure and make everyone stop.
+    try:
+        fn(*args, failed)
+    except _Aborted:
+        pass
+    except BaseException:
+        errors.put((stage, traceback.format_exc()))
+        failed.set()
+
+
+def _convert(stage: str, text: str, rng: random.Random) -> str:
+    # Imported lazily so each worker process parses ai.cpp once, and the
+    # "generate"-only path doesn't parse it at all.
+    from convert_colors import convert_appearance, convert_clothes, convert_camera
+
+    if stage == "appearance":
+        return convert_appearance(text, rng)[0]
+    if stage == "clothes":
+        return convert_clothes(text, rng)[0]
+    if stage == "camera":
+        return convert_camera(text, rng)[0]
+    raise ValueError(f"unknown stage {stage!r}")
+
+
+def _count(processed, n):
+    with processed.get_lock():
+        processed.value += n
+
+
+def _generate_worker(start, count, seed, batch_size, outq, processed, failed):
+    from gui import iter_ai
+
+    batch = []
+    for offset, text in enumerate(iter_ai(count, seed=seed + start)):
+        index = start + offset
+        batch.append({"index": index, "seed": (seed + index) & _SEED_MASK, "text": text, "stages": ["generate"]})
+        if len(batch) >= batch_size:
+            _put(outq, batch, failed)
+            _count(processed, len(batch))
+            batch = []
+    if batch:
+        _put(outq, batch, failed)
+        _count(processed, len(batch))
+
+
+def _stage_worker(stage, inq, outq, processed, failed):
+    while True:
+        batch = _get(inq, failed)
+        if batch is None:
+            break
+        for rec in batch:
+            rng = random.Random(f"{rec['seed']}:{stage}")
+            rec["text"] = _convert(stage, rec["text"], rng)
+            rec["stages"].append(stage)
+        _put(outq, batch, failed)
+        _count(processed, len(batch))
+
+
+def read_prompts(path: Path, null: bool = False):
+    """Yield prompt texts from a JSONL, NUL-terminated or blank-line separated file."""
+    if path.suffix.lower() == ".jsonl":
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)["text"]
+        return
+    txt = path.read_text(encoding="utf-8")
+    parts = txt.split("\0") if null else txt.split("\n\n")
+    for part in parts:
+        if part.strip():
+            yield part
+
+
+def _qsize(q):
+    try:
+        return q.qsize()
+    except NotImplementedError:  # multiprocessing queues on macOS
+        return -1
+
+
+class _Stage:
+    def __init__(self, name, workers, processed):
+        self.name = name
+        self.workers = workers
+        self.processed = processed
+        self.handles = []
+
+
+def run_pipeline(
+    stages,
+    out,
+    count: int = 0,
+    seed: int | None = None,
+    prompts=None,
+    workers: dict | None = None,
+    default_workers: int = 1,
+    queue_size: int = 16,
+    batch_size: int = 32,
+    use_threads: bool = False,
+    report_interval: float = 2.0,
+    report=sys.stderr,
+    near_dupes=None,
+    drop_near_dupes: bool = True,
+) -> dict:
+    """Run `stages` and write one JSON line per record to `out`.
+
+    Either the first stage is "generate" (count prompts from seed), or
+    `prompts` is an iterable of input texts. With a near_dupes.NearDupIndex,
+    final records that nearly duplicate an earlier one are dropped, or
+    flagged with "near_dup_of" and "similarity". Returns per-stage totals.
+    Raises PipelineError if a worker fails (the other workers are stopped).
+    """
+    if not stages:
+        raise ValueError("no stages given")
+    for name in stages:
+        if name not in STAGE_NAMES:
+            raise ValueError(f"unknown stage {name!r}; choose from {', '.join(STAGE_NAMES)}")
+    if "generate" in stages[1:]:
+        raise ValueError("generate can only be the first stage")
+    generating = stages[0] == "generate"
+    if not generating and prompts is None:
+        raise ValueError("an input is required when the first stage isn't generate")
+
+    if seed is None:
+        seed = random.getrandbits(64)
+        print(f"seed: {seed}", file=report)
+
+    if use_threads:
+        Queue, Worker, Value = queue.Queue, threading.Thread, _ThreadCounter
+        failed, errors = threading.Event(), queue.Queue()
+    else:
+        ctx = multiprocessing.get_context()
+        Queue, Worker = ctx.Queue, ctx.Process
+        Value = lambda: ctx.Value("Q", 0)  # noqa: E731
+        failed, errors = ctx.Event(), ctx.Queue()
+
+    workers = workers or {}
+    # Source stage: "generate", or "read" feeding input prompts from this process.
+    source_name = "generate" if generating else "read"
+    chain = stages[1:] if generating else list(stages)
+
+    queues = [Queue(maxsize=queue_size) for _ in range(len(chain) + 1)]
+    source = _Stage(source_name, workers.get(source_name, default_workers) if generating else 1, Value())
+    pipeline = [source] + [
+        _Stage(name, workers.get(name, default_workers), Value()) for i, name in enumerate(chain)
+    ]
+
+    # Start workers.
+    if generating:
+        per = -(-count // source.workers) if count else 0
+        for w in range(source.workers):
+            start = w * per
+            n = max(0, min(per, count - start))
+            if n:
+                source.handles.append(Worker(target=_guarded, args=(_generate_worker, "generate", failed, errors, start, n, seed, batch_size, queues[0], source.processed), daemon=True))
+    else:
+        source.handles.append(threading.Thread(target=_guarded, args=(_read_worker, "read", failed, errors, prompts, seed, batch_size, queues[0], source.processed), daemon=True))
+    for i, st in enumerate(pipeline[1:]):
+        for _ in range(st.workers):
+            st.handles.append(Worker(target=_guarded, args=(_stage_worker, st.name, failed, errors, st.name, queues[i], queues[i + 1], st.processed), daemon=True))
+    for st in pipeline:
+        for h in st.handles:
+            h.start()
+
+    # Shut down stage by stage: once every worker of a stage has exited, send
+    # one sentinel per worker of the next stage (or one to the writer).
+    def closer():
+        try:
+            for i, st in enumerate(pipeline):
+                for h in st.handles:
+                    h.join()
+                    # A process killed outright never reaches _guarded's handler.
+                    if getattr(h, "exitcode", 0):
+                        errors.put((st.name, f"worker exited with code {h.exitcode}\n"))
+                        failed.set()
+                nxt = pipeline[i + 1].workers if i + 1 < len(pipeline) else 1
+                for _ in range(nxt):
+                    _put(queues[i], None, failed)
+        except _Aborted:
+            pass
+
+    threading.Thread(target=closer, daemon=True).start()
+
+    t0 = time.perf_counter()
+    last_report = t0
+    written = 0
+    dropped = 0
+    final = queues[-1]
+    try:
+        while True:
+            try:
+                batch = final.get(timeout=_POLL)
+            except queue.Empty:
+                batch = ()
+                if failed.is_set():
+                    break
+            if batch is None:
+                break
+            for rec in batch:
+                if near_dupes is not None:
+                    match = near_dupes.check(rec["text"], key=rec["index"])
+                    if match is not None and drop_near_dupes:
+                        dropped += 1
+                        continue
+                    if not drop_near_dupes:
+                        rec["near_dup_of"] = None if match is None else match[0]
+                        rec["similarity"] = None if match is None else round(match[1], 3)
+                out.write(json.dumps(rec, ensure_ascii=False))
+                out.write("\n")
+                written += 1
+            now = time.perf_counter()
+            if report_interval and now - last_report >= report_interval:
+                _print_report(pipeline, queues, written, now - t0, report)
+                last_report = now
+    except BaseException:
+        # Output closed or Ctrl+C: don't let blocked workers (or the queues'
+        # feeder threads) keep the interpreter alive at exit.
+        failed.set()
+        _stop_workers(pipeline, queues, use_threads)
+        raise
+
+    if failed.is_set():
+        _stop_workers(pipeline, queues, use_threads)
+        messages = []
+        while True:
+            try:
+                stage, tb = errors.get(timeout=_POLL)
+            except queue.Empty:
+                break
+            messages.append(f"{stage} worker failed:\n{tb}")
+        raise PipelineError("".join(messages).rstrip() or "a worker failed")
+
+    elapsed = time.perf_counter() - t0
+    _print_report(pipeline, queues, written, elapsed, report, final_report=True)
+    if near_dupes is not None and report is not None:
+        what = f"{dropped} dropped" if drop_near_dupes else f"{near_dupes.duplicates} flagged"
+        print(f"near-duplicates (>= {near_dupes.threshold}): {what}", file=report)
+    return {
+        "written": written,
+        "near_duplicates": near_dupes.duplicates if near_dupes is not None else 0,
+        "seconds": elapsed,
+        "stages": {st.name: st.processed.value for st in pipeline},
+    }
+
+
+def _stop_workers(pipeline, queues, use_threads):
+    # Threads notice `failed` within _POLL; processes may be stuck in a
+    # converter, so they are terminated.
+    if use_threads:
+        return
+    for st in pipeline:
+        for h in st.handles:
+            if isinstance(h, multiprocessing.process.BaseProcess):
+                h.terminate()
+    for q in queues:
+        q.cancel_join_thread()
+
+
+def _read_worker(prompts, seed, batch_size, outq, processed, failed):
+    batch = []
+    for index, text in enumerate(prompts):
+        batch.append({"index": index, "seed": (seed + index) & _SEED_MASK, "text": text, "stages": []})
+        if len(batch) >= batch_size:
+            _put(outq, batch, failed)
+            _count(processed, len(batch))
+            batch = []
+    if batch:
+        _put(outq, batch, failed)
+        _count(processed, len(batch))
+
+
+class _ThreadCounter:
+    # Same interface as multiprocessing.Value for the threaded mode.
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def get_lock(self):
+        return self._lock
+
+
+def _print_report(pipeline, queues, written, elapsed, report, final_report=False):
+    if report is None:
+        return
+    elapsed = max(elapsed, 1e-9)
+    parts = []
+    for i, st in enumerate(pipeline):
+        depth = _qsize(queues[i])
+        depth_txt = "" if final_report else f" queue {depth if depth >= 0 else '?'}"
+        parts.append(f"{st.name}[{st.workers}] {st.processed.value} ({st.processed.value / elapsed:.0f}/s){depth_txt}")
+    label = "done" if final_report else f"{elapsed:.1f}s"
+    print(f"[{label}] " + " | ".join(parts) + f" | written {written}", file=report)
+
+
+def _parse_workers(spec: str | None) -> dict:
+    workers = {}
+    if not spec:
+        return workers
+    for item in spec.split(","):
+        name, _, n = item.partition("=")
+        if not n.isdigit() or int(n) < 1:
+            raise ValueError(f"bad worker spec {item!r}; use STAGE=N")
+        workers[name.strip()] = int(n)
+    return workers
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--stages", default=DEFAULT_STAGES, help="Comma-separated stages")
+    p.add_argument("-n", "--count", type=int, default=1000, help="Prompts to generate")
+    p.add_argument("--seed", type=int, help="Base seed for reproducibility")
+    p.add_argument("--input", help="Input prompts instead of generating")
+    p.add_argument("--null", action="store_true", help="Input prompts are NUL-terminated")
+    p.add_argument("-o", "--output", help="Output JSONL file (omit for stdout)")
+    p.add_argument("-j", "--jobs", type=int, default=1, help="Default workers per stage")
+    p.add_argument("-w", "--workers", help="Per-stage workers, e.g. appearance=4,camera=2")
+    p.add_argument("--queue-size", type=int, default=16, help="Max batches waiting between stages")
+    p.add_argument("--batch-size", type=int, default=32, help="Records per queue item")
+    p.add_argument("--threads", action="store_true", help="Use threads instead of processes")
+    p.add_argument("--report-interval", type=float, default=2.0, help="Seconds between progress reports")
+    p.add_argument("--near-dupes", type=float, metavar="T", help="Drop prompts with Jaccard similarity >= T to an earlier one")
+    p.add_argument("--flag-near-dupes", action="store_true", help="With --near-dupes, flag instead of dropping")
+    args = p.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    try:
+        workers = _parse_workers(args.workers)
+    except ValueError as e:
+        p.error(str(e))
+
+    prompts = None
+    if stages and "generate" not in stages:
+        if not args.input:
+            p.error("--input is required when the first stage isn't generate")
+        inp = Path(args.input)
+        if not inp.exists():
+            print(f"Input file not found: {inp}")
+            raise SystemExit(2)
+        prompts = read_prompts(inp, null=args.null)
+
+    near_dupes = None
+    if args.near_dupes is not None:
+        from near_dupes import NearDupIndex
+        try:
+            near_dupes = NearDupIndex(threshold=args.near_dupes)
+        except RuntimeError as e:
+            p.error(str(e))
+
+    out = open(args.output, "w", encoding="utf-8", newline="\n") if args.output else sys.stdout
+    try:
+        run_pipeline(
+            stages,
+            out,
+            count=args.count,
+            seed=args.seed,
+            prompts=prompts,
+            workers=workers,
+            default_workers=max(1, args.jobs),
+            queue_size=args.queue_size,
+            batch_size=args.batch_size,
+            use_threads=args.threads,
+            report_interval=args.report_interval,
+            near_dupes=near_dupes,
+            drop_near_dupes=not args.flag_near_dupes,
+        )
+    except ValueError as e:
+        p.error(str(e))
+    except PipelineError as e:
+        print(f"pipeline failed: {e}", file=sys.stderr)
+        raise SystemExit(1)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+prompt_history.py
+
+Bounded history of generated and transformed prompts, stored in SQLite with
+a full-text index, so earlier prompts can be found and re-copied instead of
+being lost on the next click.
+
+Every entry records the stage that produced it (generate, appearance,
+clothes, camera, ...) and the seed it was produced with. Entries are
+deduplicated by content hash: re-adding a prompt only bumps its use count
+and last-used time. When the stored text exceeds the size cap (or the entry
+cap), the least recently used entries are evicted. The cap counts prompt
+text; the trigram index makes the database file roughly four times larger.
+
+Search uses an FTS5 trigram index, so both substring ("ponytai") and token
+("white lace") queries are index lookups rather than table scans. Terms
+shorter than three characters fall back to LIKE on the trigram matches.
+Every add or touch gives the entry the next `seq` number, and the index is
+keyed by seq, so walking it backwards yields matches most recently used
+first and a search stops after `limit` rows however common its terms are.
+SQLite older than 3.34 has no trigram tokenizer; there every term is a LIKE
+scan. Upserts need SQLite 3.24+.
+
+Usage:
+  python prompt_history.py recent
+  python prompt_history.py search white lace
+  python prompt_history.py add prompts.txt --stage generate
+  python prompt_history.py stats
+
+Options:
+  --db PATH        History database (default: prompt_history.sqlite3 next to this file,
+                   or AI_HISTORY)
+  --limit N        Max entries to print
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+
+DEFAULT_DB = os.environ.get("AI_HISTORY") or str(Path(__file__).with_name("prompt_history.sqlite3"))
+
+# Defaults for the caps; whichever is hit first triggers eviction.
+MAX_BYTES = 256 * 1024 * 1024
+MAX_ENTRIES = 1_000_000
+
+# Evict down to this fraction of the cap, so eviction runs once per batch of
+# inserts instead of on every insert once the store is full.
+EVICT_TO = 0.9
+
+
+@dataclass
+class HistoryEntry:
+    id: int
+    text: str
+    stage: str
+    seed: int | None
+    created: float
+    last_used: float
+    uses: int
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    id INTEGER PRIMARY KEY,
+    hash BLOB NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    seed TEXT,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    uses INTEGER NOT NULL DEFAULT 1,
+    size INTEGER NOT NULL,
+    seq INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS prompts_seq ON prompts(seq);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS prompts_ai AFTER INSERT ON prompts BEGIN
+    INSERT INTO prompts_fts(rowid, text) VALUES (new.seq, new.text);
+    UPDATE totals SET entries = entries + 1, bytes = bytes + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS prompts_ad AFTER DELETE ON prompts BEGIN
+    INSERT INTO prompts_fts(prompts_fts, rowid, text) VALUES ('delete', old.seq, old.text);
+    UPDATE totals SET entries = entries - 1, bytes = bytes - old.size;
+END;
+CREATE TRIGGER IF NOT EXISTS prompts_au AFTER UPDATE OF seq ON prompts BEGIN
+    INSERT INTO prompts_fts(prompts_fts, rowid, text) VALUES ('delete', old.seq, old.text);
+    INSERT INTO prompts_fts(rowid, text) VALUES (new.seq, new.text);
+END;
+"""
+
+# The seq an entry gets when it's added or used.
+_NEXT_SEQ = "(SELECT IFNULL(MAX(seq), 0) + 1 FROM prompts)"
+
+
+def _migrate(conn) -> bool:
+    """Give a store from before seq existed its seq column, numbered in
+    last_used order, and drop its id-keyed index. True if anything changed
+    (the index then needs a rebuild)."""
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(prompts)")}
+    if not cols or "seq" in cols:
+        return False
+    for stmt in (
+        "DROP TRIGGER IF EXISTS prompts_ai",
+        "DROP TRIGGER IF EXISTS prompts_ad",
+        "DROP TABLE IF EXISTS prompts_fts",
+        "DROP INDEX IF EXISTS prompts_last_used",
+        "ALTER TABLE prompts ADD COLUMN seq INTEGER NOT NULL DEFAULT 0",
+    ):
+        conn.execute(stmt)
+    ids = [row[0] for row in conn.execute("SELECT id FROM prompts ORDER BY last_used, id")]
+    conn.executemany("UPDATE prompts SET seq = ? WHERE id = ?", ((n, i) for n, i in enumerate(ids, 1)))
+    return True
+
+
+def _has_trigram(conn) -> bool:
+    # The trigram tokenizer needs SQLite 3.34+.
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp._probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class PromptHistory:
+    """SQLite-backed prompt history. Safe to share between threads."""
+
+    def __init__(self, path: str = DEFAULT_DB, max_bytes: int = MAX_BYTES, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.trigram = _has_trigram(self._conn)
+        tokenize = "trigram" if self.trigram else "unicode61"
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            migrated = _migrate(conn)
+            conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5("
+                f"text, content='prompts', content_rowid='seq', tokenize='{tokenize}')"
+            )
+            # One statement at a time: executescript() would commit the transaction.
+            stmt = ""
+            for line in _SCHEMA.splitlines(keepends=True):
+                stmt += line
+                if sqlite3.complete_statement(stmt):
+                    conn.execute(stmt)
+                    stmt = ""
+            if migrated:
+                conn.execute("INSERT INTO prompts_fts(prompts_fts) VALUES ('rebuild')")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, text: str, stage: str, seed: int | None = None) -> int:
+        """Record a prompt; return its entry id. Known prompts are moved to
+        the front (last used now) instead of being stored twice."""
+        now = time.time()
+        seed_txt = None if seed is None else str(seed)
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                digest = _hash(text)
+                conn.execute(
+                    "INSERT INTO prompts (hash, text, stage, seed, created, last_used, size, seq) "
+                    f"VALUES (?, ?, ?, ?, ?, ?, ?, {_NEXT_SEQ}) "
+                    "ON CONFLICT(hash) DO UPDATE SET last_used = excluded.last_used, uses = uses + 1, seq = excluded.seq",
+                    (digest, text, stage, seed_txt, now, now, len(text.encode("utf-8"))),
+                )
+                # Not RETURNING (3.35+), which would rule out the pre-trigram fallback.
+                row = conn.execute("SELECT id FROM prompts WHERE hash = ?", (digest,)).fetchone()
+                self._evict_locked()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return row[0]
+
+    def _evict_locked(self):
+        entries, nbytes = self._conn.execute("SELECT entries, bytes FROM totals").fetchone()
+        if entries <= self.max_entries and nbytes <= self.max_bytes:
+            return
+        # Drop least recently used entries until both totals are under EVICT_TO of their caps.
+        target_entries = int(self.max_entries * EVICT_TO)
+        target_bytes = int(self.max_bytes * EVICT_TO)
+        while entries > target_entries or nbytes > target_bytes:
+            chunk = max(entries - target_entries, 256)
+            self._conn.execute(
+                "DELETE FROM prompts WHERE id IN (SELECT id FROM prompts ORDER BY seq LIMIT ?)",
+                (chunk,),
+            )
+            entries, nbytes = self._conn.execute("SELECT entries, bytes FROM totals").fetchone()
+            if entries == 0:
+                break
+
+    def touch(self, entry_id: int):
+        """Mark an entry as used now (e.g. re-copied from the browser)."""
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE prompts SET last_used = ?, uses = uses + 1, seq = {_NEXT_SEQ} WHERE id = ?",
+                (time.time(), entry_id),
+            )
+
+    def get(self, entry_id: int) -> HistoryEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, text, stage, seed, created, last_used, uses FROM prompts WHERE id = ?", (entry_id,)
+            ).fetchone()
+        return _entry(row) if row else None
+
+    def recent(self, limit: int = 200, stage: str | None = None) -> list[HistoryEntry]:
+        sql = "SELECT id, text, stage, seed, created, last_used, uses FROM prompts"
+        args: list = []
+        if stage:
+            sql += " WHERE stage = ?"
+            args.append(stage)
+        sql += " ORDER BY seq DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            return [_entry(r) for r in self._conn.execute(sql, args)]
+
+    def search(self, query: str, limit: int = 200, stage: str | None = None) -> list[HistoryEntry]:
+        """Entries containing every whitespace-separated term of `query`
+        (case-insensitive substrings), most recently used first, like recent()."""
+        terms = query.split()
+        if not terms:
+            return self.recent(limit, stage)
+
+        # Index terms go through FTS; short terms (or every term without the
+        # trigram tokenizer) are checked with LIKE on the candidates.
+        if self.trigram:
+            fts_terms = [t for t in terms if len(t) >= 3]
+            like_terms = [t for t in terms if len(t) < 3]
+        else:
+            fts_terms = []
+            like_terms = terms
+
+        cols = "p.id, p.text, p.stage, p.seed, p.created, p.last_used, p.uses"
+        where: list[str] = []
+        args: list = []
+        if fts_terms:
+            # Walk the index from the most recently used end (rowid = seq) and
+            # stop at `limit`, rather than collecting and sorting every match
+            # of a common term.
+            sql = f"SELECT {cols} FROM prompts_fts f JOIN prompts p ON p.seq = f.rowid"
+            where.append("prompts_fts MATCH ?")
+            args.append(" AND ".join('"' + t.replace('"', '""') + '"' for t in fts_terms))
+            order = "f.rowid"
+        else:
+            sql = f"SELECT {cols} FROM prompts p"
+            order = "p.seq"
+        for t in like_terms:
+            where.append("p.text LIKE ? ESCAPE '\\'")
+            args.append("%" + t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if stage:
+            where.append("p.stage = ?")
+            args.append(stage)
+        sql += " WHERE " + " AND ".join(where) + f" ORDER BY {order} DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            return [_entry(r) for r in self._conn.execute(sql, args)]
+
+    def totals(self) -> tuple[int, int]:
+        """(entries, stored bytes), without the per-stage scan of stats()."""
+        with self._lock:
+            return self._conn.execute("SELECT entries, bytes FROM totals").fetchone()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, nbytes = self._conn.execute("SELECT entries, bytes FROM totals").fetchone()
+            stages = dict(self._conn.execute("SELECT stage, COUNT(*) FROM prompts GROUP BY stage"))
+        return {"entries": entries, "bytes": nbytes, "stages": stages}
+
+
+def _entry(row) -> HistoryEntry:
+    id_, text, stage, seed, created, last_used, uses = row
+    return HistoryEntry(id_, text, stage, None if seed is None else int(seed), created, last_used, uses)
+
+
+def _print_entries(entries):
+    for e in entries:
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(e.last_used))
+        seed = "" if e.seed is None else f" seed={e.seed}"
+        print(f"--- #{e.id} {e.stage}{seed} {when} x{e.uses} ---")
+        print(e.text.rstrip("\n"))
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--db", default=DEFAULT_DB, help="History database path")
+    p.add_argument("--limit", type=int, default=20, help="Max entries to print")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("recent", help="Most recently used entries")
+    s = sub.add_parser("search", help="Entries containing all terms")
+    s.add_argument("terms", nargs="+")
+    a = sub.add_parser("add", help="Add prompts from a file (blank-line or NUL separated)")
+    a.add_argument("input")
+    a.add_argument("--stage", default="import")
+    a.add_argument("--null", action="store_true", help="Prompts are NUL-terminated")
+    sub.add_parser("stats", help="Entry count, stored bytes and per-stage counts")
+    args = p.parse_args()
+
+    with PromptHistory(args.db) as history:
+        if args.cmd == "recent":
+            _print_entries(history.recent(args.limit))
+        elif args.cmd == "search":
+            _print_entries(history.search(" ".join(args.terms), args.limit))
+        elif args.cmd == "add":
+            inp = Path(args.input)
+            if not inp.exists():
+                print(f"Input file not found: {inp}")
+                raise SystemExit(2)
+            txt = inp.read_text(encoding="utf-8")
+            parts = [t for t in (txt.split("\0") if args.null else txt.split("\n\n")) if t.strip()]
+            for t in parts:
+                history.add(t, args.stage)
+            print(f"--- added {len(parts)} prompt(s) ---", file=sys.stderr)
+        else:
+            st = history.stats()
+            print(f"entries: {st['entries']}")
+            print(f"bytes:   {st['bytes']}")
+            for stage, n in sorted(st["stages"].items()):
+                print(f"  {stage}: {n}")
+
+
+if __name__ == '__main__':
+    main()
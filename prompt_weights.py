@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+prompt_weights.py
+
+Parse stable-diffusion attention syntax such as "((parted lips:1.5))",
+"(((hidden face:1.9)))" and "(high angle shot:1.2)", and edit the explicit
+weights of many prompts at once.
+
+parse_attention() turns a prompt into flat arrays: one entry per parenthesized
+group (offsets, nesting depth, explicit weight) and one entry per plain-text
+span (offsets, depth, innermost group). WeightBatch parses a batch once and
+keeps every explicit weight in a single array, so rescale/jitter/clamp never
+re-parse. Prompts whose weights did not change serialize back byte-exactly.
+
+Usage:
+  python prompt_weights.py prompts.txt --scale 1.1 -o out.txt
+  python prompt_weights.py prompts.bin --null --jitter 0.1 --seed 1 --clamp 0.5 1.9
+
+Options:
+  --scale F        Multiply every explicit weight by F
+  --jitter A       Add uniform noise in [-A, A] to every explicit weight
+  --clamp LO HI    Clamp every explicit weight to [LO, HI]
+  --seed N         Seed RNG for reproducible jitter
+  --null           Input/output prompts are NUL-terminated (default: whole file is one prompt)
+"""
+import argparse
+import math
+import random
+import re
+import sys
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+
+# Structural tokens: escaped characters are skipped, parentheses open/close groups.
+_TOKEN_RE = re.compile(r"\\.|[()]", re.DOTALL)
+
+# Explicit weight at the end of a group's own text: "...:1.5" (before the ")").
+_WEIGHT_RE = re.compile(r":\s*([+-]?(?:\d+(?:\.\d*)?|\.\d+))\s*$")
+
+# Implicit multiplier of one pair of parentheses without an explicit weight.
+PAREN_MULTIPLIER = 1.1
+
+
+@dataclass(frozen=True)
+class ParsedPrompt:
+    """Flat-array view of a prompt's attention groups and text spans.
+
+    Groups (parallel arrays, index = order of the opening parenthesis):
+      group_open / group_close   offsets of "(" and ")" (close == len(text) if unclosed)
+      group_depth                1 for an outermost group
+      group_weight               explicit weight, or NaN if none
+      weight_start / weight_end  offsets of the weight's number text, or -1
+
+    Spans (parallel arrays, in text order): runs of plain text between
+    parentheses, excluding ":<weight>" suffixes.
+      span_start / span_end, span_depth, span_group (innermost group or -1)
+    """
+    text: str
+    group_open: array
+    group_close: array
+    group_depth: array
+    group_weight: array
+    weight_start: array
+    weight_end: array
+    group_parent: array
+    span_start: array
+    span_end: array
+    span_depth: array
+    span_group: array
+
+    def __len__(self) -> int:
+        return len(self.span_start)
+
+    def spans(self):
+        """Yield (span_text, depth, explicit_weight_or_None) in text order."""
+        text = self.text
+        for i in range(len(self.span_start)):
+            g = self.span_group[i]
+            w = self.group_weight[g] if g >= 0 else math.nan
+            yield text[self.span_start[i]:self.span_end[i]], self.span_depth[i], (None if math.isnan(w) else w)
+
+    def effective_weights(self) -> array:
+        """Per-span attention weight: each enclosing group contributes its
+        explicit weight, or PAREN_MULTIPLIER if it has none."""
+        group_eff = array("d", [1.0]) * len(self.group_open)
+        for g in range(len(self.group_open)):
+            own = self.group_weight[g]
+            own = PAREN_MULTIPLIER if math.isnan(own) else own
+            parent = self.group_parent[g]
+            group_eff[g] = own * (group_eff[parent] if parent >= 0 else 1.0)
+        return array("d", (group_eff[g] if g >= 0 else 1.0 for g in self.span_group))
+
+
+def parse_attention(text: str) -> ParsedPrompt:
+    """Parse attention groups of a prompt. Unmatched ")" is literal text;
+    backslash-escaped parentheses are literal text; unclosed groups end at the
+    end of the prompt."""
+    group_open = array("l")
+    group_close = array("l")
+    group_depth = array("h")
+    group_weight = array("d")
+    weight_start = array("l")
+    weight_end = array("l")
+    group_parent = array("l")
+    span_start = array("l")
+    span_end = array("l")
+    span_depth = array("h")
+    span_group = array("l")
+
+    # Stack of open group indices; text_from is where the current plain run starts.
+    stack: list[int] = []
+    text_from = 0
+
+    def emit_span(end: int):
+        if end > text_from:
+            span_start.append(text_from)
+            span_end.append(end)
+            span_depth.append(len(stack))
+            span_group.append(stack[-1] if stack else -1)
+
+    def close_group(close: int):
+        nonlocal text_from
+        g = stack[-1]
+        m = _WEIGHT_RE.search(text, text_from, close)
+        if m:
+            emit_span(m.start())
+            group_weight[g] = float(m.group(1))
+            weight_start[g] = m.start(1)
+            weight_end[g] = m.end(1)
+        else:
+            emit_span(close)
+        group_close[g] = close
+        stack.pop()
+        text_from = close + 1
+
+    for m in _TOKEN_RE.finditer(text):
+        tok = m.group(0)
+        if tok == "(":
+            emit_span(m.start())
+            group_parent.append(stack[-1] if stack else -1)
+            stack.append(len(group_open))
+            group_open.append(m.start())
+            group_close.append(-1)
+            group_depth.append(len(stack))
+            group_weight.append(math.nan)
+            weight_start.append(-1)
+            weight_end.append(-1)
+            text_from = m.end()
+        elif tok == ")" and stack:
+            close_group(m.start())
+        # Escapes and unmatched ")" stay part of the current text run.
+
+    while stack:
+        close_group(len(text))
+    emit_span(len(text))
+
+    return ParsedPrompt(
+        text=text,
+        group_open=group_open,
+        group_close=group_close,
+        group_depth=group_depth,
+        group_weight=group_weight,
+        weight_start=weight_start,
+        weight_end=weight_end,
+        group_parent=group_parent,
+        span_start=span_start,
+        span_end=span_end,
+        span_depth=span_depth,
+        span_group=span_group,
+    )
+
+
+def _format_weight(value: float, original: str) -> str:
+    # Keep the original number of decimals (at least one), e.g. "1.5" -> "1.7",
+    # "1.200000" (C++ to_string) -> "1.320000".
+    decimals = len(original.partition(".")[2])
+    return f"{value:.{max(decimals, 1)}f}"
+
+
+class WeightBatch:
+    """Explicit weights of many prompts in one flat array.
+
+    Every prompt is parsed once. weights[offsets[i]:offsets[i + 1]] are the
+    explicit weights of prompt i, in group order.
+    """
+
+    def __init__(self, prompts):
+        self.parsed: list[ParsedPrompt] = []
+        self.offsets = array("l", [0])
+        self.original = array("d")
+        # Per weight: (prompt index, start, end) of its number text.
+        self._where: list[tuple[int, int, int]] = []
+
+        for i, text in enumerate(prompts):
+            parsed = parse_attention(text)
+            self.parsed.append(parsed)
+            for g in range(len(parsed.group_open)):
+                if parsed.weight_start[g] >= 0:
+                    self.original.append(parsed.group_weight[g])
+                    self._where.append((i, parsed.weight_start[g], parsed.weight_end[g]))
+            self.offsets.append(len(self.original))
+
+        self.weights = array("d", self.original)
+
+    def __len__(self) -> int:
+        return len(self.parsed)
+
+    def reset(self):
+        self.weights = array("d", self.original)
+
+    def rescale(self, factor: float):
+        w = self.weights
+        for k in range(len(w)):
+            w[k] *= factor
+
+    def jitter(self, amount: float, rng: random.Random):
+        w = self.weights
+        uniform = rng.uniform
+        for k in range(len(w)):
+            w[k] += uniform(-amount, amount)
+
+    def clamp(self, lo: float, hi: float):
+        w = self.weights
+        for k in range(len(w)):
+            v = w[k]
+            w[k] = lo if v < lo else hi if v > hi else v
+
+    def serialize(self, i: int) -> str:
+        """Return prompt i with its current weights; byte-exact if unchanged."""
+        text = self.parsed[i].text
+        out = []
+        pos = 0
+        for k in range(self.offsets[i], self.offsets[i + 1]):
+            _, start, end = self._where[k]
+            original = text[start:end]
+            new = _format_weight(self.weights[k], original)
+            if float(new) == self.original[k]:
+                continue
+            out.append(text[pos:start])
+            out.append(new)
+            pos = end
+        if not out:
+            return text
+        out.append(text[pos:])
+        return "".join(out)
+
+    def __iter__(self):
+        for i in range(len(self.parsed)):
+            yield self.serialize(i)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("input", help="Input prompt file")
+    p.add_argument("-o", "--output", help="Output file (omit for stdout)")
+    p.add_argument("--scale", type=float, help="Multiply explicit weights by this factor")
+    p.add_argument("--jitter", type=float, help="Add uniform noise in [-A, A] to explicit weights")
+    p.add_argument("--clamp", type=float, nargs=2, metavar=("LO", "HI"), help="Clamp explicit weights")
+    p.add_argument("--seed", type=int, help="Random seed for reproducible jitter")
+    p.add_argument("--null", action="store_true", help="Prompts are NUL-terminated")
+    args = p.parse_args()
+
+    inp = Path(args.input)
+    if not inp.exists():
+        print(f"Input file not found: {inp}")
+        raise SystemExit(2)
+
+    txt = inp.read_text(encoding="utf-8")
+    if args.null:
+        prompts = txt.split("\0")
+        if prompts and prompts[-1] == "":
+            prompts.pop()
+    else:
+        prompts = [txt]
+
+    batch = WeightBatch(prompts)
+    if args.scale is not None:
+        batch.rescale(args.scale)
+    if args.jitter is not None:
+        rng = random.Random(args.seed) if args.seed is not None else random.Random()
+        batch.jitter(args.jitter, rng)
+    if args.clamp is not None:
+        batch.clamp(*args.clamp)
+
+    sep = "\0" if args.null else ""
+    result = "".join(s + sep for s in batch)
+    if args.output:
+        Path(args.output).write_text(result, encoding="utf-8", newline="")
+    else:
+        sys.stdout.write(result)
+
+    print(f"--- {len(batch)} prompt(s), {len(batch.weights)} explicit weight(s) ---", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,18 +2,213 @@
 Rename video files starting with P to YYYYMMDD_HHMMSS.mp4
 using the video capture date/time from metadata.
 
-Requires ffprobe (part of ffmpeg) to be installed and in PATH.
+Directories are read with os.scandir as a stream (recursively with -r), and
+target names are planned in memory against the directory listing and the
+names already planned: clips from the same second become
+YYYYMMDD_HHMMSS_1.mp4, _2, ... instead of being skipped.
+
+MP4/MOV files are read natively: a few seeks find moov/mvhd and its creation
+time (seconds since 1904-01-01 UTC). ffprobe is only started for files that
+can't be parsed that way (other containers, damaged headers, a zero time).
+
+Metadata is probed on a thread pool (--jobs ffprobe processes at a time);
+results are still printed and renames still happen one by one, in sorted
+order.
+
+Probe results are cached in SQLite, keyed by absolute path, size and mtime, so
+re-runs over an unchanged tree (e.g. a dry run and then --execute) don't
+start ffprobe again. Renamed files keep their cache entries.
+
+ffprobe (part of ffmpeg) needs to be in PATH for the fallback.
 Download from: https://ffmpeg.org/download.html
+
+Usage:
+  python rename_videos.py [directory] [--execute] [--jobs N]
+  python rename_videos.py /media/card -r -p "*" -e .mp4 -e .mov
+
+Options:
+  -x, --execute    Actually rename (default: dry run)
+  -r, --recursive  Also process subdirectories
+  -p, --pattern G  File name glob to match, case-sensitive (repeatable; default: P*)
+  -e, --ext EXT    Extension to match, case-insensitive (repeatable; default: .mp4)
+  -j, --jobs N     Concurrent ffprobe processes (default: CPU count, max 8)
+  --cache PATH     Metadata cache (default: rename_videos_cache.sqlite3 next to this
+                   file, or RENAME_VIDEOS_CACHE)
+  --no-cache       Always probe
+  --report jsonl   Write one JSON event per file and periodic summaries to stdout
+                   (files/s, probe method ratios, ETA); other output goes to stderr
+  --report-interval S  Seconds between summaries (default: 5)
 """
 
+import argparse
+import fnmatch
+import os
+import sqlite3
+import struct
 import subprocess
 import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+
+
+DEFAULT_JOBS = min(8, os.cpu_count() or 1)
+
+# mvhd times count seconds from here.
+QUICKTIME_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+
+DEFAULT_PATTERNS = ('P*',)
+DEFAULT_EXTENSIONS = ('.mp4',)
+
+DEFAULT_CACHE = os.environ.get("RENAME_VIDEOS_CACHE") or str(Path(__file__).with_name("rename_videos_cache.sqlite3"))
+
+
+@dataclass
+class Probe:
+    creation_time: datetime | None
+    warning: str | None
+    # 'native', 'ffprobe' or 'cache'; 'failed' results (e.g. ffprobe missing) aren't cached
+    method: str
+    # Time spent getting the result (parse, subprocess or cache lookup)
+    seconds: float = 0.0
+
+
+class MetadataCache:
+    """On-disk map of (absolute path, size, mtime_ns) to the creation time
+    found in the file, or to "no metadata" (NULL). Only used from the thread
+    that runs the rename loop."""
+
+    # Pending writes are committed in batches of this size.
+    COMMIT_EVERY = 256
+
+    def __init__(self, path: str = DEFAULT_CACHE):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS probes ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, creation_time TEXT)"
+        )
+        self._pending = 0
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def lookup(self, video_path: Path, st: os.stat_result) -> Probe | None:
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, creation_time FROM probes WHERE path = ?", (str(video_path.absolute()),)
+        ).fetchone()
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns:
+            return None
+        return Probe(None if row[2] is None else datetime.fromisoformat(row[2]), None, 'cache')
+
+    def store(self, video_path: Path, st: os.stat_result, creation_time: datetime | None):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?)",
+            (
+                str(video_path.absolute()),
+                st.st_size,
+                st.st_mtime_ns,
+                None if creation_time is None else creation_time.isoformat(),
+            ),
+        )
+        self._wrote()
+
+    def rename(self, old: Path, new: Path):
+        """Move an entry to the file's new name (a rename keeps size and mtime)."""
+        self._conn.execute(
+            "UPDATE OR REPLACE probes SET path = ? WHERE path = ?", (str(new.absolute()), str(old.absolute()))
+        )
+        self._wrote()
+
+    def _wrote(self):
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self._conn.commit()
+            self._pending = 0
+
+
+def _iter_boxes(f, start: int, end: int):
+    # (type, payload start, box end) of the ISO BMFF boxes in [start, end).
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(16)
+        size, kind = struct.unpack('>I4s', header[:8])
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', header[8:16])[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_size:
+            raise ValueError(f"bad size {size} for box {kind!r} at {pos}")
+        yield kind, pos + header_size, min(pos + size, end)
+        pos += size
+
+
+def read_mvhd_creation_time(video_path: Path) -> datetime | None:
+    """Creation time from the movie header (moov/mvhd) of an MP4/MOV file, in
+    UTC, or None if it is zero. Raises ValueError (or struct.error) if the
+    file doesn't have one."""
+    with open(video_path, 'rb') as f:
+        end = os.fstat(f.fileno()).st_size
+        for kind, body, box_end in _iter_boxes(f, 0, end):
+            if kind != b'moov':
+                continue
+            for kind, body, box_end in _iter_boxes(f, body, box_end):
+                if kind != b'mvhd':
+                    continue
+                f.seek(body)
+                data = f.read(12)
+                version = data[0]
+                if version == 0:
+                    seconds = struct.unpack('>I', data[4:8])[0]
+                elif version == 1:
+                    seconds = struct.unpack('>Q', data[4:12])[0]
+                else:
+                    raise ValueError(f"unknown mvhd version {version}")
+                return QUICKTIME_EPOCH + timedelta(seconds=seconds) if seconds else None
+            raise ValueError("moov has no mvhd")
+    raise ValueError("no moov box")
 
 
 def get_video_creation_time(video_path: Path) -> datetime | None:
-    """Extract creation time from video metadata using ffprobe."""
+    """Extract creation time from video metadata (native MP4/MOV parse, else ffprobe)."""
+    probe = probe_creation_time(video_path)
+    if probe.warning:
+        print(probe.warning)
+    return probe.creation_time
+
+
+def probe_creation_time(video_path: Path) -> Probe:
+    """Like get_video_creation_time(), but returns the warning instead of
+    printing it, so probes can run on worker threads."""
+    start = time.perf_counter()
+    try:
+        creation_time = read_mvhd_creation_time(video_path)
+        if creation_time is not None:
+            return Probe(creation_time, None, 'native', time.perf_counter() - start)
+    except (ValueError, struct.error, IndexError, OverflowError, OSError):
+        pass
+    probe = ffprobe_creation_time(video_path)
+    probe.seconds = time.perf_counter() - start
+    return probe
+
+
+def ffprobe_creation_time(video_path: Path) -> Probe:
+    """Creation time from the format tags reported by ffprobe."""
     try:
         # Use ffprobe to get metadata in JSON format
         result = subprocess.run(
@@ -39,12 +234,117 @@ def get_video_creation_time(video_path: Path) -> datetime | None:
             # Remove microseconds and Z for easier parsing
             creation_time_str = creation_time_str.replace('Z', '+00:00')
             dt = datetime.fromisoformat(creation_time_str)
-            return dt
+            return Probe(dt, None, 'ffprobe')
         
     except (subprocess.CalledProcessError, json.JSONDecodeError, ValueError, KeyError) as e:
-        print(f"  Warning: Could not read metadata from {video_path.name}: {e}")
+        # The file itself is the problem; probing it again won't help
+        return Probe(None, f"  Warning: Could not read metadata from {video_path.name}: {e}", 'ffprobe')
+    except OSError as e:
+        return Probe(None, f"  Warning: Could not run ffprobe on {video_path.name}: {e}", 'failed')
     
-    return None
+    return Probe(None, None, 'ffprobe')
+
+
+def probe_in_order(video_files, jobs: int = DEFAULT_JOBS, cache: MetadataCache | None = None):
+    """Yield (video_file, Probe) in the order given, probing up to `jobs`
+    files at a time. At most 2 * jobs files are queued ahead of the consumer,
+    so memory stays flat on huge directories. Cache hits never reach the pool;
+    new results are written to the cache."""
+    def finish(f, st, probe):
+        if cache is not None and probe.method in ('native', 'ffprobe'):
+            cache.store(f, st, probe.creation_time)
+        return f, probe
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        pending = deque()
+        for f in video_files:
+            try:
+                st = f.stat()
+            except OSError as e:
+                pending.append((f, None, Probe(None, f"  Warning: Could not stat {f.name}: {e}", 'failed')))
+                continue
+            start = time.perf_counter()
+            hit = cache.lookup(f, st) if cache is not None else None
+            if hit is not None:
+                hit.seconds = time.perf_counter() - start
+            pending.append((f, st, hit if hit is not None else pool.submit(probe_creation_time, f)))
+            if len(pending) >= 2 * jobs:
+                f0, st0, item = pending.popleft()
+                yield finish(f0, st0, item if isinstance(item, Probe) else item.result())
+        while pending:
+            f0, st0, item = pending.popleft()
+            yield finish(f0, st0, item if isinstance(item, Probe) else item.result())
+
+
+class JsonlReport:
+    """
+    Machine-readable progress: one JSON object per line.
+    
+    {"event": "file", ...} for every file (probe method and latency, planned
+    name, outcome) and {"event": "summary", ...} every `interval` seconds and
+    at the end (files/s, share of each probe method, ETA when the total is
+    known).
+    """
+    
+    def __init__(self, out, total: int | None = None, interval: float = 5.0):
+        self.out = out
+        self.total = total
+        self.interval = interval
+        self.files = 0
+        self.methods = {'native': 0, 'ffprobe': 0, 'cache': 0, 'failed': 0}
+        self.outcomes: dict[str, int] = {}
+        self.mtime_fallbacks = 0
+        self.probe_seconds = 0.0
+        self._start = time.perf_counter()
+        self._last_summary = self._start
+    
+    def _emit(self, event: dict):
+        self.out.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self.out.flush()
+    
+    def file(self, path: Path, probe: Probe, time_source: str, name: str | None, outcome: str,
+             error: str | None = None):
+        self.files += 1
+        self.methods[probe.method] = self.methods.get(probe.method, 0) + 1
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.mtime_fallbacks += time_source == 'mtime'
+        self.probe_seconds += probe.seconds
+        event = {
+            "event": "file",
+            "path": str(path),
+            "probe": probe.method,
+            "probe_ms": round(probe.seconds * 1000, 3),
+            "time_source": time_source,
+            "name": name,
+            "outcome": outcome,
+        }
+        if error is not None:
+            event["error"] = error
+        self._emit(event)
+        now = time.perf_counter()
+        if now - self._last_summary >= self.interval:
+            self._last_summary = now
+            self.summary()
+    
+    def summary(self, final: bool = False):
+        elapsed = time.perf_counter() - self._start
+        rate = self.files / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.total is not None and rate > 0:
+            eta = round(max(self.total - self.files, 0) / rate, 1)
+        self._emit({
+            "event": "summary",
+            "final": final,
+            "files": self.files,
+            "total": self.total,
+            "elapsed_s": round(elapsed, 3),
+            "files_per_s": round(rate, 1),
+            "eta_s": eta,
+            "probe_ratio": {m: round(n / self.files, 4) if self.files else 0.0 for m, n in self.methods.items()},
+            "mean_probe_ms": round(self.probe_seconds / self.files * 1000, 3) if self.files else None,
+            "mtime_fallbacks": self.mtime_fallbacks,
+            "outcomes": self.outcomes,
+        })
 
 
 def get_file_modified_time(video_path: Path) -> datetime:
@@ -53,100 +353,256 @@ def get_file_modified_time(video_path: Path) -> datetime:
     return datetime.fromtimestamp(timestamp)
 
 
-def rename_video_files(directory: Path = None, dry_run: bool = True):
+def matches(name: str, patterns=DEFAULT_PATTERNS, extensions=DEFAULT_EXTENSIONS) -> bool:
+    """Whether a file name matches one of the (case-sensitive) glob patterns
+    and has one of the extensions (case-insensitive)."""
+    return (
+        os.path.splitext(name)[1].lower() in extensions
+        and any(fnmatch.fnmatchcase(name, pat) for pat in patterns)
+    )
+
+
+def scan_videos(directory: Path, patterns=DEFAULT_PATTERNS, extensions=DEFAULT_EXTENSIONS,
+                recursive: bool = False, listings: dict | None = None):
     """
-    Rename video files starting with P to YYYYMMDD_HHMMSS.mp4.
+    Yield matching video files, directory by directory (sorted by name, files
+    before subdirectories), without listing the whole tree first.
+    
+    For each directory with at least one match, all names in it are put in
+    `listings` before its first file is yielded, so a RenamePlanner can avoid
+    collisions without checking the disk.
+    """
+    extensions = {e.lower() if e.startswith('.') else '.' + e.lower() for e in extensions}
+    stack = [str(directory)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            print(f"  Warning: Could not list {current}: {e}")
+            continue
+        subdirs = []
+        found = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        subdirs.append(entry.path)
+                elif entry.is_file() and matches(entry.name, patterns, extensions):
+                    found.append(Path(entry.path))
+            except OSError:
+                continue
+        if found and listings is not None:
+            listings[current] = {entry.name for entry in entries}
+        yield from found
+        stack.extend(reversed(subdirs))
+
+
+class RenamePlanner:
+    """
+    Picks target names that don't collide with existing files or with names
+    already planned in this run, adding _1, _2, ... before the extension.
+    
+    Works from the directory listings collected by scan_videos(), so no
+    candidate name is ever stat'ed. Names are compared case-insensitively,
+    which is what FAT/exFAT cards, Windows and macOS do.
+    """
+    
+    def __init__(self, listings: dict):
+        self._listings = listings
+        self._dir = None
+        self._taken: set[str] = set()
+    
+    def plan(self, video_file: Path, stem: str) -> str:
+        """Target name for video_file, given the stem it should get. Returns the
+        current name if the file already has it (or a suffixed variant of it)."""
+        directory = str(video_file.parent)
+        if directory != self._dir:
+            # Files arrive directory by directory; only the current one is kept.
+            self._taken = {n.casefold() for n in self._listings.pop(directory, ())}
+            self._dir = directory
+        ext = video_file.suffix.lower()
+        own = video_file.name.casefold()
+        n = 0
+        while True:
+            name = f"{stem}{ext}" if n == 0 else f"{stem}_{n}{ext}"
+            key = name.casefold()
+            if key == own or key not in self._taken:
+                break
+            n += 1
+        self._taken.add(key)
+        return name
+    
+    def vacate(self, video_file: Path):
+        """The file was (or, in a dry run, would be) renamed; its old name is free."""
+        if str(video_file.parent) == self._dir:
+            self._taken.discard(video_file.name.casefold())
+
+
+def rename_video_files(
+    directory: Path = None,
+    dry_run: bool = True,
+    jobs: int = DEFAULT_JOBS,
+    cache: MetadataCache | None = None,
+    patterns=DEFAULT_PATTERNS,
+    extensions=DEFAULT_EXTENSIONS,
+    recursive: bool = False,
+    report: JsonlReport | None = None,
+):
+    """
+    Rename matching video files (by default P*.mp4) to YYYYMMDD_HHMMSS.<ext>.
     
     Args:
         directory: Directory to search for videos (default: current directory)
         dry_run: If True, only print what would be renamed without actually renaming
+        jobs: Number of files probed concurrently
+        cache: Metadata cache to consult and update (None: always probe)
+        patterns: File name glob patterns to match
+        extensions: File extensions to match
+        recursive: Also process subdirectories
+        report: Where to send per-file events and summaries; with a report, the
+            tree is scanned up front so the total (and an ETA) is known
     """
     if directory is None:
         directory = Path.cwd()
     else:
         directory = Path(directory)
     
-    # Find all .mp4 files starting with P
-    video_files = [f for f in directory.iterdir() if f.is_file() and f.name.startswith('P') and f.suffix.lower() == '.mp4']
-    
-    if not video_files:
-        print(f"No .mp4 files starting with P found in {directory}")
-        return
-    
-    print(f"Found {len(video_files)} video file(s) to process")
     print(f"Mode: {'DRY RUN (no changes will be made)' if dry_run else 'LIVE (files will be renamed)'}")
     print()
     
+    listings: dict[str, set[str]] = {}
+    planner = RenamePlanner(listings)
+    video_files = scan_videos(directory, patterns, extensions, recursive, listings)
+    if report is not None:
+        video_files = list(video_files)
+        report.total = len(video_files)
+    
+    file_count = 0
     renamed_count = 0
+    unchanged_count = 0
     error_count = 0
     
-    for video_file in sorted(video_files):
+    for video_file, probe in probe_in_order(video_files, jobs, cache):
+        file_count += 1
+        shown = video_file.relative_to(directory)
+        time_source = 'metadata'
+        new_name = None
         try:
-            # Try to get creation time from metadata
-            creation_time = get_video_creation_time(video_file)
+            # Metadata was probed ahead on the pool; warnings print here, in order
+            if probe.warning:
+                print(probe.warning)
+            creation_time = probe.creation_time
             
             if creation_time is None:
                 # Fallback to file modification time
-                print(f"  {video_file.name}: Using file modification time as fallback")
+                print(f"  {shown}: Using file modification time as fallback")
                 creation_time = get_file_modified_time(video_file)
+                time_source = 'mtime'
             
-            # Format: YYYYMMDD_HHMMSS.mp4
-            new_name = creation_time.strftime("%Y%m%d_%H%M%S.mp4")
+            # Format: YYYYMMDD_HHMMSS.mp4, with _1, _2, ... for clips from the same second
+            stem = creation_time.strftime("%Y%m%d_%H%M%S")
+            new_name = planner.plan(video_file, stem)
             new_path = video_file.parent / new_name
             
-            # Check if target file already exists
-            if new_path.exists() and new_path != video_file:
-                print(f"  {video_file.name} -> {new_name} [SKIPPED: target exists]")
-                error_count += 1
+            if new_name == video_file.name:
+                print(f"  {shown} [already named]")
+                unchanged_count += 1
+                if report is not None:
+                    report.file(video_file, probe, time_source, new_name, 'already_named')
                 continue
             
             if dry_run:
-                print(f"  {video_file.name} -> {new_name} [would rename]")
+                print(f"  {shown} -> {new_name} [would rename]")
             else:
+                # The plan comes from the listing taken before probing, and
+                # rename() silently replaces files on POSIX; check once more.
+                while new_path.exists() and not new_path.samefile(video_file):
+                    new_name = planner.plan(video_file, stem)
+                    new_path = video_file.parent / new_name
                 video_file.rename(new_path)
-                print(f"  {video_file.name} -> {new_name} [renamed]")
+                if cache is not None:
+                    cache.rename(video_file, new_path)
+                print(f"  {shown} -> {new_name} [renamed]")
                 renamed_count += 1
+            planner.vacate(video_file)
+            if report is not None:
+                report.file(video_file, probe, time_source, new_name, 'would_rename' if dry_run else 'renamed')
                 
         except Exception as e:
-            print(f"  {video_file.name}: ERROR - {e}")
+            print(f"  {shown}: ERROR - {e}")
             error_count += 1
+            if report is not None:
+                report.file(video_file, probe, time_source, new_name, 'error', str(e))
+    
+    if report is not None:
+        report.summary(final=True)
+    
+    if not file_count:
+        print(f"No files matching {', '.join(patterns)} ({', '.join(extensions)}) found in {directory}")
+        return
     
     print()
     if dry_run:
-        print(f"DRY RUN complete. {len(video_files)} file(s) would be processed.")
+        print(f"DRY RUN complete. {file_count} file(s) would be processed.")
     else:
-        print(f"Renamed {renamed_count} file(s). {error_count} error(s).")
+        print(f"Renamed {renamed_count} file(s). {unchanged_count} already named. {error_count} error(s).")
 
 
 if __name__ == "__main__":
     import sys
     
     # Parse command line arguments
-    dry_run = True
-    directory = None
-    
-    if len(sys.argv) > 1:
-        if "--execute" in sys.argv or "-x" in sys.argv:
-            dry_run = False
-            print("WARNING: Files will be actually renamed!")
-            response = input("Continue? (yes/no): ")
-            if response.lower() not in ('yes', 'y'):
-                print("Cancelled.")
-                sys.exit(0)
-        
-        # Get directory from command line if provided
-        for arg in sys.argv[1:]:
-            if arg not in ("--execute", "-x") and Path(arg).is_dir():
-                directory = Path(arg)
-                break
+    parser = argparse.ArgumentParser(description="Rename P*.mp4 videos to their capture date/time")
+    parser.add_argument("directory", nargs="?", help="Directory to process (default: current directory)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Also process subdirectories")
+    parser.add_argument("-p", "--pattern", action="append", help="File name glob to match (repeatable; default: P*)")
+    parser.add_argument("-e", "--ext", action="append", help="Extension to match (repeatable; default: .mp4)")
+    parser.add_argument("-x", "--execute", action="store_true", help="Actually rename files (default: dry run)")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS, help="Concurrent ffprobe processes")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="Metadata cache path")
+    parser.add_argument("--no-cache", action="store_true", help="Always probe")
+    parser.add_argument("--report", choices=("jsonl",), help="Write machine-readable events to stdout")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="Seconds between summary events")
+    args = parser.parse_args()
     
-    if directory is None:
-        directory = Path.cwd()
+    report = None
+    if args.report:
+        # stdout carries the JSON lines; the usual messages go to stderr
+        report = JsonlReport(sys.stdout, interval=args.report_interval)
+        sys.stdout = sys.stderr
+    
+    dry_run = not args.execute
+    if args.execute:
+        print("WARNING: Files will be actually renamed!")
+        response = input("Continue? (yes/no): ")
+        if response.lower() not in ('yes', 'y'):
+            print("Cancelled.")
+            sys.exit(0)
+    
+    directory = Path(args.directory) if args.directory else Path.cwd()
+    if not directory.is_dir():
+        parser.error(f"not a directory: {directory}")
     
     print(f"Processing directory: {directory}")
     print()
     
-    rename_video_files(directory, dry_run=dry_run)
+    cache = None if args.no_cache else MetadataCache(args.cache)
+    try:
+        rename_video_files(
+            directory,
+            dry_run=dry_run,
+            jobs=max(1, args.jobs),
+            cache=cache,
+            patterns=tuple(args.pattern or DEFAULT_PATTERNS),
+            extensions=tuple(args.ext or DEFAULT_EXTENSIONS),
+            recursive=args.recursive,
+            report=report,
+        )
+    finally:
+        if cache is not None:
+            cache.close()
     
     if dry_run:
         print()
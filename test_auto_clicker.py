@@ -0,0 +1,139 @@
+import threading
+import time
+import types
+
+import pytest
+
+import auto_clicker as ac
+
+
+def _wait_for(cond, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while not cond() and time.perf_counter() < deadline:
+        time.sleep(0.001)
+    return cond()
+
+
+def test_compile_macro_timeline():
+    m = ac.compile_macro('move 1 2\nrepeat 2\n  click right 2\n  wait 5ms\nend\nwait 0.5s\n', 'm')
+    assert [op for op, _ in m.ops] == ['move', 'click', 'click']
+    assert list(m.offsets) == pytest.approx([0.0, 0.0, 0.005])
+    assert m.duration == pytest.approx(0.51)
+
+
+@pytest.mark.parametrize('src', [
+    'clik', 'repeat 2\nclick', 'end', 'wait -1', 'wait inf', 'wait nan', 'wait 1e400ms', 'click left 0',
+])
+def test_compile_macro_rejects_bad_input(src):
+    with pytest.raises(ValueError):
+        ac.compile_macro(src, 'bad')
+
+
+def test_compile_macro_caps_expansion():
+    with pytest.raises(ValueError, match='expands to'):
+        ac.compile_macro('repeat 100000\nrepeat 100\nclick\nend\nend', 'big')
+    # Wait-only repeats are folded arithmetically, not walked
+    m = ac.compile_macro('repeat 1000000000\nwait 1\nend\nclick', 'waits')
+    assert len(m) == 1 and m.duration == pytest.approx(1e6)
+
+
+def test_stopped_macro_releases_held_buttons():
+    done = []
+    player = ac.MacroPlayer(spin=0, on_done=lambda *a: done.append(a))
+    m = ac.compile_macro('press left\nwait 1000\nrelease left', 'hold').bind(ac.RecordingBackend())
+    player.play(m)
+    assert _wait_for(lambda: m.backend.events)
+    player.stop()
+    assert _wait_for(lambda: done)
+    player.close()
+    assert [e[1:] for e in m.backend.events] == [('press', ('left',)), ('release', ('left',))]
+
+
+def test_replaying_quickly_plays_latest_macro_to_the_end():
+    done = []
+    player = ac.MacroPlayer(spin=0, on_done=lambda *a: done.append(a))
+    m = ac.compile_macro('repeat 5\nclick\nwait 1\nend', 'm').bind(ac.RecordingBackend())
+    for _ in range(100):
+        player.stop()
+        player.play(m)
+    assert _wait_for(lambda: done and done[-1][1] == 5)
+    player.close()
+
+
+@pytest.mark.parametrize('capacity', [1500.0, 5000.0, 70000.0])
+def test_find_max_cps_bisects_between_held_and_missed(monkeypatch, capacity):
+    targets = []
+
+    def fake_run(cps, seconds, spin):
+        targets.append(cps)
+        return None, types.SimpleNamespace(rate=min(cps, capacity)), 0.0
+
+    monkeypatch.setattr(ac, '_run_for', fake_run)
+    best, held, missed = ac.find_max_cps(spin=0.0)
+    assert held <= capacity < missed <= held * 1.05
+    assert best == held
+    assert len(targets) < 20
+
+
+def test_find_max_cps_brackets_edges(monkeypatch):
+    monkeypatch.setattr(ac, '_run_for', lambda cps, s, spin: (None, types.SimpleNamespace(rate=cps / 2), 0.0))
+    assert ac.find_max_cps(spin=0.0) == (None, None, 1000.0)
+    monkeypatch.setattr(ac, '_run_for', lambda cps, s, spin: (None, types.SimpleNamespace(rate=cps), 0.0))
+    assert ac.find_max_cps(spin=0.0, limit=8000.0) == (8000.0, 8000.0, None)
+
+
+def test_click_stats():
+    stats = ac.ClickStats(cps=100)
+    for i, t in enumerate([0.0, 0.01, 0.02, 0.03, 0.05]):
+        stats.record(t, late=0.001 * i)
+    assert stats.clicks == 5 and stats.rate == pytest.approx(4 / 0.05)
+    assert stats.jitter == pytest.approx(0.004330127, rel=1e-6)
+    assert stats.max_late == pytest.approx(0.004)
+
+
+def test_wait_until_is_cancellable():
+    cancel = threading.Event()
+    deadline = time.perf_counter() + 0.02
+    assert ac.wait_until(deadline, 0.002, cancel) and time.perf_counter() >= deadline
+    threading.Timer(0.01, cancel.set).start()
+    start = time.perf_counter()
+    assert not ac.wait_until(start + 5.0, 0.002, cancel)
+    assert time.perf_counter() - start < 1.0
+
+
+def _period(click, cps, seconds):
+    done = []
+    sched = ac.ClickScheduler(click, cps=cps, spin=0.0005, on_period_end=done.append)
+    sched.start()
+    sched.set_active(True)
+    time.sleep(seconds)
+    sched.set_active(False)
+    assert _wait_for(lambda: done)
+    sched.stop()
+    assert len(done) == 1
+    return done[0]
+
+
+def test_scheduler_compensates_for_click_cost():
+    # Each click costs a fifth of the period; sleeping a full period after
+    # every click would lose ~17% of the clicks.
+    stats = _period(lambda: time.sleep(0.001), cps=200, seconds=0.5)
+    assert 94 <= stats.clicks <= 102
+    assert stats.rate == pytest.approx(200, rel=0.03)
+    assert stats.resyncs == 0
+
+
+def test_scheduler_resyncs_after_a_stall():
+    times = []
+
+    def click():
+        times.append(time.perf_counter())
+        if len(times) == 5:
+            time.sleep(0.1)
+
+    stats = _period(click, cps=100, seconds=0.3)
+    assert stats.resyncs >= 1
+    # The ten missed clicks are dropped, not fired back to back: the click
+    # after the stalled one starts a fresh schedule a period later.
+    assert len(times) > 6 and times[6] - times[5] > 0.005
+    assert stats.clicks <= 24
@@ -0,0 +1,58 @@
+import mmap
+import queue
+import threading
+from array import array
+
+import color_gui
+
+
+def _index(data, chunk_size):
+    results = queue.Queue()
+    color_gui.index_lines(data, threading.Event(), results, chunk_size=chunk_size)
+    starts, scanned = array('Q', [0]), []
+    while (item := results.get_nowait()) is not None:
+        starts.extend(item[0])
+        scanned.append(item[1])
+    return list(starts), scanned
+
+
+def test_index_lines_across_chunks(tmp_path):
+    path = tmp_path / 'in.txt'
+    path.write_bytes(b'red\n\ngreen hair\nblue')
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for chunk_size in (1, 3, 4, 1 << 20):
+            starts, scanned = _index(mm, chunk_size)
+            assert starts == [0, 4, 5, 16]
+            assert scanned[-1] == len(mm)
+
+
+def test_index_lines_stops_when_cancelled():
+    results = queue.Queue()
+    cancel = threading.Event()
+    cancel.set()
+    color_gui.index_lines(b'a\nb\n', cancel, results, chunk_size=1)
+    assert results.empty()
+
+
+def _apply(old, new):
+    k, m = color_gui.diff_paragraphs(old, new)
+    assert old[:k] == new[:k] and old[len(old) - m:] == new[len(new) - m:]
+    return k, m, old[:k] + new[k:len(new) - m] + old[len(old) - m:]
+
+
+def test_diff_paragraphs_keeps_untouched_ends():
+    old = ['a\n\n', 'b\n\n', 'c\n\n', 'd']
+    assert _apply(old, old) == (4, 0, old)
+    assert _apply(old, ['a\n\n', 'B\n\n', 'c\n\n', 'd'])[:2] == (1, 2)
+    assert _apply(old, ['a\n\n', 'c\n\n', 'd'])[:2] == (1, 2)
+    assert _apply(old, ['a\n\n', 'b\n\n', 'x\n\n', 'y\n\n', 'c\n\n', 'd'])[:2] == (2, 2)
+    assert _apply(old, [])[:2] == (0, 0)
+    assert _apply([], old)[:2] == (0, 0)
+
+
+def test_diff_paragraphs_repeated_paragraphs_do_not_overlap():
+    # Prefix and suffix may not claim the same paragraph twice.
+    for old, new in [(['x', 'x'], ['x', 'x', 'x']), (['x', 'x', 'x'], ['x']), (['p', 'x'], ['x', 'x'])]:
+        k, m, rebuilt = _apply(old, new)
+        assert k + m <= min(len(old), len(new))
+        assert rebuilt == new
@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+import pytest
+
+import convert_server
+
+
+def _exchange(payload, limit):
+    async def run():
+        server = await asyncio.start_server(convert_server._serve_connection, '127.0.0.1', 0, limit=limit)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(payload)
+            writer.write_eof()
+            lines = [json.loads(line) async for line in reader]
+            writer.close()
+            return lines
+    return asyncio.run(run())
+
+
+def test_overlong_line_gets_error_and_connection_survives():
+    long_req = json.dumps({'id': 1, 'op': 'colors', 'text': 'red ' * 200}).encode()
+    replies = _exchange(long_req + b'\n' + b'{"id": 2, "op": "ping"}\n', limit=256)
+    assert 'longer than' in replies[0]['error']
+    assert replies[1] == {'id': 2, 'pong': True}
+
+
+def test_seeded_requests_are_reproducible():
+    req = b'{"id": 1, "op": "appearance", "text": "white lace pajamas, blonde hair", "seed": 3}\n'
+    first, second = _exchange(req + req, limit=1 << 16)
+    assert first == second and first['id'] == 1 and 'counts' in first
+
+
+def test_failed_pipelined_request_keeps_its_id():
+    replies = _exchange(
+        b'{"id": 1, "op": "ping"}\n'
+        b'{"id": 2, "op": "colors", "text": "red dress", "seed": [1]}\n'
+        b'not json\n'
+        b'{"id": 3, "op": "ping"}\n',
+        limit=1 << 16,
+    )
+    assert [r['id'] for r in replies] == [1, 2, None, 3]
+    assert 'error' in replies[1] and 'error' in replies[2]
+
+
+@pytest.mark.parametrize('host, ok', [
+    ('127.0.0.1', True), ('localhost', True), ('[::1]', True), ('127.0.0.2', True),
+    ('0.0.0.0', False), ('192.168.1.5', False), ('example.com', False),
+])
+def test_is_loopback(host, ok):
+    assert convert_server.is_loopback(host) is ok
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+import gui
+
+
+def _drain(executor, count, timeout=2.0):
+    done = []
+    deadline = time.monotonic() + timeout
+    while len(done) < count and time.monotonic() < deadline:
+        done += executor.poll()
+        time.sleep(0.005)
+    return done
+
+
+def test_submit_does_not_coalesce_into_running_job():
+    executor = gui.GuiExecutor().start()
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(2)
+        return 'slow'
+
+    first = executor.submit('generate', None, slow)
+    assert started.wait(2)
+    second = executor.submit('generate', None, lambda: 'queued')
+    third = executor.submit('generate', None, lambda: 'ignored')
+    assert second is not first
+    assert third is second and second.coalesced == 1
+    release.set()
+    assert [j.result for j in _drain(executor, 2)] == ['slow', 'queued']
+    executor.shutdown()
+
+
+def test_cancelled_running_job_skips_commit():
+    executor = gui.GuiExecutor().start()
+    started, release = threading.Event(), threading.Event()
+    committed = []
+
+    def slow():
+        started.set()
+        release.wait(2)
+        return 'late'
+
+    job = executor.submit('camera', 'x', slow, on_commit=committed.append)
+    assert started.wait(2)
+    assert executor.cancel() == [job]
+    release.set()
+    assert _drain(executor, 1) == [job]
+    assert job.cancelled and committed == []
+    executor.shutdown()
+
+
+def test_committed_job_is_not_cancelled():
+    executor = gui.GuiExecutor().start()
+    committing, release = threading.Event(), threading.Event()
+
+    def commit(job):
+        committing.set()
+        release.wait(2)
+
+    job = executor.submit('clothes', 'x', lambda: 'ok', on_commit=commit)
+    assert committing.wait(2)
+    assert executor.cancel() == []
+    release.set()
+    assert _drain(executor, 1) == [job]
+    assert not job.cancelled and job.committed and job.result == 'ok'
+    executor.shutdown()
+
+
+def test_prefetcher_reports_errors_and_backs_off():
+    calls = []
+    ok = threading.Event()
+
+    def producer(seed):
+        calls.append(time.monotonic())
+        return f'prompt {seed}' if ok.is_set() else 'Error: ai not found.\n'
+
+    prefetcher = gui.PromptPrefetcher(depth=2, producer=producer, idle_interval=0.01).start()
+    time.sleep(0.3)
+    assert prefetcher.error == 'Error: ai not found.'
+    gaps = [b - a for a, b in zip(calls, calls[1:])]
+    # 0.01, 0.02, 0.04, 0.08, ... rather than one retry per idle interval.
+    assert 3 <= len(calls) <= 7 and gaps[-1] > 2 * gaps[0]
+    assert prefetcher.get_nowait() is None
+
+    ok.set()
+    seed, output = prefetcher.pop()
+    assert output == f'prompt {seed}'
+    assert prefetcher.error is None
+    prefetcher.stop()
+
+
+def test_prefetcher_pop_raises_on_error():
+    prefetcher = gui.PromptPrefetcher(depth=0, producer=lambda seed: 'Error: broken\n')
+    with pytest.raises(RuntimeError, match='^Error: broken$'):
+        prefetcher.pop()
@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+import near_dupes
+
+BASE = (
+    'masterpiece, best quality, one adult woman is sitting on a wooden chair by the window, '
+    'she is wearing a white lace blouse and a black pleated skirt, blonde hair up in a high ponytail, '
+    'soft focus, warm_light, night scene, depth of field'
+)
+VARIANT = BASE.replace('white lace', 'red silk')
+OTHER = (
+    'one sleeping adult woman is lying on a hammock on stomach asleep, '
+    'head resting on a pillow, dark_green mouth_mask, high contrast, moody tone'
+)
+
+
+def test_color_swap_is_near_duplicate():
+    index = near_dupes.NearDupIndex(threshold=0.7)
+    assert index.check(BASE, key='base') is None
+    assert index.check(OTHER, key='other') is None
+    key, sim = index.check(VARIANT)
+    assert key == 'base' and 0.7 <= sim < 1.0
+    assert index.check(BASE) == ('base', 1.0)
+    assert (index.seen, index.duplicates, len(index)) == (4, 2, 2)
+
+
+def test_capacity_forgets_oldest():
+    index = near_dupes.NearDupIndex(capacity=3)
+    index.check(BASE, key='base')
+    for i in range(3):
+        assert index.check(' '.join(f'word{i}x{j}' for j in range(20)), key=i) is None
+    assert len(index) == 3
+    assert index.check(BASE) is None
+    assert all(seqs for bucket in index._buckets for seqs in bucket.values())
+
+
+def test_filter_drops_near_duplicates():
+    kept = [text for text, _ in near_dupes.filter_near_duplicates([BASE, VARIANT, OTHER, BASE], near_dupes.NearDupIndex(threshold=0.7))]
+    assert kept == [BASE, OTHER]
+
+
+@pytest.mark.parametrize('threshold', [0.5, 0.8, 0.9])
+def test_lsh_params_cover_signature(threshold):
+    bands, rows = near_dupes.lsh_params(threshold, 64)
+    assert bands * rows == 64
+    assert (1 / bands) ** (1 / rows) <= threshold + 0.1
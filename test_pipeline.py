@@ -0,0 +1,35 @@
+import io
+
+import pytest
+
+import pipeline
+
+
+def _failing_clothes(stage, text, rng):
+    if stage == 'clothes' and text.endswith('7'):
+        raise KeyError('boom')
+    return text
+
+
+@pytest.mark.parametrize('use_threads', [True, False])
+def test_stage_failure_stops_pipeline(monkeypatch, use_threads):
+    monkeypatch.setattr(pipeline, '_convert', _failing_clothes)
+    prompts = (f'prompt {i}' for i in range(100_000))
+    with pytest.raises(pipeline.PipelineError, match='clothes worker failed'):
+        pipeline.run_pipeline(
+            ['appearance', 'clothes', 'camera'], io.StringIO(), seed=1, prompts=prompts,
+            use_threads=use_threads, queue_size=2, batch_size=4, report=None,
+        )
+
+
+def test_stages_are_seeded_per_record(monkeypatch):
+    monkeypatch.setattr(pipeline, '_convert', lambda stage, text, rng: f'{text} {rng.random():.6f}')
+    runs = []
+    for workers in (1, 3):
+        out = io.StringIO()
+        pipeline.run_pipeline(
+            ['appearance', 'camera'], out, seed=5, prompts=[f'p{i}' for i in range(50)],
+            default_workers=workers, use_threads=True, report=None,
+        )
+        runs.append(sorted(out.getvalue().splitlines()))
+    assert runs[0] == runs[1]
@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+import prompt_history
+
+
+@pytest.fixture
+def history(tmp_path):
+    with prompt_history.PromptHistory(str(tmp_path / 'h.sqlite3')) as h:
+        yield h
+
+
+def test_add_dedupes_by_content(history):
+    first = history.add('white lace dress', 'generate', 7)
+    assert history.add('white lace dress', 'clothes') == first
+    entry = history.get(first)
+    assert entry.uses == 2 and entry.stage == 'generate' and entry.seed == 7
+    assert history.stats()['entries'] == 1
+
+
+def test_search_orders_by_last_used(history):
+    old = history.add('white lace dress', 'generate')
+    new = history.add('white lace skirt', 'generate')
+    assert [e.id for e in history.search('lace')] == [new, old]
+    history.touch(old)
+    assert [e.id for e in history.search('lace')] == [old, new]
+    assert [e.id for e in history.search('lace')] == [e.id for e in history.recent()]
+
+
+def test_search_short_terms_and_stage(history):
+    a = history.add('red hair, up do', 'appearance')
+    history.add('red hair, ponytail', 'generate')
+    assert [e.id for e in history.search('up hair', stage='appearance')] == [a]
+    assert [e.text for e in history.search('ponytai')] == ['red hair, ponytail']
+
+
+def test_evicts_least_recently_used(tmp_path):
+    with prompt_history.PromptHistory(str(tmp_path / 'h.sqlite3'), max_entries=1000) as h:
+        ids = [h.add(f'prompt {i}', 'generate') for i in range(1000)]
+        h.touch(ids[0])
+        ids.append(h.add('one too many', 'generate'))
+        assert h.stats()['entries'] <= 900
+        assert h.get(ids[0]) is not None and h.get(ids[-1]) is not None
+        assert h.get(ids[1]) is None
+
+
+def test_store_without_seq_is_migrated(tmp_path):
+    path = str(tmp_path / 'old.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE prompts (id INTEGER PRIMARY KEY, hash BLOB NOT NULL UNIQUE, text TEXT NOT NULL,
+            stage TEXT NOT NULL, seed TEXT, created REAL NOT NULL, last_used REAL NOT NULL,
+            uses INTEGER NOT NULL DEFAULT 1, size INTEGER NOT NULL);
+        CREATE TABLE totals (id INTEGER PRIMARY KEY, entries INTEGER NOT NULL, bytes INTEGER NOT NULL);
+        INSERT INTO totals VALUES (0, 2, 0);
+        INSERT INTO prompts VALUES (1, x'01', 'white lace dress', 'generate', NULL, 1, 20, 1, 16);
+        INSERT INTO prompts VALUES (2, x'02', 'white lace skirt', 'generate', NULL, 2, 10, 1, 16);
+    """)
+    conn.commit()
+    conn.close()
+    with prompt_history.PromptHistory(path) as h:
+        assert [e.id for e in h.search('lace')] == [1, 2]
+        h.touch(2)
+        assert [e.id for e in h.search('lace')] == [2, 1]
+        assert h.add('white lace gloves', 'generate') == 3
+        assert [e.id for e in h.search('white')] == [3, 2, 1]
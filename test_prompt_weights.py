@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+import prompt_weights as pw
+
+
+def test_nested_groups_and_explicit_weights():
+    parsed = pw.parse_attention('(((hidden face:1.9))), (high angle shot:1.2)')
+    assert list(parsed.spans()) == [('hidden face', 3, 1.9), (', ', 0, None), ('high angle shot', 1, 1.2)]
+    assert list(parsed.group_depth) == [1, 2, 3, 1]
+    assert list(parsed.group_parent) == [-1, 0, 1, -1]
+    assert [math.isnan(w) for w in parsed.group_weight] == [True, True, False, False]
+    # Two implicit pairs around an explicit 1.9.
+    assert list(parsed.effective_weights()) == pytest.approx([1.1 * 1.1 * 1.9, 1.0, 1.2])
+
+
+def test_square_brackets_and_escapes_are_plain_text():
+    parsed = pw.parse_attention('a ((b:1.5)) [c] \\(d\\)')
+    assert list(parsed.spans()) == [('a ', 0, None), ('b', 2, 1.5), (' [c] \\(d\\)', 0, None)]
+    assert list(parsed.group_open) == [2, 3]
+    assert list(parsed.group_close) == [10, 9]
+
+
+def test_unclosed_groups_end_at_end_of_prompt():
+    text = 'a) (b (c:0.5)'
+    parsed = pw.parse_attention(text)
+    assert list(parsed.spans()) == [('a) ', 0, None), ('b ', 1, None), ('c', 2, 0.5)]
+    assert list(parsed.group_close) == [len(text), 12]
+    assert list(parsed.effective_weights()) == pytest.approx([1.0, 1.1, 0.55])
+
+
+def test_unchanged_prompts_round_trip_byte_exactly():
+    prompts = ['(a: 1.50 ), ((b:1.200000)), [c] \\(d:2\\)', 'no weights at all', '(e:.5']
+    batch = pw.WeightBatch(prompts)
+    assert list(batch) == prompts
+    batch.rescale(1.0000001)
+    assert list(batch) == prompts
+
+
+def test_rescale_and_clamp_rewrite_only_the_numbers():
+    batch = pw.WeightBatch(['(a:1.5), ((b:1.200000))', 'plain', '(c:0.4)'])
+    assert list(batch.offsets) == [0, 2, 2, 3]
+    batch.rescale(1.2)
+    batch.clamp(0.5, 1.6)
+    assert list(batch.weights) == pytest.approx([1.6, 1.44, 0.5])
+    assert list(batch) == ['(a:1.6), ((b:1.440000))', 'plain', '(c:0.5)']
+    batch.reset()
+    assert batch.serialize(0) == '(a:1.5), ((b:1.200000))'
+
+
+@pytest.mark.parametrize('value, original, expected', [
+    (1.65, '1.5', '1.6'),
+    (1.7, '2', '1.7'),
+    (1.32, '1.200000', '1.320000'),
+    (0.123, '.25', '0.12'),
+])
+def test_format_weight_keeps_decimals(value, original, expected):
+    assert pw._format_weight(value, original) == expected
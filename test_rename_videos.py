@@ -0,0 +1,209 @@
+import io
+import json
+import struct
+import time
+
+import pytest
+
+import rename_videos as rv
+
+
+def _box(kind, payload=b''):
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+def _mvhd(when, version=0):
+    seconds = 0 if when is None else int((when - rv.QUICKTIME_EPOCH).total_seconds())
+    if version == 0:
+        body = struct.pack('>B3xII', 0, seconds, seconds)
+    else:
+        body = struct.pack('>B3xQQ', 1, seconds, seconds)
+    return _box(b'mvhd', body + bytes(80))
+
+
+def _mp4(path, when, version=0):
+    # ftyp, a 64-bit-size mdat ahead of moov (as cameras write it), then moov/mvhd.
+    mdat = struct.pack('>I4sQ', 1, b'mdat', 16 + 32) + bytes(32)
+    path.write_bytes(_box(b'ftyp', b'isom\0\0\0\0') + mdat + _box(b'moov', _box(b'trak') + _mvhd(when, version)))
+    return path
+
+
+def _touch(directory, *names):
+    paths = []
+    for name in names:
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'')
+        paths.append(path)
+    return paths
+
+
+def test_probe_in_order_keeps_order_and_bounds_lookahead(tmp_path, monkeypatch):
+    files = _touch(tmp_path, *(f'P{i:02}.mp4' for i in range(24)))
+    started = []
+
+    def fake_probe(path):
+        started.append(path)
+        # Later files finish first.
+        time.sleep(0.002 * (3 - int(path.stem[1:]) % 4))
+        return rv.Probe(None, None, 'native')
+
+    monkeypatch.setattr(rv, 'probe_creation_time', fake_probe)
+    jobs = 3
+    out = []
+    for path, probe in rv.probe_in_order(files, jobs=jobs):
+        assert len(started) <= len(out) + 2 * jobs
+        assert probe.method == 'native'
+        out.append(path)
+    assert out == files and sorted(started) == files
+
+
+def test_probe_in_order_reports_unstattable_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(rv, 'probe_creation_time', lambda path: rv.Probe(None, None, 'native'))
+    (present,) = _touch(tmp_path, 'P1.mp4')
+    results = list(rv.probe_in_order([tmp_path / 'P0.mp4', present], jobs=2))
+    assert [(p.name, r.method) for p, r in results] == [('P0.mp4', 'failed'), ('P1.mp4', 'native')]
+    assert 'Could not stat P0.mp4' in results[0][1].warning
+
+
+def test_metadata_cache_keys_on_size_and_mtime(tmp_path):
+    (video,) = _touch(tmp_path, 'P1.mp4')
+    when = rv.datetime(2024, 1, 15, 14, 30, 45, tzinfo=rv.timezone.utc)
+    with rv.MetadataCache(str(tmp_path / 'cache.sqlite3')) as cache:
+        st = video.stat()
+        assert cache.lookup(video, st) is None
+        cache.store(video, st, when)
+        hit = cache.lookup(video, st)
+        assert (hit.creation_time, hit.method) == (when, 'cache')
+
+        video.write_bytes(b'changed')
+        assert cache.lookup(video, video.stat()) is None
+
+        # "No metadata" is cached too, and entries follow renames.
+        st = video.stat()
+        cache.store(video, st, None)
+        moved = video.rename(tmp_path / '20240115_143045.mp4')
+        cache.rename(video, moved)
+        assert cache.lookup(video, st) is None
+        assert cache.lookup(moved, moved.stat()).creation_time is None
+
+
+def test_cached_files_are_not_probed_again(tmp_path, monkeypatch):
+    files = _touch(tmp_path, 'P1.mp4', 'P2.mp4')
+    calls = []
+
+    def fake_probe(path):
+        calls.append(path)
+        return rv.Probe(None, None, 'ffprobe')
+
+    monkeypatch.setattr(rv, 'probe_creation_time', fake_probe)
+    with rv.MetadataCache(str(tmp_path / 'cache.sqlite3')) as cache:
+        assert [p.method for _, p in rv.probe_in_order(files, 2, cache)] == ['ffprobe', 'ffprobe']
+        assert [p.method for _, p in rv.probe_in_order(files, 2, cache)] == ['cache', 'cache']
+    assert calls == files
+
+
+@pytest.mark.parametrize('version', [0, 1])
+def test_read_mvhd_creation_time(tmp_path, version):
+    when = rv.datetime(2024, 1, 15, 14, 30, 45, tzinfo=rv.timezone.utc)
+    video = _mp4(tmp_path / 'P1.mp4', when, version)
+    assert rv.read_mvhd_creation_time(video) == when
+    probe = rv.probe_creation_time(video)
+    assert (probe.creation_time, probe.method) == (when, 'native')
+
+
+def test_read_mvhd_zero_time_and_bad_files(tmp_path):
+    assert rv.read_mvhd_creation_time(_mp4(tmp_path / 'P0.mp4', None)) is None
+    no_moov = tmp_path / 'P2.mp4'
+    no_moov.write_bytes(_box(b'ftyp', b'isom') + _box(b'mdat', bytes(16)))
+    with pytest.raises(ValueError, match='no moov'):
+        rv.read_mvhd_creation_time(no_moov)
+    bad_size = tmp_path / 'P3.mp4'
+    bad_size.write_bytes(struct.pack('>I4s', 4, b'moov') + bytes(16))
+    with pytest.raises(ValueError, match='bad size'):
+        rv.read_mvhd_creation_time(bad_size)
+
+
+def test_planner_suffixes_collisions(tmp_path):
+    listings = {str(tmp_path): {'20240115_143045.MP4', 'P1.mp4', 'P2.mp4', 'P3.mp4', 'P4.mp4'}}
+    planner = rv.RenamePlanner(listings)
+    stem = '20240115_143045'
+    # Taken on disk (case-insensitively), then by the names planned so far.
+    assert planner.plan(tmp_path / 'P1.mp4', stem) == f'{stem}_1.mp4'
+    assert planner.plan(tmp_path / 'P2.mp4', stem) == f'{stem}_2.mp4'
+    # A file that already has a planned-for name keeps it.
+    assert planner.plan(tmp_path / f'{stem}_3.mp4', stem) == f'{stem}_3.mp4'
+    # Vacated names can be reused.
+    planner.vacate(tmp_path / 'P3.mp4')
+    assert planner.plan(tmp_path / 'P4.mp4', 'P3') == 'P3.mp4'
+
+
+def test_scan_videos_streams_directories(tmp_path):
+    _touch(tmp_path, 'P2.MP4', 'P1.mp4', 'Q1.mp4', 'P3.mov', 'b/P5.mp4', 'a/P4.mp4', 'c/x.txt')
+    listings = {}
+    found = list(rv.scan_videos(tmp_path, recursive=True, listings=listings))
+    assert [p.relative_to(tmp_path).as_posix() for p in found] == ['P1.mp4', 'P2.MP4', 'a/P4.mp4', 'b/P5.mp4']
+    assert sorted(listings) == sorted(str(tmp_path / d) for d in ('', 'a', 'b'))
+    assert 'Q1.mp4' in listings[str(tmp_path / '')]
+    assert [p.name for p in rv.scan_videos(tmp_path, extensions=('.mov',))] == ['P3.mov']
+
+
+def test_same_second_clips_get_numbered(tmp_path):
+    when = rv.datetime(2024, 1, 15, 14, 30, 45, tzinfo=rv.timezone.utc)
+    for name in ('P1.mp4', 'P2.mp4', 'P3.mp4'):
+        _mp4(tmp_path / name, when)
+    (tmp_path / '20240115_143045.mp4').write_bytes(b'')
+    rv.rename_video_files(tmp_path, dry_run=False, jobs=2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        '20240115_143045.mp4', '20240115_143045_1.mp4', '20240115_143045_2.mp4', '20240115_143045_3.mp4',
+    ]
+    assert rv.read_mvhd_creation_time(tmp_path / '20240115_143045_3.mp4') == when
+
+
+def test_target_created_after_scan_is_not_replaced(tmp_path, monkeypatch):
+    when = rv.datetime(2024, 1, 15, 14, 30, 45, tzinfo=rv.timezone.utc)
+    _mp4(tmp_path / 'P1.mp4', when)
+    probe_in_order = rv.probe_in_order
+
+    def late_copy(*args):
+        for item in probe_in_order(*args):
+            (tmp_path / '20240115_143045.mp4').write_bytes(b'copied in')
+            yield item
+
+    monkeypatch.setattr(rv, 'probe_in_order', late_copy)
+    rv.rename_video_files(tmp_path, dry_run=False, jobs=1)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['20240115_143045.mp4', '20240115_143045_1.mp4']
+    assert (tmp_path / '20240115_143045.mp4').read_bytes() == b'copied in'
+
+
+def test_jsonl_report_events(tmp_path):
+    when = rv.datetime(2024, 1, 15, 14, 30, 45, tzinfo=rv.timezone.utc)
+    _mp4(tmp_path / 'P1.mp4', when)
+    _mp4(tmp_path / 'P2.mp4', when)
+    _mp4(tmp_path / 'P0.mp4', when)
+    out = io.StringIO()
+    report = rv.JsonlReport(out, interval=3600)
+    with rv.MetadataCache(str(tmp_path / 'cache.sqlite3')) as cache:
+        rv.rename_video_files(tmp_path, dry_run=True, jobs=2, cache=cache, report=report)
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    files = [e for e in events if e['event'] == 'file']
+    assert [(e['path'].rsplit('/', 1)[-1], e['probe'], e['name'], e['outcome']) for e in files] == [
+        ('P0.mp4', 'native', '20240115_143045.mp4', 'would_rename'),
+        ('P1.mp4', 'native', '20240115_143045_1.mp4', 'would_rename'),
+        ('P2.mp4', 'native', '20240115_143045_2.mp4', 'would_rename'),
+    ]
+    assert all(e['time_source'] == 'metadata' and e['probe_ms'] >= 0 for e in files)
+    (summary,) = [e for e in events if e['event'] == 'summary']
+    assert summary['final'] and summary['files'] == summary['total'] == 3
+    assert summary['probe_ratio']['native'] == 1.0 and summary['outcomes'] == {'would_rename': 3}
+    assert summary['eta_s'] == 0.0
+
+
+def test_jsonl_report_periodic_summaries():
+    out = io.StringIO()
+    report = rv.JsonlReport(out, total=10, interval=0)
+    report.file(rv.Path('P1.mp4'), rv.Probe(None, None, 'failed', 0.5), 'mtime', None, 'error', 'boom')
+    file_event, summary = (json.loads(line) for line in out.getvalue().splitlines())
+    assert file_event['error'] == 'boom' and file_event['probe_ms'] == 500.0
+    assert summary['event'] == 'summary' and not summary['final']
+    assert summary['mtime_fallbacks'] == 1 and summary['total'] == 10 and summary['eta_s'] is not None
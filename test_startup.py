@@ -0,0 +1,118 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+HERE = Path(__file__).resolve().parent
+
+NO_DISPLAY = 77
+
+# Runs gui.py with the convert_colors import held back until the window has
+# painted. If the window waited for the vocabulary it would never map, and
+# the run times out. Once the import is let through, the converter buttons
+# must come alive and a click must convert the clipboard.
+GUI_DRIVER = r'''
+import importlib.abc
+import runpy
+import sys
+import threading
+import tkinter as tk
+from tkinter import messagebox
+
+try:
+    tk.Tk().destroy()
+except tk.TclError:
+    sys.exit(%(no_display)d)
+
+gate = threading.Event()
+failures = []
+
+
+class HeldImport(importlib.abc.MetaPathFinder):
+    def find_spec(self, name, path, target=None):
+        if name == 'convert_colors' and not gate.is_set():
+            if threading.current_thread() is threading.main_thread():
+                failures.append('convert_colors imported on the Tk thread')
+                gate.set()
+            gate.wait(20)
+        return None
+
+
+sys.meta_path.insert(0, HeldImport())
+for box in ('showerror', 'showinfo', 'showwarning'):
+    setattr(messagebox, box, lambda title, msg, **kw: failures.append(f'{title}: {msg}'))
+
+PROMPT = 'a woman wearing a red shirt and blue jeans, long hair'
+
+
+def drive(root):
+    buttons = [w for w in root.winfo_children() if isinstance(w, tk.Button) and w.cget('text') == '...']
+    steps = iter(['mapped', 'ready', 'converted'])
+    state = {'step': next(steps)}
+    painted = threading.Event()
+    # gui.py unbinds its own <Expose> handler from root; this one is on "all".
+    root.bind_all('<Expose>', lambda event: painted.set(), add='+')
+
+    def tick():
+        step = state['step']
+        if step == 'mapped' and painted.is_set():
+            if len(buttons) != 3 or any(b.cget('state') != 'disabled' for b in buttons):
+                failures.append('converter buttons are not waiting for the vocabulary')
+            if 'convert_colors' in sys.modules:
+                failures.append('convert_colors loaded before the window mapped')
+            gate.set()
+            state['step'] = next(steps)
+        elif step == 'ready' and all(b.cget('state') == 'normal' for b in buttons):
+            root.clipboard_clear()
+            root.clipboard_append(PROMPT)
+            buttons[0].invoke()
+            state['step'] = next(steps)
+        elif step == 'converted' and root.clipboard_get() != PROMPT:
+            root.destroy()
+            return
+        if failures:
+            root.destroy()
+            return
+        root.after(20, tick)
+
+    def give_up():
+        failures.append(f'timed out waiting for: {state["step"]}')
+        root.destroy()
+
+    root.after(30000, give_up)
+    tick()
+
+
+mainloop = tk.Misc.mainloop
+tk.Misc.mainloop = lambda root, n=0: (root.after(0, drive, root), mainloop(root, n))
+sys.argv = ['gui.py', '--no-history']
+try:
+    runpy.run_path(%(gui)r, run_name='__main__')
+except tk.TclError:
+    # Tk calls after root.destroy() from jobs still in flight.
+    pass
+if failures:
+    sys.exit('; '.join(failures))
+''' % {'no_display': NO_DISPLAY, 'gui': str(HERE / 'gui.py')}
+
+
+def test_gui_window_paints_before_vocabulary_and_buttons_work_after():
+    result = subprocess.run(
+        [sys.executable, '-c', GUI_DRIVER], cwd=HERE, capture_output=True, text=True, timeout=60,
+    )
+    if result.returncode == NO_DISPLAY:
+        pytest.skip('no display')
+    assert result.returncode == 0, result.stderr
+    log = result.stderr
+    assert 'first paint after' in log and 'ready after' in log, log
+    assert log.index('first paint after') < log.index('ready after'), log
+    assert 'before the first paint' not in log, log
+
+
+def test_color_gui_does_not_import_vocabulary_on_startup():
+    # Importing convert_colors parses ai.cpp; only the background loader may
+    # do it, so the window is built without waiting on the vocabulary.
+    code = "import sys, color_gui; sys.exit('convert_colors' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr or 'color_gui imports convert_colors on startup'
@@ -0,0 +1,16 @@
+import variants
+
+
+def test_earlier_pass_wins_overlap():
+    text = 'a dark red silk dress and wool gloves'
+    prompt = variants.analyze_prompt(text, colors=['red'], hair=[], style=[], material=['dark red silk', 'wool'])
+    assert [(s.kind, s.original) for s in prompt.slots] == [('color', 'red'), ('material', 'wool')]
+    assert ''.join(p + s.original for p, s in zip(prompt.pieces, prompt.slots)) + prompt.pieces[-1] == text
+
+
+def test_variants_keep_fixed_text():
+    text = 'white lace pajamas, blonde hair up in a high ponytail'
+    prompt = variants.analyze_prompt(text)
+    assert prompt.slots
+    for out in variants.expand_variants(text, 5, seed=1):
+        assert ' pajamas, ' in out and ' hair ' in out
@@ -0,0 +1,41 @@
+import vocab_coverage
+
+
+def _count(*prompts):
+    vocab = vocab_coverage.vocabulary()
+    return vocab_coverage.count_prompts(prompts, vocab_coverage.build_matcher(vocab), vocab)
+
+
+def test_wearing_does_not_hide_lower_focus():
+    result = _count('a woman wearing jeans, standing')
+    assert result['prompts'] == {'LOWER': 1}
+    assert result['tallies']['LOWER'][result['items'].index('jeans')] == 1
+
+
+def test_focus_from_matched_items():
+    result = _count(
+        'wearing low cut tank top',
+        'wearing low cut tank top, cute panties',
+        'portrait, smiling',
+    )
+    assert result['prompts'] == {'UPPER': 1, 'FULL': 2}
+
+
+def test_words_match_on_boundaries_only():
+    vocab = {'colors': ['red']}
+    matcher = vocab_coverage.build_matcher(vocab)
+    assert matcher.findall('colored red dress') == ['red']
+
+
+def test_items_inside_longer_items_are_counted():
+    vocab = {
+        'camera_angles': ['from below', '(from below)', 'close-up', 'close-up of face'],
+        'upper': [],
+        'lower': [],
+    }
+    matcher = vocab_coverage.build_matcher(vocab)
+    result = vocab_coverage.count_prompts(
+        ['(from below), close-up of face', 'from below, close-up'], matcher, vocab
+    )
+    counts = vocab_coverage.fold(result, vocab)['camera_angles']['FULL']
+    assert list(counts) == [2, 1, 2, 1]
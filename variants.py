@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+variants.py
+
+Expand one prompt into many random variants in bulk.
+
+The prompt is analyzed once into "slots" (every color, hair color, hairstyle and
+material that the convert_* functions in convert_colors.py would replace). All
+replacement indices for N variants are then drawn with one vectorized NumPy call
+per slot type, and each variant is rendered by splicing pre-cased replacements
+between the fixed pieces of the prompt.
+
+NumPy is only needed for the bulk sampling step. analyze_prompt() and
+render_variant() are plain Python, and convert_colors.py never imports NumPy.
+
+Usage:
+  python variants.py prompt.txt -n 10000 --seed 1 -o variants.txt
+  python variants.py prompt.txt -n 10000 --seed 1 --null > variants.bin
+
+Options:
+  -n N           Number of variants to generate
+  --seed N       Seed RNG for reproducible variants
+  --null         Terminate each variant with NUL instead of a blank line
+"""
+import argparse
+import bisect
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+from convert_colors import (
+    COLORS,
+    HAIR,
+    STYLE,
+    MATERIAL,
+    MASKCOLOR,
+    MOUTHMASK_MATERIAL,
+    build_pattern,
+    preserve_case,
+)
+
+
+# Slot types, in the order their indices are drawn. The order is part of the
+# seed contract: changing it changes which variants a given seed produces.
+SLOT_KINDS = ("color", "maskcolor", "hair", "style", "material", "mouthmask_material")
+
+
+@dataclass(frozen=True)
+class Slot:
+    start: int
+    end: int
+    kind: str
+    original: str
+
+
+@dataclass(frozen=True)
+class PromptSlots:
+    """A prompt split into fixed text pieces and replaceable slots.
+
+    pieces has len(slots) + 1 entries: pieces[i] is the text before slots[i],
+    pieces[-1] the text after the last slot.
+    """
+    text: str
+    slots: tuple[Slot, ...]
+    pieces: tuple[str, ...]
+    choices: dict[str, tuple[str, ...]]
+
+    def slot_counts(self) -> dict[str, int]:
+        counts = {kind: 0 for kind in SLOT_KINDS}
+        for slot in self.slots:
+            counts[slot.kind] += 1
+        return counts
+
+
+def analyze_prompt(
+    text: str,
+    colors=COLORS,
+    hair=HAIR,
+    style=STYLE,
+    material=MATERIAL,
+) -> PromptSlots:
+    """Find every replaceable word in text, using the same context rules as
+    convert_colors(), convert_hair(), convert_style() and convert_material().
+    """
+    found: list[Slot] = []
+    hair_set = {h.lower() for h in hair}
+
+    for m in build_pattern(colors).finditer(text):
+        after = text[m.end():]
+        # Hair colors followed by "hair" belong to convert_hair().
+        if m.group(0).lower() in hair_set and re.match(r"^\s+hair\b", after, flags=re.IGNORECASE):
+            continue
+        if re.match(r"^\s*(?:[a-z_]+\s+){0,2}mouth_mask\b", after, flags=re.IGNORECASE):
+            kind = "maskcolor"
+        else:
+            kind = "color"
+        found.append(Slot(m.start(), m.end(), kind, m.group(0)))
+
+    for m in build_pattern(hair).finditer(text):
+        if re.match(r"^\s+hair\b", text[m.end():], flags=re.IGNORECASE):
+            found.append(Slot(m.start(), m.end(), "hair", m.group(0)))
+
+    for m in build_pattern(style).finditer(text):
+        before = text[max(0, m.start() - 25):m.start()]
+        if re.search(r"hair\s+$", before, flags=re.IGNORECASE):
+            found.append(Slot(m.start(), m.end(), "style", m.group(0)))
+
+    for m in build_pattern(material).finditer(text):
+        if re.match(r"^\s*mouth_mask\b", text[m.end():], flags=re.IGNORECASE):
+            kind = "mouthmask_material"
+        else:
+            kind = "material"
+        found.append(Slot(m.start(), m.end(), kind, m.group(0)))
+
+    # The converters run one after another, so an earlier pass wins any
+    # overlap: found is in pass order, and a slot is kept only if it doesn't
+    # overlap one kept before it.
+    kept: list[Slot] = []
+    for slot in found:
+        i = bisect.bisect_left(kept, slot.start, key=lambda s: s.start)
+        if i > 0 and kept[i - 1].end > slot.start:
+            continue
+        if i < len(kept) and kept[i].start < slot.end:
+            continue
+        kept.insert(i, slot)
+    slots: list[Slot] = []
+    pieces: list[str] = []
+    pos = 0
+    for slot in kept:
+        pieces.append(text[pos:slot.start])
+        slots.append(slot)
+        pos = slot.end
+    pieces.append(text[pos:])
+
+    choices = {
+        "color": tuple(colors),
+        "maskcolor": tuple(MASKCOLOR),
+        "hair": tuple(hair),
+        "style": tuple(style),
+        "material": tuple(mat for mat in material if mat),
+        "mouthmask_material": tuple(mat for mat in MOUTHMASK_MATERIAL if mat),
+    }
+    return PromptSlots(text=text, slots=tuple(slots), pieces=tuple(pieces), choices=choices)
+
+
+def sample_indices(prompt: PromptSlots, n: int, seed: int | None = None) -> dict:
+    """Draw replacement indices for n variants.
+
+    Returns {kind: int array of shape (n, slots_of_that_kind)}. Each slot type
+    costs exactly one NumPy call regardless of n.
+    """
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise RuntimeError("Bulk variant sampling requires NumPy (pip install numpy)") from e
+
+    rng = np.random.default_rng(seed)
+    counts = prompt.slot_counts()
+    out = {}
+    for kind in SLOT_KINDS:
+        k = counts[kind]
+        if not k or not prompt.choices[kind]:
+            continue
+        out[kind] = rng.integers(0, len(prompt.choices[kind]), size=(n, k))
+    return out
+
+
+def _rendered_choices(prompt: PromptSlots) -> list[tuple[str, ...]]:
+    # Case-preserve every possible replacement per slot once, up front.
+    return [
+        tuple(preserve_case(slot.original, c) for c in prompt.choices[slot.kind])
+        for slot in prompt.slots
+    ]
+
+
+def render_variant(prompt: PromptSlots, choice_idx: list[int]) -> str:
+    """Render one variant from one index per slot (in slot order)."""
+    parts = [prompt.pieces[0]]
+    for slot, idx, piece in zip(prompt.slots, choice_idx, prompt.pieces[1:]):
+        options = prompt.choices[slot.kind]
+        parts.append(preserve_case(slot.original, options[idx]) if options else slot.original)
+        parts.append(piece)
+    return "".join(parts)
+
+
+def iter_variants(prompt: PromptSlots, n: int, seed: int | None = None):
+    """Yield n rendered variants of an analyzed prompt."""
+    drawn = {kind: arr.tolist() for kind, arr in sample_indices(prompt, n, seed).items()}
+    rendered = _rendered_choices(prompt)
+
+    # Map each slot to (its kind's rows, its column within that kind).
+    columns: list[tuple[list | None, int]] = []
+    seen = {kind: 0 for kind in SLOT_KINDS}
+    for slot in prompt.slots:
+        columns.append((drawn.get(slot.kind), seen[slot.kind]))
+        seen[slot.kind] += 1
+
+    pieces = prompt.pieces
+    for i in range(n):
+        parts = [pieces[0]]
+        for j, (rows, col) in enumerate(columns):
+            parts.append(rendered[j][rows[i][col]] if rows is not None else prompt.slots[j].original)
+            parts.append(pieces[j + 1])
+        yield "".join(parts)
+
+
+def expand_variants(text: str, n: int, seed: int | None = None) -> list[str]:
+    """Analyze text once and return n random variants of it."""
+    return list(iter_variants(analyze_prompt(text), n, seed))
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("input", help="Input prompt file")
+    p.add_argument("-n", "--count", type=int, default=100, help="Number of variants")
+    p.add_argument("-o", "--output", help="Output file (omit for stdout)")
+    p.add_argument("--seed", type=int, help="Random seed for reproducibility")
+    p.add_argument("--null", action="store_true", help="NUL-terminate variants instead of separating with a blank line")
+    args = p.parse_args()
+
+    inp = Path(args.input)
+    if not inp.exists():
+        print(f"Input file not found: {inp}")
+        raise SystemExit(2)
+
+    prompt = analyze_prompt(inp.read_text(encoding="utf-8"))
+    sep = "\0" if args.null else "\n\n"
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        for variant in iter_variants(prompt, args.count, args.seed):
+            out.write(variant)
+            out.write(sep)
+    finally:
+        if args.output:
+            out.close()
+
+    counts = prompt.slot_counts()
+    summary = ", ".join(f"{k}: {v}" for k, v in counts.items() if v)
+    print(f"--- {args.count} variants, slots: {summary or 'none'} ---", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+vocab_coverage.py
+
+Check that every vocabulary item ai.cpp can emit actually shows up in
+generated output, and how evenly.
+
+All items of every category (COLORS, MATERIAL, MASKCOLOR,
+MOUTHMASK_MATERIAL, UPPER, LOWER, HAIR, STYLE, CAMERA_ANGLES, as parsed by
+convert_colors.py) are compiled into one trie-shaped regex, so each prompt
+is scanned once for all of them, with word boundaries ("red" doesn't count
+inside "colored"). The scan is a lookahead, so it finds the longest item
+starting at every position, overlapping or nested in other matches; items
+that are word-boundary prefixes of that longest match are credited with it.
+Every occurrence of every item is counted, so "from below" still counts
+inside "(from below)". Counts go straight into one array of counters per
+body focus, indexed by item. The focus is read off the same matches: ai.cpp
+only dresses the upper body unless the focus is LOWER and the lower body
+unless it is UPPER, so a prompt with UPPER items only is UPPER, LOWER items
+only is LOWER, and anything else FULL (an upper garment with nothing below,
+like pajamas, reads as UPPER). A phrase that belongs to several categories
+(e.g. a color that is also a mask color) counts for each of them.
+
+Large corpora are split by byte range across worker processes (-j).
+
+Usage:
+  ai --count 1000000 --null > corpus.bin
+  python vocab_coverage.py corpus.bin --null -j 8
+  python vocab_coverage.py pipeline_out.jsonl --json > coverage.json
+  ai --count 10000 --null | python vocab_coverage.py --null
+
+Options:
+  --null           Prompts are NUL-terminated (default: blank-line separated; .jsonl uses "text")
+  -j N             Worker processes (default: 1; files only)
+  --categories L   Comma-separated subset of categories to report
+  --json           Print the full per-item counts as JSON instead of the text report
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+from array import array
+from collections import Counter
+from pathlib import Path
+
+import convert_colors as cc
+
+
+CATEGORIES = {
+    "colors": cc.COLORS,
+    "material": cc.MATERIAL,
+    "maskcolor": cc.MASKCOLOR,
+    "mouthmask_material": cc.MOUTHMASK_MATERIAL,
+    "upper": cc.UPPER,
+    "lower": cc.LOWER,
+    "hair": cc.HAIR,
+    "style": cc.STYLE,
+    "camera_angles": cc.CAMERA_ANGLES,
+}
+
+BODY_FOCUS = ("UPPER", "LOWER", "FULL")
+
+
+def vocabulary(categories=CATEGORIES) -> dict[str, list[str]]:
+    """Normalized items per category: stripped, lowercased, deduplicated,
+    without the "" placeholders ai.cpp uses for "no material"."""
+    vocab = {}
+    for name, items in categories.items():
+        seen = []
+        for item in items:
+            item = item.strip().lower()
+            if item and item not in seen:
+                seen.append(item)
+        vocab[name] = seen
+    return vocab
+
+
+def _trie_pattern(words) -> str:
+    # Shared prefixes are factored out, so the regex engine walks one trie
+    # instead of trying every item at every position. Greedy optional tails
+    # give longest-first matching.
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        alts = [re.escape(ch) + build(sub) for ch, sub in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+def _words(vocab: dict[str, list[str]]) -> list[str]:
+    return sorted({w for items in vocab.values() for w in items})
+
+
+def build_matcher(vocab: dict[str, list[str]]):
+    """One compiled pattern over every item of every category. findall()
+    returns the longest item starting at each position, overlaps included."""
+    return re.compile(r"(?<!\w)(?=(" + _trie_pattern(_words(vocab)) + r")(?!\w))")
+
+
+_WORD_CHAR = re.compile(r"\w")
+
+
+def _prefix_index(words: list[str]) -> dict[str, tuple[int, ...]]:
+    # Indices of every item matching where a phrase matches: the phrase
+    # itself and the items that are prefixes of it ending on a boundary.
+    index = {w: i for i, w in enumerate(words)}
+    out = {}
+    for w in words:
+        hits = [index[w[:k]] for k in range(1, len(w)) if w[:k] in index and not _WORD_CHAR.match(w[k])]
+        out[w] = tuple(hits) + (index[w],)
+    return out
+
+
+def focus_sets(vocab: dict[str, list[str]]) -> tuple[frozenset, frozenset]:
+    """Items that only occur in UPPER, and only in LOWER."""
+    upper, lower = set(vocab["upper"]), set(vocab["lower"])
+    return frozenset(upper - lower), frozenset(lower - upper)
+
+
+def body_focus(phrases, upper: frozenset, lower: frozenset) -> str:
+    """UPPER, LOWER or FULL, from which garment items a prompt mentions."""
+    has_upper = not upper.isdisjoint(phrases)
+    has_lower = not lower.isdisjoint(phrases)
+    if has_upper and not has_lower:
+        return "UPPER"
+    if has_lower and not has_upper:
+        return "LOWER"
+    return "FULL"
+
+
+def count_prompts(prompts, matcher, vocab: dict[str, list[str]]) -> dict:
+    """Tally item occurrences per body focus: {focus: array of counts}
+    indexed like "items", plus prompt counts. vocab is the full vocabulary
+    the matcher was built from."""
+    words = _words(vocab)
+    credits = _prefix_index(words)
+    tallies = {focus: array("Q", [0]) * len(words) for focus in BODY_FOCUS}
+    prompts_per_focus = Counter()
+    findall = matcher.findall
+    upper, lower = focus_sets(vocab)
+    for text in prompts:
+        phrases = findall(text.lower())
+        focus = body_focus(phrases, upper, lower)
+        prompts_per_focus[focus] += 1
+        tally = tallies[focus]
+        for phrase in phrases:
+            for i in credits[phrase]:
+                tally[i] += 1
+    return {"items": words, "tallies": tallies, "prompts": prompts_per_focus}
+
+
+def fold(result: dict, vocab: dict[str, list[str]]) -> dict:
+    """Regroup item tallies into {category: {focus: array of per-item counts}}."""
+    index = {w: i for i, w in enumerate(result["items"])}
+    counters = {}
+    for name, items in vocab.items():
+        pos = [index[w] for w in items]
+        counters[name] = {
+            focus: array("Q", [result["tallies"][focus][i] for i in pos]) for focus in BODY_FOCUS
+        }
+    return counters
+
+
+def _next_record_start(f, start: int, sep: bytes):
+    # First record boundary (just after a separator) at or after start.
+    offset = max(0, start - len(sep))
+    f.seek(offset)
+    tail = b""
+    while True:
+        block = f.read(1 << 20)
+        if not block:
+            return None
+        buf = tail + block
+        k = buf.find(sep)
+        if k >= 0:
+            return offset - len(tail) + k + len(sep)
+        tail = buf[-(len(sep) - 1):] if len(sep) > 1 else b""
+        offset += len(block)
+
+
+def _iter_chunk(path: str, start: int, end: int, sep: bytes, jsonl: bool):
+    # Prompts whose record starts in [start, end), so byte ranges that
+    # cover a file see every record exactly once.
+    with open(path, "rb") as f:
+        pos = _next_record_start(f, start, sep) if start else 0
+        if pos is None:
+            return
+        f.seek(pos)
+        buf = b""
+        while pos < end:
+            block = f.read(1 << 22)
+            if not block:
+                parts = [buf] if buf else []
+                buf = b""
+            else:
+                buf += block
+                parts = buf.split(sep)
+                buf = parts.pop()
+            for part in parts:
+                if pos >= end:
+                    return
+                pos += len(part) + len(sep)
+                text = part.decode("utf-8")
+                if text.strip():
+                    yield json.loads(text)["text"] if jsonl else text
+            if not block:
+                return
+
+
+def _read_stream(stream, sep: str, jsonl: bool):
+    buf = ""
+    while True:
+        chunk = stream.read(1 << 20)
+        if not chunk:
+            break
+        buf += chunk
+        *parts, buf = buf.split(sep)
+        for part in parts:
+            if part.strip():
+                yield json.loads(part)["text"] if jsonl else part
+    if buf.strip():
+        yield json.loads(buf)["text"] if jsonl else buf
+
+
+def _count_chunk(args):
+    path, start, end, sep, jsonl = args
+    vocab = vocabulary()
+    return count_prompts(_iter_chunk(path, start, end, sep, jsonl), build_matcher(vocab), vocab)
+
+
+def _merge(results):
+    results = list(results)
+    merged = {"items": results[0]["items"], "tallies": {}, "prompts": Counter()}
+    for focus in BODY_FOCUS:
+        total = array("Q", results[0]["tallies"][focus])
+        for r in results[1:]:
+            for i, n in enumerate(r["tallies"][focus]):
+                total[i] += n
+        merged["tallies"][focus] = total
+    for r in results:
+        merged["prompts"].update(r["prompts"])
+    return merged
+
+
+def analyze_file(path: str, sep: str, jsonl: bool = False, jobs: int = 1) -> dict:
+    size = os.path.getsize(path)
+    bsep = sep.encode("utf-8")
+    jobs = max(1, min(jobs, size // (1 << 20) or 1))
+    bounds = [size * k // jobs for k in range(jobs + 1)]
+    tasks = [(path, bounds[k], bounds[k + 1], bsep, jsonl) for k in range(jobs)]
+    if jobs == 1:
+        return _count_chunk(tasks[0])
+    with multiprocessing.get_context().Pool(jobs) as pool:
+        return _merge(pool.map(_count_chunk, tasks))
+
+
+def _skew(counts) -> dict:
+    total = sum(counts)
+    n = len(counts)
+    if not total or not n:
+        return {"total": total, "max_over_uniform": None, "min_over_uniform": None}
+    expected = total / n
+    return {
+        "total": total,
+        "max_over_uniform": max(counts) / expected,
+        "min_over_uniform": min(counts) / expected,
+    }
+
+
+def report(counters: dict, vocab: dict, prompts: Counter, out=sys.stdout):
+    n_prompts = sum(prompts.values())
+    focus_txt = ", ".join(f"{f} {prompts[f]}" for f in BODY_FOCUS)
+    print(f"{n_prompts} prompt(s) ({focus_txt})", file=out)
+    for name, items in vocab.items():
+        per_focus = counters[name]
+        totals = [sum(per_focus[f][i] for f in BODY_FOCUS) for i in range(len(items))]
+        sk = _skew(totals)
+        never = [items[i] for i, c in enumerate(totals) if c == 0]
+        print(f"\n== {name}: {len(items)} item(s), {len(items) - len(never)} seen, {sk['total']} occurrence(s)", file=out)
+        if sk["max_over_uniform"] is not None:
+            print(
+                f"   skew vs uniform: max {sk['max_over_uniform']:.2f}x, min {sk['min_over_uniform']:.2f}x",
+                file=out,
+            )
+        rates = []
+        for f in BODY_FOCUS:
+            occ = sum(per_focus[f])
+            rate = occ / prompts[f] if prompts[f] else 0.0
+            rates.append(f"{f} {rate:.2f}")
+        print(f"   per prompt by body focus: {', '.join(rates)}", file=out)
+        if never:
+            print(f"   never seen: {', '.join(repr(w) for w in never)}", file=out)
+        ranked = sorted(range(len(items)), key=lambda i: totals[i], reverse=True)
+        if sk["total"] and len(items) > 1:
+            top = ", ".join(f"{items[i]!r} {totals[i]}" for i in ranked[:3])
+            low = ", ".join(f"{items[i]!r} {totals[i]}" for i in ranked[-3:] if totals[i])
+            print(f"   most: {top}", file=out)
+            if low:
+                print(f"   least (seen): {low}", file=out)
+
+
+def to_json(counters: dict, vocab: dict, prompts: Counter) -> dict:
+    out = {"prompts": {f: prompts[f] for f in BODY_FOCUS}, "categories": {}}
+    for name, items in vocab.items():
+        per_focus = counters[name]
+        totals = [sum(per_focus[f][i] for f in BODY_FOCUS) for i in range(len(items))]
+        out["categories"][name] = {
+            "items": {
+                w: {"total": totals[i], **{f: per_focus[f][i] for f in BODY_FOCUS}} for i, w in enumerate(items)
+            },
+            "never_seen": [w for i, w in enumerate(items) if totals[i] == 0],
+            "skew": _skew(totals),
+        }
+    return out
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("input", nargs="?", help="Corpus file (omit for stdin)")
+    p.add_argument("--null", action="store_true", help="Prompts are NUL-terminated")
+    p.add_argument("-j", "--jobs", type=int, default=1, help="Worker processes (files only)")
+    p.add_argument("--categories", help="Comma-separated categories to report")
+    p.add_argument("--json", action="store_true", help="Print per-item counts as JSON")
+    args = p.parse_args()
+
+    vocab = vocabulary()
+    if args.categories:
+        wanted = [c.strip() for c in args.categories.split(",") if c.strip()]
+        unknown = [c for c in wanted if c not in vocab]
+        if unknown:
+            p.error(f"unknown categories: {', '.join(unknown)}; choose from {', '.join(vocab)}")
+        vocab = {c: vocab[c] for c in wanted}
+
+    if args.input:
+        inp = Path(args.input)
+        if not inp.exists():
+            print(f"Input file not found: {inp}")
+            raise SystemExit(2)
+        jsonl = inp.suffix.lower() == ".jsonl"
+        sep = "\n" if jsonl else "\0" if args.null else "\n\n"
+        result = analyze_file(str(inp), sep, jsonl, args.jobs)
+    else:
+        sep = "\0" if args.null else "\n\n"
+        # Count against the full vocabulary, as in the file path, whatever
+        # subset is reported.
+        full = vocabulary()
+        result = count_prompts(_read_stream(sys.stdin, sep, False), build_matcher(full), full)
+
+    counters = fold(result, vocab)
+    if args.json:
+        json.dump(to_json(counters, vocab, result["prompts"]), sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        report(counters, vocab, result["prompts"])
+
+
+if __name__ == '__main__':
+    main()